@@ -4,9 +4,10 @@ import signal
 
 # --- 1. IMPORTACIONES ---
 from backend.views.handlers import (
-    AircraftHandler, RouteHandler, FlightHandler, UserHandler, EventHandler,
+    AircraftHandler, RouteHandler, FlightHandler, UserHandler, EventHandler, EventCoverageThresholdHandler,
     LoginHandler, EventRouteHandler, RealCoverageHandler, CoverageAlertHandler,
-    CoverageHandler, CORSRequestHandler
+    CoverageHandler, CoverageSimulationHandler, CoverageExportHandler, CoverageAlertSocketHandler, RuntimeStatsHandler,
+    CORSRequestHandler
 )
 from backend.controllers.aircraft_controller import AircraftController
 from backend.controllers.route_controller import RouteController
@@ -25,10 +26,27 @@ from backend.repositories.event_repository import EventRepository
 from backend.repositories.event_route_repository import EventRouteRepository
 from backend.repositories.real_coverage_repository import RealCoverageRepository
 from backend.repositories.coverage_alert_repository import CoverageAlertRepository
+from backend.repositories.event_route_capacity_repository import EventRouteCapacityRepository
+from backend.repositories.event_coverage_threshold_repository import EventCoverageThresholdRepository
+from backend.repositories.async_flight_repository import AsyncFlightRepository
+from backend.repositories.async_user_repository import AsyncUserRepository
+from backend.repositories.async_real_coverage_repository import AsyncRealCoverageRepository
+from backend.repositories.hot_queries import build_prepared_statements
+from backend.repositories.table_version_repository import TableVersionRepository
 from backend.services.coverage_service import CoverageService
+from backend.services.coverage_engine import SqlCoverageEngine, SnapshotCoverageEngine, NumpyCoverageEngine
+from backend.services.coverage_scheduler import CoverageRecomputeScheduler
+from backend.services.coverage_retention import CoverageRetentionScheduler
+from backend.services.coverage_classifiers import CoverageClassifierRegistry
+from backend.services.coverage_cache import CoverageResultCache
+from backend.services.table_versions import TableVersionRegistry
 from backend.utils.init_db import initialize_tables
 from backend.db.connection import db
+from backend.db.query_executor import AsyncpgQueryExecutor, PeeweeQueryExecutor
 from backend.utils.config import Config
+from backend.utils.pubsub import PubSub
+from backend.utils.response_cache import ResponseCache
+from backend.utils.blocking_executor import BlockingExecutor
 
 
 def make_app():
@@ -38,30 +56,130 @@ def make_app():
     """
     # --- 2. CREACIÓN DE INSTANCIAS ---
 
+    # Pool de hilos donde los handlers ejecutan las llamadas bloqueantes a peewee.
+    blocking_executor = BlockingExecutor(
+        max_workers=Config.BLOCKING_EXECUTOR_WORKERS,
+        database=db,
+        max_streams=Config.STREAM_MAX_CONCURRENT
+    )
+
+    # Ejecutor de las lecturas asíncronas: pool de asyncpg o, si se desactiva, la conexión de peewee.
+    query_executor = (AsyncpgQueryExecutor(min_size=Config.ASYNC_DB_POOL_MIN, max_size=Config.ASYNC_DB_POOL_MAX)
+                      if Config.ASYNC_DB_ENABLED else PeeweeQueryExecutor(blocking_executor))
+
+    # Consultas más frecuentes como sentencias preparadas; su SQL se arma aquí, una vez.
+    prepared_statements = build_prepared_statements(db)
+
+    # Versiones por tabla para las ETag: las escrituras de los repositorios las incrementan.
+    table_versions = TableVersionRegistry(
+        repository=TableVersionRepository(),
+        blocking_executor=blocking_executor,
+        interval_seconds=Config.TABLE_VERSION_REFRESH_INTERVAL
+    )
+
+    # Respuestas GET ya serializadas y comprimidas; las invalidan los controladores al escribir.
+    response_cache = ResponseCache(
+        max_bytes=Config.RESPONSE_CACHE_MAX_BYTES,
+        ttl_seconds=Config.RESPONSE_CACHE_TTL
+    )
+
     # Primero, se crean todas las dependencias de bajo nivel (repositorios)
-    aircraft_repo = AircraftRepository()
-    route_repo = RouteRepository()
-    flight_repo = FlightRepository()
-    user_repo = UserRepository()
-    event_repo = EventRepository()
-    event_route_repo = EventRouteRepository()
-    real_coverage_repo = RealCoverageRepository()
+    event_route_capacity_repo = EventRouteCapacityRepository()
+    aircraft_repo = AircraftRepository(capacity_repo=event_route_capacity_repo, versions=table_versions)
+    route_repo = RouteRepository(versions=table_versions)
+    flight_repo = FlightRepository(capacity_repo=event_route_capacity_repo, statements=prepared_statements)
+    user_repo = UserRepository(statements=prepared_statements)
+    async_flight_repo = AsyncFlightRepository(executor=query_executor, statements=prepared_statements)
+    async_user_repo = AsyncUserRepository(executor=query_executor, statements=prepared_statements)
+    async_real_coverage_repo = AsyncRealCoverageRepository(executor=query_executor, statements=prepared_statements)
+    event_repo = EventRepository(versions=table_versions)
+    event_route_repo = EventRouteRepository(versions=table_versions)
+    real_coverage_repo = RealCoverageRepository(statements=prepared_statements)
     coverage_alert_repo = CoverageAlertRepository()
+    event_coverage_threshold_repo = EventCoverageThresholdRepository()
+    classifier_registry = CoverageClassifierRegistry(threshold_repo=event_coverage_threshold_repo)
+    coverage_cache = CoverageResultCache(
+        max_size=Config.COVERAGE_CACHE_SIZE,
+        ttl_seconds=Config.COVERAGE_CACHE_TTL
+    )
+    # El motor del recálculo es intercambiable; el vectorizado conviene para toda la red.
+    coverage_engine = (NumpyCoverageEngine(classifier_registry=classifier_registry)
+                       if Config.COVERAGE_ENGINE == "numpy" else SqlCoverageEngine())
+    snapshot_engine = SnapshotCoverageEngine()
+    # Canal en proceso por el que se empujan las alertas a los clientes conectados.
+    alert_broker = PubSub(max_queue=Config.ALERT_STREAM_QUEUE_SIZE)
+    simulation_engine = NumpyCoverageEngine(classifier_registry=classifier_registry)
     coverage_service = CoverageService(
         real_coverage_repo=real_coverage_repo,
-        coverage_alert_repo=coverage_alert_repo
+        coverage_alert_repo=coverage_alert_repo,
+        coverage_engine=coverage_engine,
+        snapshot_engine=snapshot_engine,
+        classifier_registry=classifier_registry,
+        simulation_engine=simulation_engine,
+        alert_broker=alert_broker,
+        query_executor=query_executor
+    )
+    coverage_scheduler = CoverageRecomputeScheduler(
+        coverage_service=coverage_service,
+        coverage_cache=coverage_cache,
+        blocking_executor=blocking_executor,
+        interval_seconds=Config.COVERAGE_RECOMPUTE_INTERVAL,
+        event_ids=Config.COVERAGE_RECOMPUTE_EVENTS,
+        response_cache=response_cache
+    )
+    coverage_retention = CoverageRetentionScheduler(
+        real_coverage_repo=real_coverage_repo,
+        blocking_executor=blocking_executor,
+        retention_days=Config.COVERAGE_RETENTION_DAYS,
+        interval_seconds=Config.COVERAGE_COMPACTION_INTERVAL,
+        response_cache=response_cache
     )
 
     # Finalmente, se crean los controladores, inyectando sus dependencias (repositorios o servicios)
-    aircraft_controller = AircraftController(repository=aircraft_repo)
-    route_controller = RouteController(repository=route_repo)
-    flight_controller = FlightController(repository=flight_repo, event_route_repo=event_route_repo, real_coverage_repo=real_coverage_repo)
-    user_controller = UserController(repository=user_repo, secret_key=Config.SECRET_KEY)
-    event_controller = EventController(repository=event_repo)
-    event_route_controller = EventRouteController(repository=event_route_repo)
-    real_coverage_controller = RealCoverageController(repository=real_coverage_repo)
+    aircraft_controller = AircraftController(
+        repository=aircraft_repo,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
+    route_controller = RouteController(
+        repository=route_repo,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
+    flight_controller = FlightController(
+        repository=flight_repo,
+        async_repository=async_flight_repo,
+        event_route_repo=event_route_repo,
+        real_coverage_repo=real_coverage_repo,
+        async_real_coverage_repo=async_real_coverage_repo,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
+    user_controller = UserController(
+        repository=user_repo,
+        async_repository=async_user_repo,
+        blocking_executor=blocking_executor,
+        secret_key=Config.SECRET_KEY
+    )
+    event_controller = EventController(
+        repository=event_repo,
+        threshold_repo=event_coverage_threshold_repo,
+        classifier_registry=classifier_registry,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
+    event_route_controller = EventRouteController(
+        repository=event_route_repo,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
+    real_coverage_controller = RealCoverageController(
+        repository=real_coverage_repo,
+        coverage_cache=coverage_cache,
+        response_cache=response_cache
+    )
     coverage_alert_controller = CoverageAlertController(repository=coverage_alert_repo)
-    coverage_controller = CoverageController(coverage_service=coverage_service)
+    coverage_controller = CoverageController(coverage_service=coverage_service, coverage_cache=coverage_cache)
 
 
     # --- 3. DEFINICIÓN DE RUTAS Y ENSAMBLAJE FINAL ---
@@ -77,6 +195,7 @@ def make_app():
         (r"/users/([0-9]+)", UserHandler, {"controller": user_controller}),
         (r"/events", EventHandler, {"controller": event_controller}),
         (r"/events/([0-9]+)", EventHandler, {"controller": event_controller}),
+        (r"/events/([0-9]+)/coverage_thresholds", EventCoverageThresholdHandler, {"controller": event_controller}),
         (r"/login", LoginHandler, {"controller": user_controller}),
         (r"/event_routes", EventRouteHandler, {"controller": event_route_controller}),
         (r"/event_routes/([0-9]+)", EventRouteHandler, {"controller": event_route_controller}),
@@ -84,14 +203,26 @@ def make_app():
         (r"/real_coverages/([0-9]+)", RealCoverageHandler, {"controller": real_coverage_controller}),
         (r"/coverage_alert", CoverageAlertHandler, {"controller": coverage_alert_controller}),
         (r"/coverage_alert/([0-9]+)", CoverageAlertHandler, {"controller": coverage_alert_controller}),
+        (r"/ws/coverage_alerts", CoverageAlertSocketHandler, {"alert_broker": alert_broker}),
         (r"/coverage/dashboard", CoverageHandler, {"coverage_controller": coverage_controller}),
         (r"/coverage/route_detail/([0-9]+)", CoverageHandler, {"coverage_controller": coverage_controller}),
+        (r"/coverage/cache_stats", CoverageHandler, {"coverage_controller": coverage_controller}),
+        (r"/coverage/export", CoverageExportHandler, {"coverage_controller": coverage_controller}),
+        (r"/coverage/simulate", CoverageSimulationHandler, {"coverage_controller": coverage_controller}),
+        (r"/system/stats", RuntimeStatsHandler),
 
         #Nueva Funcionalidad
         (r"/api/flights/([0-9]+)/manifest", FlightHandler, {"controller": flight_controller}),
     ],
         default_handler_class=CORSRequestHandler,
-        debug=True
+        debug=True,
+        coverage_scheduler=coverage_scheduler,
+        coverage_retention=coverage_retention,
+        query_executor=query_executor,
+        blocking_executor=blocking_executor,
+        prepared_statements=prepared_statements,
+        table_versions=table_versions,
+        response_cache=response_cache
     )
 
 
@@ -101,9 +232,23 @@ if __name__ == "__main__":
     app.listen(8888)
     print("Servidor corriendo en http://localhost:8888")
 
-    def shutdown_hook():
+    # El recálculo de cobertura corre en segundo plano; el panel solo lee.
+    app.settings["coverage_scheduler"].start()
+    # La compactación mantiene acotada la tabla de cálculos de cobertura.
+    app.settings["coverage_retention"].start()
+    # Recoge los cambios de versión hechos por otros procesos.
+    app.settings["table_versions"].start()
+
+    async def shutdown_hook():
+        app.settings["coverage_scheduler"].stop()
+        app.settings["coverage_retention"].stop()
+        app.settings["table_versions"].stop()
+        await app.settings["query_executor"].close()
+        app.settings["blocking_executor"].shutdown()
         if not db.is_closed():
             db.close()
+        # Cierra también las conexiones libres del pool.
+        db.close_all()
         print("Cerrando la base de datos y deteniendo el servidor.")
         tornado.ioloop.IOLoop.current().stop()
 
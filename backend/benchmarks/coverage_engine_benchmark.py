@@ -0,0 +1,75 @@
+"""
+Compara el bucle por fila con la cadena de estrategias, el clasificador por
+umbrales (classify_many) y el motor vectorizado de NumPy, para 10k, 100k y
+1M rutas de evento sintéticas.
+No se conecta a la base de datos, pero importa los modelos, por lo que
+necesita las mismas variables de entorno que la aplicación.
+
+Uso: python -m backend.benchmarks.coverage_engine_benchmark
+"""
+import time
+import numpy as np
+
+from backend.services.coverage_engine import NumpyCoverageEngine
+from backend.strategies.coverage_strategies import (
+    DEFAULT_CLASSIFIER,
+    CriticalStatusStrategy,
+    PartialStatusStrategy,
+    CoveredStatusStrategy
+)
+
+TAMANIOS = (10_000, 100_000, 1_000_000)
+
+
+def python_loop(demanda, capacidad):
+    """Reproduce el cálculo por fila del servicio con la cadena de estrategias."""
+    strategies = [CriticalStatusStrategy(), PartialStatusStrategy(), CoveredStatusStrategy()]
+    estados = []
+    conteos = {"Cubierta": 0, "Parcial": 0, "Crítica": 0}
+    for d, c in zip(demanda, capacidad):
+        porcentaje = (c / d) * 100 if d > 0 else 100.0
+        estado = "Indefinido"
+        for strategy in strategies:
+            status = strategy.get_status(porcentaje)
+            if status:
+                estado = status
+                break
+        estados.append(estado)
+        if estado in conteos:
+            conteos[estado] += 1
+    return estados, conteos
+
+
+def main():
+    engine = NumpyCoverageEngine()
+    rng = np.random.default_rng(42)
+
+    for n in TAMANIOS:
+        demanda = rng.choice([0.0, 50.0, 120.5, 300.0, 1000.0], size=n)
+        capacidad = rng.integers(0, 2000, size=n).astype(np.float64)
+        demanda_lista, capacidad_lista = demanda.tolist(), capacidad.tolist()
+
+        inicio = time.perf_counter()
+        estados_py, conteos_py = python_loop(demanda_lista, capacidad_lista)
+        t_python = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        porcentajes = [(c / d) * 100 if d > 0 else 100.0 for d, c in zip(demanda_lista, capacidad_lista)]
+        estados_clasificador = DEFAULT_CLASSIFIER.classify_many(porcentajes)
+        t_clasificador = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        _, codigos = engine.compute(demanda, capacidad)
+        histograma = engine.summarize(codigos)
+        t_numpy = time.perf_counter() - inicio
+
+        identicos = (estados_py == engine.ETIQUETAS[codigos].tolist() == estados_clasificador
+                     and all(histograma[k] == v for k, v in conteos_py.items()))
+
+        print(f"{n:>9} rutas | estrategias: {t_python * 1000:9.1f} ms "
+              f"| clasificador: {t_clasificador * 1000:8.1f} ms | numpy: {t_numpy * 1000:7.1f} ms "
+              f"| x{t_python / t_numpy:6.1f} | resultados idénticos: {identicos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""
+Compara, por llamada, las consultas más frecuentes armadas con peewee en cada
+llamada contra las mismas consultas del registro de sentencias preparadas
+(SQL armado una vez y PREPARE/EXECUTE en PostgreSQL), con psycopg2 y con asyncpg.
+Usa los datos existentes en la base de datos configurada en DATABASE_URL.
+
+Uso: python -m backend.benchmarks.prepared_statements_benchmark [llamadas]
+"""
+import asyncio
+import sys
+import time
+
+from backend.db.connection import db
+from backend.db.query_executor import AsyncpgQueryExecutor
+from backend.models.flight import Flight
+from backend.models.latest_coverage import LatestCoverage
+from backend.models.user import User
+from backend.repositories.flight_repository import flight_detail_query, overlapping_flight_query
+from backend.repositories.real_coverage_repository import latest_for_event_route_query
+from backend.repositories.hot_queries import build_prepared_statements
+
+LLAMADAS = 2000
+
+
+def casos():
+    """Por cada consulta: nombre, parámetros y la consulta equivalente armada con peewee."""
+    vuelo = Flight.select().order_by(Flight.id).first()
+    usuario = User.select().order_by(User.id).first()
+    ultima = LatestCoverage.select().order_by(LatestCoverage.ruta_evento).first()
+    resultado = []
+    if vuelo:
+        resultado.append(("vuelo_por_id", {"flight_id": vuelo.id},
+                          lambda p: flight_detail_query().where(Flight.id == p["flight_id"]).limit(1)))
+        resultado.append(("vuelo_solapado", {"aeronave_id": vuelo.aeronave_id,
+                                             "fecha_salida": vuelo.fecha_salida,
+                                             "fecha_llegada": vuelo.fecha_llegada},
+                          lambda p: overlapping_flight_query(
+                              p["aeronave_id"], p["fecha_salida"], p["fecha_llegada"]).limit(1)))
+    if ultima:
+        resultado.append(("ultima_cobertura_ruta", {"ruta_evento_id": ultima.ruta_evento_id},
+                          lambda p: latest_for_event_route_query(p["ruta_evento_id"]).limit(1)))
+    if usuario:
+        resultado.append(("usuario_por_nombre", {"username": usuario.username},
+                          lambda p: User.select().where(User.username == p["username"]).limit(1)))
+    return resultado
+
+
+def medir(funcion, llamadas):
+    funcion()  # calentamiento (y PREPARE en la conexión)
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        funcion()
+    return (time.perf_counter() - inicio) / llamadas * 1e6
+
+
+def ids(filas):
+    return [fila.id for fila in filas]
+
+
+async def medir_async(funcion, llamadas):
+    await funcion()
+    inicio = time.perf_counter()
+    for _ in range(llamadas):
+        await funcion()
+    return (time.perf_counter() - inicio) / llamadas * 1e6
+
+
+async def comparar_asyncpg(registro, lista, llamadas):
+    executor = AsyncpgQueryExecutor(min_size=1, max_size=1)
+    try:
+        for nombre, params, construir in lista:
+            prepared = registro[nombre]
+            t_peewee = await medir_async(lambda: executor.execute(construir(params)), llamadas)
+            t_preparada = await medir_async(lambda: executor.execute_prepared(prepared, **params), llamadas)
+            iguales = ids(await executor.execute(construir(params))) == ids(await executor.execute_prepared(prepared, **params))
+            print(f"{nombre:>22} | asyncpg   | peewee: {t_peewee:7.1f} µs | preparada: {t_preparada:7.1f} µs "
+                  f"| ahorro: {t_peewee - t_preparada:6.1f} µs | resultados idénticos: {iguales}")
+    finally:
+        await executor.close()
+
+
+def main():
+    llamadas = int(sys.argv[1]) if len(sys.argv) > 1 else LLAMADAS
+    registro = build_prepared_statements(db)
+    lista = casos()
+    if not lista:
+        print("No hay vuelos, usuarios ni cálculos de cobertura en la base de datos.")
+        return
+
+    with db.connection_context():
+        for nombre, params, construir in lista:
+            t_sql = medir(lambda: construir(params).sql(), llamadas)
+            t_peewee = medir(lambda: list(construir(params)), llamadas)
+            t_preparada = medir(lambda: registro.execute(nombre, **params), llamadas)
+            iguales = ids(construir(params)) == ids(registro.execute(nombre, **params))
+            print(f"{nombre:>22} | psycopg2  | peewee: {t_peewee:7.1f} µs (armar SQL: {t_sql:6.1f} µs) "
+                  f"| preparada: {t_preparada:7.1f} µs | ahorro: {t_peewee - t_preparada:6.1f} µs "
+                  f"| resultados idénticos: {iguales}")
+
+    asyncio.run(comparar_asyncpg(registro, lista, llamadas))
+
+
+if __name__ == "__main__":
+    main()
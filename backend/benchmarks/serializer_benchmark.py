@@ -0,0 +1,108 @@
+"""
+Compara el recorrido reflexivo de _meta.fields (el model_to_dict anterior)
+con los serializadores compilados por modelo, y la codificación JSON de
+Tornado con json_dumps (orjson si está instalado), sobre 100k vuelos
+sintéticos con sus relaciones ya cargadas.
+No se conecta a la base de datos, pero importa los modelos, por lo que
+necesita las mismas variables de entorno que la aplicación.
+
+Uso: python -m backend.benchmarks.serializer_benchmark [vuelos]
+"""
+import datetime
+import decimal
+import gc
+import sys
+import time
+
+from peewee import Model, ForeignKeyField
+from tornado.escape import json_encode
+
+from backend.models.aircraft import Aircraft
+from backend.models.event import Event
+from backend.models.event_route import EventRoute
+from backend.models.flight import Flight
+from backend.models.route import Route
+from backend.utils.serializers import compile_serializer, json_dumps, orjson
+
+VUELOS = 100_000
+
+
+def reflective_model_to_dict(model_instance, exclude_fields=None, include_related=True):
+    """Reproduce el model_to_dict reflexivo: recorre _meta.fields en cada llamada."""
+    if not isinstance(model_instance, Model):
+        return model_instance
+    data = {}
+    exclude_fields = exclude_fields or set()
+    if 'id' not in exclude_fields and hasattr(model_instance, 'id'):
+        data['id'] = model_instance.id
+    for field_name, field_obj in model_instance._meta.fields.items():
+        if field_name in exclude_fields:
+            continue
+        value = getattr(model_instance, field_name)
+        if isinstance(field_obj, ForeignKeyField):
+            data[f"{field_name}_id"] = value.id if isinstance(value, Model) else value
+            if isinstance(value, Model):
+                data[field_name] = reflective_model_to_dict(value, exclude_fields={'id'}, include_related=False)
+            else:
+                data[field_name] = value
+        elif isinstance(value, (datetime.datetime, datetime.date)):
+            data[field_name] = value.isoformat()
+        elif isinstance(value, decimal.Decimal):
+            data[field_name] = float(value)
+        else:
+            data[field_name] = value
+    return data
+
+
+def vuelos_sinteticos(n):
+    """Vuelos en memoria con aeronave y ruta de evento asignadas (sin cargas perezosas)."""
+    eventos = [Event(id=i, codigo_evento=f"EV{i}", nombre_evento=f"Evento {i}", ciudad_evento="Quito",
+                     fecha_inicio=datetime.date(2026, 1, 1 + i), fecha_fin=datetime.date(2026, 1, 5 + i))
+               for i in range(1, 6)]
+    rutas = [Route(id=i, origen=f"O{i}", destino=f"D{i}", distancia=100 * i) for i in range(1, 51)]
+    rutas_evento = [EventRoute(id=i, ruta=rutas[i % 50], evento=eventos[i % 5],
+                               demanda_estimada=decimal.Decimal(f"{i * 3}.50"))
+                    for i in range(1, 201)]
+    aeronaves = [Aircraft(id=i, matricula=f"HC-{i:04d}", modelo="A320", capacidad=150 + i % 40)
+                 for i in range(1, 101)]
+    base = datetime.datetime(2026, 1, 1, 6, 0)
+    return [Flight(id=i, codigo_vuelo=f"VU{i:06d}",
+                   fecha_salida=base + datetime.timedelta(minutes=i),
+                   fecha_llegada=base + datetime.timedelta(minutes=i + 90),
+                   aeronave=aeronaves[i % 100], ruta_evento=rutas_evento[i % 200])
+            for i in range(1, n + 1)]
+
+
+def medir(funcion):
+    # Como timeit: sin el recolector de ciclos, que con 100k diccionarios nuevos dominaría la medición.
+    gc.collect()
+    gc.disable()
+    try:
+        inicio = time.perf_counter()
+        resultado = funcion()
+        return resultado, time.perf_counter() - inicio
+    finally:
+        gc.enable()
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else VUELOS
+    vuelos = vuelos_sinteticos(n)
+    serializar = compile_serializer(Flight)
+
+    reflexivo, t_reflexivo = medir(lambda: [reflective_model_to_dict(v) for v in vuelos])
+    compilado, t_compilado = medir(lambda: [serializar(v) for v in vuelos])
+    print(f"{n:>9} vuelos | reflexivo: {t_reflexivo * 1000:8.1f} ms | compilado: {t_compilado * 1000:8.1f} ms "
+          f"| x{t_reflexivo / t_compilado:5.1f} | resultados idénticos: {reflexivo == compilado}")
+
+    documento = {"flights": compilado, "next_cursor": None}
+    tornado_json, t_tornado = medir(lambda: json_encode(documento).encode("utf-8"))
+    rapido, t_rapido = medir(lambda: json_dumps(documento))
+    codificador = "orjson" if orjson is not None else "json estándar"
+    print(f"{'':>9} JSON   | json_encode: {t_tornado * 1000:6.1f} ms | json_dumps ({codificador}): "
+          f"{t_rapido * 1000:6.1f} ms | x{t_tornado / t_rapido:5.1f} "
+          f"| {len(rapido) / 1e6:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
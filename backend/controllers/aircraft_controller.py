@@ -8,8 +8,10 @@ class AircraftController:
     """
 
     # 1. Creamos un constructor que RECIBE el repositorio.
-    def __init__(self, repository):
+    def __init__(self, repository, coverage_cache, response_cache):
         self.repository = repository
+        self.coverage_cache = coverage_cache
+        self.response_cache = response_cache
 
     # 2. Quitamos @staticmethod y usamos 'self' para acceder al repositorio.
     def create_aircraft(self, matricula, modelo, capacidad):
@@ -19,13 +21,18 @@ class AircraftController:
             raise ValueError("La matrícula ya existe. No puede repetirse.")
 
         # 3. Usamos la instancia del repositorio que recibimos.
-        return self.repository.create(matricula, modelo, capacidad)
+        aircraft = self.repository.create(matricula, modelo, capacidad)
+        self.response_cache.invalidate_entity("aircrafts")
+        return aircraft
 
     def get_aircraft(self, aircraft_id):
         return self.repository.get_by_id(aircraft_id)
 
-    def list_aircrafts(self):
-        return self.repository.get_all()
+    def list_aircrafts(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_aircrafts(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def update_aircraft(self, aircraft_id, **kwargs):
 
@@ -35,7 +42,16 @@ class AircraftController:
         updated = self.repository.update(aircraft_id, **kwargs)
         if not updated:
             raise ValueError("Aeronave no encontrada o datos inválidos.")
+        self.response_cache.invalidate_entity("aircrafts")
+
+        # La capacidad de la aeronave alimenta la cobertura de todas sus rutas.
+        if 'capacidad' in kwargs:
+            self.coverage_cache.invalidate_all()
         return self.repository.get_by_id(aircraft_id)
 
     def delete_aircraft(self, aircraft_id):
-        return self.repository.delete(aircraft_id)
+        deleted = self.repository.delete(aircraft_id)
+        if deleted:
+            self.coverage_cache.invalidate_all()
+            self.response_cache.invalidate_entity("aircrafts")
+        return deleted
@@ -20,8 +20,11 @@ class CoverageAlertController:
     def get_alerta_cobertura(self, alert_id):
         return self.repository.get_by_id(alert_id)
 
-    def list_alerta_coberturas(self):
-        return self.repository.get_all()
+    def list_alerta_coberturas(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_alerta_coberturas(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def delete_alerta_cobertura(self, alert_id):
         return self.repository.delete(alert_id)
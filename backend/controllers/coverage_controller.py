@@ -1,16 +1,57 @@
 from backend.services.coverage_service import CoverageService
+from backend.utils.single_flight import SingleFlight
 
 class CoverageController:
-    def __init__(self, coverage_service: CoverageService):
+    def __init__(self, coverage_service: CoverageService, coverage_cache):
         self.coverage_service = coverage_service
+        self.coverage_cache = coverage_cache
+        # Peticiones idénticas simultáneas comparten un único cálculo.
+        self.single_flight = SingleFlight()
 
-    async def get_dashboard_data(self, user_data, event_id, status_filter=None, page=1, limit=10):
+    async def get_dashboard_data(self, user_data, event_id, status_filter=None, page=1, limit=10, after_id=None):
 
-        return await self.coverage_service.calculate_coverage_for_event(
-            event_id, status_filter, page, limit
-        )
+        key = self.coverage_cache.dashboard_key(event_id, status_filter, page, limit, after_id)
+        data = self.coverage_cache.dashboard.get(key)
+        if data is not None:
+            return data
+
+        async def compute():
+            # Si una escritura invalida la caché durante el cálculo, el resultado no se guarda.
+            generation = self.coverage_cache.dashboard.generation()
+            result = await self.coverage_service.calculate_coverage_for_event(
+                event_id, status_filter, page, limit, after_id=after_id
+            )
+            self.coverage_cache.dashboard.set(key, result, generation)
+            return result
+
+        return await self.single_flight.do(("dashboard",) + key, compute)
+
+    def simulate_coverage(self, event_id, escenarios):
+        # Los escenarios son hipotéticos: no se cachean ni invalidan nada.
+        return self.coverage_service.simulate_coverage(event_id, escenarios)
+
+    def export_dashboard_rows(self, event_id=None, status_filter=None):
+        # La exportación completa no se cachea: se transmite fila a fila.
+        return self.coverage_service.export_coverage(event_id, status_filter)
 
     # Método para obtener los datos detallados de una ruta de evento.
     async def get_route_detail_data(self, ruta_evento_id):
 
-        return await self.coverage_service.get_route_detail(ruta_evento_id)
+        data = self.coverage_cache.route_detail.get(ruta_evento_id)
+        if data is not None:
+            return data
+
+        async def compute():
+            generation = self.coverage_cache.route_detail.generation()
+            result = await self.coverage_service.get_route_detail(ruta_evento_id)
+            # Una ruta inexistente no se guarda: podría crearse después.
+            if result is not None:
+                self.coverage_cache.route_detail.set(ruta_evento_id, result, generation)
+            return result
+
+        return await self.single_flight.do(("route_detail", ruta_evento_id), compute)
+
+    def get_cache_stats(self):
+        stats = self.coverage_cache.stats()
+        stats["single_flight"] = self.single_flight.stats()
+        return stats
@@ -7,8 +7,12 @@ class EventController:
     """
 
     # 1. Creamos un constructor que RECIBE el repositorio.
-    def __init__(self, repository):
+    def __init__(self, repository, threshold_repo, classifier_registry, coverage_cache, response_cache):
         self.repository = repository
+        self.threshold_repo = threshold_repo
+        self.classifier_registry = classifier_registry
+        self.coverage_cache = coverage_cache
+        self.response_cache = response_cache
 
     # 2. Quitamos @staticmethod y usamos 'self' para acceder al repositorio.
     def create_event(self, codigo_evento, nombre_evento, descripcion, pais_evento, fecha_inicio, fecha_fin):
@@ -16,18 +20,56 @@ class EventController:
         if datetime.date.fromisoformat(fecha_inicio) > datetime.date.fromisoformat(fecha_fin):
             raise ValueError("La fecha de inicio no puede ser posterior a la fecha de fin.")
 
-        return self.repository.create(
+        event = self.repository.create(
             codigo_evento, nombre_evento, descripcion, pais_evento, fecha_inicio, fecha_fin
         )
+        self.response_cache.invalidate_entity("events")
+        return event
 
     def get_event(self, event_id):
         return self.repository.get_by_id(event_id)
 
-    def list_events(self):
-        return self.repository.get_all()
+    def list_events(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_events(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def update_event(self, event_id, **kwargs):
-        return self.repository.update(event_id, **kwargs)
+        event = self.repository.update(event_id, **kwargs)
+        if event:
+            self.coverage_cache.invalidate_event(event_id)
+            self.response_cache.invalidate_entity("events")
+        return event
 
     def delete_event(self, event_id):
-        return self.repository.delete(event_id)
+        deleted = self.repository.delete(event_id)
+        if deleted:
+            self.coverage_cache.invalidate_event(event_id)
+            self.response_cache.invalidate_entity("events")
+        return deleted
+
+    def get_coverage_thresholds(self, event_id):
+        """Umbrales de cobertura vigentes del evento (los propios o los por defecto)."""
+        event = self.repository.get_by_id(event_id)
+        if not event:
+            return None
+        return self.threshold_repo.get_for_event_or_default(event)
+
+    def set_coverage_thresholds(self, event_id, umbral_parcial, umbral_cubierta):
+        """
+        Configura los umbrales de cobertura propios de un evento y recompila
+        los clasificadores para que el próximo cálculo los use.
+        """
+        if not self.repository.get_by_id(event_id):
+            return None
+
+        umbral_parcial = float(umbral_parcial)
+        umbral_cubierta = float(umbral_cubierta)
+        if not (0 < umbral_parcial < umbral_cubierta):
+            raise ValueError("Los umbrales deben cumplir 0 < umbral_parcial < umbral_cubierta.")
+
+        thresholds = self.threshold_repo.set_for_event(event_id, umbral_parcial, umbral_cubierta)
+        self.classifier_registry.invalidate()
+        self.coverage_cache.invalidate_event(event_id)
+        return thresholds
@@ -6,19 +6,27 @@ class EventRouteController:
     """
 
     # 1. Creamos un constructor que RECIBE el repositorio.
-    def __init__(self, repository):
+    def __init__(self, repository, coverage_cache, response_cache):
         self.repository = repository
+        self.coverage_cache = coverage_cache
+        self.response_cache = response_cache
 
     # 2. Quitamos @staticmethod y usamos 'self' para acceder al repositorio.
     def create_event_route(self, ruta_id, evento_id, demanda_estimada):
 
-        return self.repository.create(ruta_id, evento_id, demanda_estimada)
+        event_route = self.repository.create(ruta_id, evento_id, demanda_estimada)
+        self.coverage_cache.invalidate_event(evento_id)
+        self.response_cache.invalidate_entity("event_routes")
+        return event_route
 
     def get_event_route(self, event_route_id):
         return self.repository.get_by_id(event_route_id)
 
-    def list_event_routes(self):
-        return self.repository.get_all()
+    def list_event_routes(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_event_routes(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def update_event_route(self, event_route_id, **kwargs):
         """
@@ -36,10 +44,18 @@ class EventRouteController:
         if not updated:
             raise ValueError("Ruta de Evento no encontrada o datos no válidos.")
 
+        # La ruta pudo cambiar de evento: se descarta el panel de todos los eventos.
+        self.coverage_cache.invalidate_event()
+        self.response_cache.invalidate_entity("event_routes")
+
         # Devuelve la instancia actualizada
         return self.repository.get_by_id(event_route_id)
 
     def delete_event_route(self, event_route_id):
-        return self.repository.delete(event_route_id)
+        deleted = self.repository.delete(event_route_id)
+        if deleted:
+            self.coverage_cache.invalidate_event()
+            self.response_cache.invalidate_entity("event_routes")
+        return deleted
 
 
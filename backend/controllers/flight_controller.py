@@ -8,10 +8,17 @@ class FlightController:
     Ahora también gestiona la creación de manifiestos.
     """
 
-    def __init__(self, repository, event_route_repo, real_coverage_repo):
+    def __init__(self, repository, async_repository, event_route_repo, real_coverage_repo,
+                 async_real_coverage_repo, coverage_cache, response_cache):
         self.repository = repository
+        # Lecturas frecuentes (listado y manifiesto) que no bloquean el IOLoop.
+        self.async_repository = async_repository
         self.event_route_repo = event_route_repo
         self.real_coverage_repo = real_coverage_repo
+        self.async_real_coverage_repo = async_real_coverage_repo
+        self.coverage_cache = coverage_cache
+        # Respuestas cacheadas de vuelos y manifiestos; se invalidan en cada escritura.
+        self.response_cache = response_cache
 
     def create_flight(self, codigo_vuelo, aeronave_id, ruta_evento_id, fecha_salida, fecha_llegada):
         # Este método no cambia.
@@ -25,33 +32,37 @@ class FlightController:
                 validator_data,
                 aeronave_id,
                 ruta_evento_id,
-                event_route_repo=self.event_route_repo
+                event_route_repo=self.event_route_repo,
+                flight_repo=self.repository
             )
             validator.validate()
 
-            return self.repository.create(
+            flight = self.repository.create(
                 codigo_vuelo=codigo_vuelo,
                 aeronave_id=aeronave_id,
                 ruta_evento_id=ruta_evento_id,
                 fecha_salida=validator.fecha_salida_dt,
                 fecha_llegada=validator.fecha_llegada_dt
             )
+            self.coverage_cache.invalidate_route(ruta_evento_id)
+            self.response_cache.invalidate_entity("flights")
+            return flight
         except ValueError as e:
             raise ValueError(str(e))
         except Exception as e:
             raise Exception(f"Error inesperado al crear el vuelo: {e}")
 
-    def get_manifest(self, flight_id):
+    async def get_manifest(self, flight_id):
         """
         Orquesta la obtención de datos de múltiples fuentes para construir el manifiesto.
         """
-        flight_data = self.repository.get_manifest_data(flight_id)
+        flight_data = await self.async_repository.get_manifest_data(flight_id)
 
         if not flight_data:
             return None
 
         event_route_id = flight_data.ruta_evento.id
-        latest_coverage = self.real_coverage_repo.get_latest_for_event_route(event_route_id)
+        latest_coverage = await self.async_real_coverage_repo.get_latest_for_event_route(event_route_id)
 
         # --- CORRECCIÓN AQUÍ: Usamos int() para valores que son inherentemente enteros ---
         demanda_estimada = int(flight_data.ruta_evento.demanda_estimada)
@@ -102,8 +113,12 @@ class FlightController:
     def get_flight(self, flight_id):
         return self.repository.get_by_id(flight_id)
 
-    def list_flights(self):
-        return self.repository.get_all()
+    async def list_flights(self, after_id=None, limit=None, projection=None):
+        return await self.async_repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_flights(self, after_id=None, projection=None):
+        # El listado completo se lee con un cursor del servidor (psycopg2), no con el pool asíncrono.
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def update_flight(self, flight_id, **data):
         """
@@ -120,6 +135,9 @@ class FlightController:
         if 'fecha_llegada' in data:
             data['fecha_llegada'] = datetime.datetime.fromisoformat(data['fecha_llegada'])
 
+        # Se guarda la ruta anterior: si el vuelo cambia de ruta, ambas cambian su detalle.
+        previous = self.repository.get_by_id(flight_id)
+
         # Llamamos al método update del repositorio
         updated = self.repository.update(flight_id, **data)
 
@@ -127,7 +145,18 @@ class FlightController:
             raise ValueError("Vuelo no encontrado o datos inválidos para actualizar.")
 
         # Devolvemos el objeto actualizado para enviarlo en la respuesta de la API
-        return self.repository.get_by_id(flight_id)
+        flight = self.repository.get_by_id(flight_id)
+        for ruta_evento_id in {previous.ruta_evento_id, flight.ruta_evento_id}:
+            if ruta_evento_id is not None:
+                self.coverage_cache.invalidate_route(ruta_evento_id)
+        self.response_cache.invalidate_entity("flights")
+        return flight
 
     def delete_flight(self, flight_id):
-        return self.repository.delete(flight_id)
+        flight = self.repository.get_by_id(flight_id)
+        deleted = self.repository.delete(flight_id)
+        if deleted and flight.ruta_evento_id is not None:
+            self.coverage_cache.invalidate_route(flight.ruta_evento_id)
+        if deleted:
+            self.response_cache.invalidate_entity("flights")
+        return deleted
@@ -7,30 +7,50 @@ class RealCoverageController:
     """
 
     # 1. Creamos un constructor que RECIBE el repositorio.
-    def __init__(self, repository):
+    def __init__(self, repository, coverage_cache, response_cache):
         self.repository = repository
+        self.coverage_cache = coverage_cache
+        self.response_cache = response_cache
 
     # 2. Quitamos @staticmethod y usamos 'self' para acceder al repositorio.
     def create_real_coverage(self, ruta_evento_id, capacidad_real, porcentaje_cobertura, estado_cobertura):
         # La lógica de negocio (como obtener la fecha actual) permanece aquí.
         fecha_calculo = datetime.datetime.now()
         # 3. Usamos la instancia del repositorio que recibimos.
-        return self.repository.create(
+        coverage = self.repository.create(
             ruta_evento_id,
             capacidad_real,
             porcentaje_cobertura,
             estado_cobertura,
             fecha_calculo
         )
+        self._invalidate()
+        return coverage
 
     def get_real_coverage(self, coverage_id):
         return self.repository.get_by_id(coverage_id)
 
-    def list_real_coverages(self):
-        return self.repository.get_all()
+    def list_real_coverages(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_real_coverages(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def delete_real_coverage(self, coverage_id):
-        return self.repository.delete(coverage_id)
+        deleted = self.repository.delete(coverage_id)
+        if deleted:
+            self._invalidate()
+        return deleted
+
+    def _invalidate(self):
+        # Cambió el último cálculo de una ruta: lo muestran el panel, el detalle de ruta y el manifiesto.
+        self.coverage_cache.invalidate_event(None)
+        self.response_cache.invalidate_entity("coverage")
 
     def get_latest_coverage_for_event_route(self, ruta_evento_id):
         return self.repository.get_latest_for_event_route(ruta_evento_id)
+
+    def get_latest_coverages_for_event_routes(self, ruta_evento_ids):
+        """Últimos cálculos de varias rutas de evento, en el orden pedido."""
+        latest = self.repository.get_latest_for_event_routes(ruta_evento_ids)
+        return [latest[i] for i in ruta_evento_ids if i in latest]
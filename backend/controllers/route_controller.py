@@ -6,8 +6,10 @@ class RouteController:
     """
 
     # 1. Creamos un constructor que RECIBE el repositorio.
-    def __init__(self, repository):
+    def __init__(self, repository, coverage_cache, response_cache):
         self.repository = repository
+        self.coverage_cache = coverage_cache
+        self.response_cache = response_cache
 
     # 2. Quitamos @staticmethod y usamos 'self' para acceder al repositorio.
     def create_route(self, origen, destino, distancia):
@@ -18,13 +20,18 @@ class RouteController:
             raise ValueError("El origen y el destino no pueden ser iguales.")
 
         # 3. Usamos la instancia del repositorio que recibimos.
-        return self.repository.create(origen, destino, distancia)
+        route = self.repository.create(origen, destino, distancia)
+        self.response_cache.invalidate_entity("routes")
+        return route
 
     def get_route(self, route_id):
         return self.repository.get_by_id(route_id)
 
-    def list_routes(self):
-        return self.repository.get_all()
+    def list_routes(self, after_id=None, limit=None, projection=None):
+        return self.repository.get_all(after_id=after_id, limit=limit, projection=projection)
+
+    def stream_routes(self, after_id=None, projection=None):
+        return self.repository.iter_all(after_id=after_id, projection=projection)
 
     def update_route(self, route_id, **kwargs):
         if 'distancia' in kwargs and int(kwargs['distancia']) <= 0:
@@ -33,7 +40,14 @@ class RouteController:
         updated = self.repository.update(route_id, **kwargs)
         if not updated:
             raise ValueError("Ruta no encontrada o datos inválidos.")
+        # El origen y el destino aparecen en el panel y en el detalle de ruta de todos los eventos.
+        self.coverage_cache.invalidate_all()
+        self.response_cache.invalidate_entity("routes")
         return self.repository.get_by_id(route_id)
 
     def delete_route(self, route_id):
-        return self.repository.delete(route_id)
+        deleted = self.repository.delete(route_id)
+        if deleted:
+            self.coverage_cache.invalidate_all()
+            self.response_cache.invalidate_entity("routes")
+        return deleted
@@ -10,8 +10,12 @@ class UserController:
     """
 
     # 1. Modificamos el constructor para recibir el repositorio y la clave secreta.
-    def __init__(self, repository, secret_key):
+    def __init__(self, repository, async_repository, blocking_executor, secret_key):
         self.repository = repository
+        # La búsqueda del usuario en el login no bloquea el IOLoop.
+        self.async_repository = async_repository
+        # bcrypt es lento a propósito: la verificación corre en el pool de hilos.
+        self.blocking_executor = blocking_executor
         self.secret_key = secret_key
 
     # 2. Quitamos @staticmethod y usamos 'self'.
@@ -23,19 +27,19 @@ class UserController:
         hashed_password = bcrypt.hash(password)
         return self.repository.create(username, hashed_password, role)
 
-    def authenticate(self, username, password):
-        user = self.repository.get_by_username(username)
-        if user and bcrypt.verify(password, user.password):
+    async def authenticate(self, username, password):
+        user = await self.async_repository.get_by_username(username)
+        if user and await self.blocking_executor.compute(bcrypt.verify, password, user.password):
             return user
         return None
 
-    def login(self, username, password):
+    async def login(self, username, password):
         """
         Intenta autenticar y, si tiene éxito,
         devuelve un token JWT con user_id, username y role.
         """
         # La llamada interna ahora usa 'self'.
-        user = self.authenticate(username, password)
+        user = await self.authenticate(username, password)
         if not user:
             return None
 
@@ -50,8 +54,8 @@ class UserController:
     def get_user(self, user_id):
         return self.repository.get_by_id(user_id)
 
-    def list_users(self):
-        return self.repository.get_all()
+    def list_users(self, after_id=None, limit=None):
+        return self.repository.get_all(after_id=after_id, limit=limit)
 
     def delete_user(self, user_id):
         return self.repository.delete(user_id)
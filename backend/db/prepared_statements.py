@@ -0,0 +1,115 @@
+import threading
+import weakref
+
+import psycopg2.errors
+
+from peewee import Node, __exception_wrapper__
+
+from backend.db.query_executor import to_asyncpg_sql
+
+
+class Placeholder(Node):
+    """
+    Parámetro con nombre dentro de una plantilla de consulta de peewee.
+    Al generar el SQL ocupa la posición de un valor y guarda el conversor del
+    campo con el que se compara (db_value), que se aplica al ejecutar.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.converter = None
+
+    def __sql__(self, ctx):
+        self.converter = ctx.state.converter
+        ctx._values.append(self)
+        return ctx.literal(ctx.state.param or '?')
+
+
+class PreparedQuery:
+    """
+    Consulta de peewee cuyo SQL se genera una sola vez. Los valores fijos de
+    la plantilla se conservan y los Placeholder se reemplazan en cada llamada.
+    """
+
+    def __init__(self, name, query):
+        self.name = name
+        self.query = query
+        self.sql, self._params = query.sql()
+        # Mismo SQL con $1, $2...: lo usan asyncpg y PREPARE.
+        self.numbered_sql = to_asyncpg_sql(self.sql)
+        self.prepare_sql = f"PREPARE {name} AS {self.numbered_sql}"
+        self.execute_sql = f"EXECUTE {name}" + (f"({', '.join(['%s'] * len(self._params))})" if self._params else "")
+        # Ejecuciones por cualquiera de las vías (psycopg2 o asyncpg).
+        self.calls = 0
+
+    def bind(self, params):
+        """Valores de la llamada, en el orden del SQL. Lanza KeyError si falta alguno."""
+        self.calls += 1
+        values = []
+        for param in self._params:
+            if isinstance(param, Placeholder):
+                value = params[param.name]
+                values.append(param.converter(value) if param.converter else value)
+            else:
+                values.append(param)
+        return values
+
+    def hydrate(self, cursor):
+        """Convierte las filas del cursor en lo mismo que devolvería la consulta de peewee."""
+        return list(self.query._get_cursor_wrapper(cursor))
+
+
+class PreparedStatementRegistry:
+    """
+    Registro de las consultas más frecuentes como sentencias preparadas del
+    servidor: el SQL se arma una vez al registrar, y PostgreSQL planifica cada
+    sentencia una vez por conexión (PREPARE) y luego solo la ejecuta (EXECUTE).
+    Las conexiones del pool recuerdan qué sentencias ya tienen preparadas.
+    """
+
+    def __init__(self, database):
+        self.database = database
+        self._queries = {}
+        self._prepared = weakref.WeakKeyDictionary()  # conexión -> nombres preparados
+        self._lock = threading.Lock()
+        self.prepares = {}
+
+    def register(self, name, query):
+        prepared = PreparedQuery(name, query)
+        self._queries[name] = prepared
+        self.prepares[name] = 0
+        return prepared
+
+    def __getitem__(self, name):
+        return self._queries[name]
+
+    def execute(self, name, **params):
+        """Ejecuta la sentencia con la conexión de peewee del hilo actual."""
+        prepared = self._queries[name]
+        values = prepared.bind(params)
+        conn = self.database.connection()
+        with self._lock:
+            names = self._prepared.setdefault(conn, set())
+        with __exception_wrapper__:
+            cursor = conn.cursor()
+            try:
+                if name not in names:
+                    cursor.execute(prepared.prepare_sql)
+                    names.add(name)
+                    self.prepares[name] += 1
+                cursor.execute(prepared.execute_sql, values)
+            except psycopg2.errors.InvalidSqlStatementName:
+                # La sesión perdió la sentencia (p. ej. DISCARD ALL): se prepara en el siguiente uso.
+                names.discard(name)
+                raise
+        return prepared.hydrate(cursor)
+
+    def get_or_none(self, name, **params):
+        rows = self.execute(name, **params)
+        return rows[0] if rows else None
+
+    def stats(self):
+        return {
+            name: {"calls": prepared.calls, "prepares": self.prepares[name]}
+            for name, prepared in self._queries.items()
+        }
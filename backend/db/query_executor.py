@@ -0,0 +1,131 @@
+import asyncio
+import itertools
+import re
+
+from backend.db.connection import create_pool, db
+
+# Marcadores de psycopg2 (%s, y %% para un % literal) a convertir al formato de asyncpg ($1, $2...).
+_PLACEHOLDER = re.compile(r"%(s|%)")
+
+
+def to_asyncpg_sql(sql):
+    counter = itertools.count(1)
+    return _PLACEHOLDER.sub(lambda m: f"${next(counter)}" if m.group(1) == "s" else "%", sql)
+
+
+class _RecordCursor:
+    """
+    Adapta las filas devueltas por asyncpg a la interfaz mínima de cursor que
+    usan los envoltorios de resultados de peewee, para obtener los mismos
+    modelos (con sus relaciones), diccionarios o tuplas que en la ruta síncrona.
+    """
+
+    def __init__(self, records):
+        self.description = [(name,) for name in records[0].keys()] if records else []
+        self._records = iter(records)
+
+    def fetchone(self):
+        record = next(self._records, None)
+        return tuple(record) if record is not None else None
+
+    def close(self):
+        pass
+
+
+class PeeweeQueryExecutor:
+    """
+    Ejecuta las consultas con la conexión síncrona de peewee, en el pool de
+    hilos de las llamadas bloqueantes. Es la opción sin pool asíncrono:
+    mantiene la misma interfaz que AsyncpgQueryExecutor.
+    """
+
+    def __init__(self, blocking_executor):
+        self.blocking_executor = blocking_executor
+
+    async def execute(self, query):
+        return await self.blocking_executor.run(list, query)
+
+    async def get_or_none(self, query):
+        rows = await self.execute(query.limit(1))
+        return rows[0] if rows else None
+
+    async def execute_prepared(self, prepared, **params):
+        values = prepared.bind(params)
+        return await self.blocking_executor.run(
+            lambda: prepared.hydrate(db.execute_sql(prepared.sql, values))
+        )
+
+    async def get_or_none_prepared(self, prepared, **params):
+        rows = await self.execute_prepared(prepared, **params)
+        return rows[0] if rows else None
+
+    async def close(self):
+        pass
+
+    def stats(self):
+        return {"backend": "peewee"}
+
+
+class AsyncpgQueryExecutor:
+    """
+    Ejecuta consultas construidas con peewee sobre un pool de asyncpg, sin
+    bloquear el IOLoop: la latencia de la base de datos de peticiones
+    concurrentes se solapa en lugar de serializarse. El pool se crea en el
+    primer uso, ya dentro del bucle de eventos.
+    """
+
+    def __init__(self, min_size, max_size):
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await create_pool(self.min_size, self.max_size)
+        return self._pool
+
+    async def execute(self, query):
+        sql, params = query.sql()
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            records = await connection.fetch(to_asyncpg_sql(sql), *params)
+        return list(query._get_cursor_wrapper(_RecordCursor(records)))
+
+    async def get_or_none(self, query):
+        rows = await self.execute(query.limit(1))
+        return rows[0] if rows else None
+
+    async def execute_prepared(self, prepared, **params):
+        """
+        Ejecuta una consulta del registro de sentencias preparadas: el SQL ya
+        está armado y asyncpg prepara la sentencia una vez por conexión (su
+        caché de sentencias se indexa por el texto SQL).
+        """
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            records = await connection.fetch(prepared.numbered_sql, *prepared.bind(params))
+        return prepared.hydrate(_RecordCursor(records))
+
+    async def get_or_none_prepared(self, prepared, **params):
+        rows = await self.execute_prepared(prepared, **params)
+        return rows[0] if rows else None
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    def stats(self):
+        if self._pool is None:
+            return {"backend": "asyncpg", "size": 0, "idle": 0,
+                    "min_size": self.min_size, "max_size": self.max_size}
+        return {
+            "backend": "asyncpg",
+            "size": self._pool.get_size(),
+            "idle": self._pool.get_idle_size(),
+            "min_size": self.min_size,
+            "max_size": self.max_size,
+        }
@@ -0,0 +1,62 @@
+import contextlib
+
+from backend.db.connection import db
+
+
+class _ServerSideCursor:
+    """
+    Presenta un cursor con nombre de psycopg2 con la interfaz mínima que usan
+    los envoltorios de resultados de peewee. fetchone() lee del iterador del
+    cursor, que trae 'itersize' filas por viaje; llamar a fetchone() del
+    cursor haría un FETCH por fila.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._rows = iter(cursor)
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def fetchone(self):
+        return next(self._rows, None)
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def server_side_cursor(sql, params, batch_size=2000, name="listado"):
+    """
+    Cursor con nombre (del lado del servidor) sobre la conexión de peewee del
+    hilo actual, que en los handlers es la conexión de la petición tomada del
+    pool. El cursor necesita una transacción abierta mientras se recorre: las
+    conexiones de peewee están en autocommit, así que se desactiva mientras
+    dura y al salir la transacción se descarta (solo se lee).
+    """
+    conn = db.connection()
+    conn.autocommit = False
+    try:
+        with conn.cursor(name=name) as cursor:
+            cursor.itersize = batch_size
+            cursor.execute(sql, params)
+            yield cursor
+    finally:
+        if not conn.closed:
+            conn.rollback()
+            conn.autocommit = True
+
+
+def iterate_query(query, batch_size=2000):
+    """
+    Recorre una consulta de peewee con un cursor del lado del servidor.
+    Devuelve los mismos modelos que la consulta, pero PostgreSQL entrega
+    'batch_size' filas por viaje, así que la memoria no depende del tamaño del
+    resultado. El cursor se abre en la primera iteración, sobre la conexión
+    del hilo que la hace, y todas las iteraciones y el cierre deben usar esa
+    misma conexión; cerrar el generador cierra el cursor y su transacción.
+    """
+    sql, params = query.sql()
+    with server_side_cursor(sql, params, batch_size) as cursor:
+        yield from query._get_cursor_wrapper(_ServerSideCursor(cursor)).iterator()
@@ -0,0 +1,20 @@
+from peewee import Model, ForeignKeyField, DateField, IntegerField, DecimalField, CompositeKey
+from backend.db.connection import db
+from backend.models.event_route import EventRoute
+
+class CoverageDailyRollup(Model):
+    # Resumen diario de los cálculos de cobertura compactados (más antiguos que la retención).
+    ruta_evento = ForeignKeyField(EventRoute, backref='coberturas_diarias', on_delete='CASCADE')
+    dia = DateField()
+    muestras = IntegerField()
+    porcentaje_promedio = DecimalField(max_digits=5, decimal_places=2)
+    porcentaje_minimo = DecimalField(max_digits=5, decimal_places=2)
+    porcentaje_maximo = DecimalField(max_digits=5, decimal_places=2)
+    cubiertas = IntegerField(default=0)
+    parciales = IntegerField(default=0)
+    criticas = IntegerField(default=0)
+
+    class Meta:
+        database = db
+        table_name = 'cobertura_real_diaria'
+        primary_key = CompositeKey('ruta_evento', 'dia')
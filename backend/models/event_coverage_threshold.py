@@ -0,0 +1,13 @@
+from peewee import Model, ForeignKeyField, DecimalField
+from backend.db.connection import db
+from backend.models.event import Event
+
+class EventCoverageThreshold(Model):
+    # Umbrales de cobertura propios de un evento; sin fila se usan los umbrales por defecto.
+    evento = ForeignKeyField(Event, primary_key=True, backref='umbrales_cobertura', on_delete='CASCADE')
+    umbral_parcial = DecimalField(max_digits=6, decimal_places=2)
+    umbral_cubierta = DecimalField(max_digits=6, decimal_places=2)
+
+    class Meta:
+        database = db
+        table_name = 'umbrales_cobertura_evento'
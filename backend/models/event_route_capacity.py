@@ -0,0 +1,13 @@
+from peewee import Model, ForeignKeyField, IntegerField
+from backend.db.connection import db
+from backend.models.event_route import EventRoute
+
+class EventRouteCapacity(Model):
+    # Suma de la capacidad de las aeronaves asignadas a los vuelos de cada ruta de evento.
+    # Se mantiene por deltas desde los repositorios de vuelos y aeronaves.
+    ruta_evento = ForeignKeyField(EventRoute, primary_key=True, backref='capacidad_agregada', on_delete='CASCADE')
+    capacidad_total = IntegerField(default=0)
+
+    class Meta:
+        database = db
+        table_name = 'capacidad_rutas_evento'
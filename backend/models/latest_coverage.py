@@ -0,0 +1,14 @@
+from peewee import Model, ForeignKeyField
+from backend.db.connection import db
+from backend.models.event_route import EventRoute
+from backend.models.real_coverage import RealCoverage
+
+class LatestCoverage(Model):
+    # Puntero al cálculo de cobertura más reciente de cada ruta de evento.
+    # Se actualiza en cada inserción para que la consulta del último cálculo sea por clave.
+    ruta_evento = ForeignKeyField(EventRoute, primary_key=True, backref='ultima_cobertura', on_delete='CASCADE')
+    cobertura = ForeignKeyField(RealCoverage, backref='ultima_de', on_delete='CASCADE')
+
+    class Meta:
+        database = db
+        table_name = 'cobertura_real_ultima'
@@ -11,4 +11,16 @@ class RealCoverage(Model):
 
     class Meta:
         database = db
-        table_name = 'cobertura_real'
\ No newline at end of file
+        table_name = 'cobertura_real'
+        # La compactación recorre la tabla por rangos de fecha.
+        indexes = (
+            (('fecha_calculo',), False),
+        )
+
+
+# Historial de cada ruta del más reciente al más antiguo: sirve al DISTINCT ON
+# que reconstruye los punteros al último cálculo sin ordenar la tabla.
+RealCoverage.add_index(RealCoverage.index(
+    RealCoverage.ruta_evento, RealCoverage.fecha_calculo.desc(), RealCoverage.id.desc(),
+    name='cobertura_real_ruta_evento_fecha_calculo'
+))
\ No newline at end of file
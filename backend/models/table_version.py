@@ -0,0 +1,12 @@
+from peewee import Model, CharField, BigIntegerField
+from backend.db.connection import db
+
+class TableVersion(Model):
+    # Contador de cambios por tabla: los repositorios lo incrementan en cada escritura.
+    # Con él se construyen las ETag de los listados y detalles.
+    tabla = CharField(primary_key=True, max_length=64)
+    version = BigIntegerField(default=0)
+
+    class Meta:
+        database = db
+        table_name = 'version_tabla'
@@ -1,4 +1,7 @@
 from backend.models.aircraft import Aircraft
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
+from backend.db.connection import db
 
 
 class AircraftRepository:
@@ -7,25 +10,58 @@ class AircraftRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, capacity_repo, versions=None):
+        # Agregado de capacidad por ruta de evento, depende de la capacidad de cada aeronave.
+        self.capacity_repo = capacity_repo
+        # Versiones por tabla (ETag); sin él, las escrituras no las incrementan.
+        self.versions = versions
+
+    def _bump(self, *models):
+        # Las ETag de los listados y detalles dependen de la versión de la tabla.
+        if self.versions is not None:
+            self.versions.bump(*models)
+
     # SE ELIMINA @staticmethod
     def create(self, matricula, modelo, capacidad):
-        return Aircraft.create(matricula=matricula, modelo=modelo, capacidad=capacidad)
+        aircraft = Aircraft.create(matricula=matricula, modelo=modelo, capacidad=capacidad)
+        self._bump(Aircraft)
+        return aircraft
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, aircraft_id):
         return Aircraft.get_or_none(Aircraft.id == aircraft_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(Aircraft.select())
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else Aircraft.select()
+        return list(apply_keyset(query, Aircraft.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else Aircraft.select()
+        return iterate_query(apply_keyset(query, Aircraft.id, after_id))
 
     def update(self, aircraft_id, **kwargs):
         # Filtra los campos permitidos para evitar errores
         allowed_fields = ['matricula', 'modelo', 'capacidad']
         update_data = {k: v for k, v in kwargs.items() if k in allowed_fields}
 
-        query = Aircraft.update(**update_data).where(Aircraft.id == aircraft_id)
-        rows_updated = query.execute()
+        with db.atomic():
+            # La fila se bloquea para que dos cambios concurrentes no calculen el delta sobre la misma capacidad.
+            previous = Aircraft.select().where(Aircraft.id == aircraft_id).for_update().get_or_none()
+            if not previous:
+                return False
+
+            query = Aircraft.update(**update_data).where(Aircraft.id == aircraft_id)
+            rows_updated = query.execute()
+
+            # Un cambio de capacidad se propaga por delta a las rutas donde vuela la aeronave.
+            if rows_updated and 'capacidad' in update_data:
+                delta = int(update_data['capacidad']) - previous.capacidad
+                self.capacity_repo.apply_aircraft_capacity_change(aircraft_id, delta)
+
+        if rows_updated:
+            self._bump(Aircraft)
         return rows_updated > 0
 
     # SE ELIMINA @staticmethod
@@ -33,5 +69,6 @@ class AircraftRepository:
         aircraft = Aircraft.get_or_none(Aircraft.id == aircraft_id)
         if aircraft:
             aircraft.delete_instance()
+            self._bump(Aircraft)
             return True
         return False
@@ -0,0 +1,25 @@
+from backend.models.flight import Flight
+from backend.repositories.flight_repository import flight_detail_query
+from backend.utils.pagination import apply_keyset
+
+
+class AsyncFlightRepository:
+    """
+    Lecturas de vuelos sin bloquear el IOLoop. Usa las mismas consultas que
+    FlightRepository y las ejecuta con el ejecutor asíncrono inyectado.
+    Las escrituras siguen en el repositorio síncrono.
+    """
+
+    def __init__(self, executor, statements):
+        self.executor = executor
+        self.statements = statements
+
+    async def get_by_id(self, flight_id):
+        return await self.executor.get_or_none_prepared(self.statements["vuelo_por_id"], flight_id=flight_id)
+
+    async def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else flight_detail_query()
+        return await self.executor.execute(apply_keyset(query, Flight.id, after_id, limit))
+
+    async def get_manifest_data(self, flight_id):
+        return await self.get_by_id(flight_id)
@@ -0,0 +1,13 @@
+class AsyncRealCoverageRepository:
+    """
+    Lecturas de cobertura real sin bloquear el IOLoop.
+    """
+
+    def __init__(self, executor, statements):
+        self.executor = executor
+        self.statements = statements
+
+    async def get_latest_for_event_route(self, ruta_evento_id):
+        return await self.executor.get_or_none_prepared(
+            self.statements["ultima_cobertura_ruta"], ruta_evento_id=ruta_evento_id
+        )
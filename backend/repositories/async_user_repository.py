@@ -0,0 +1,11 @@
+class AsyncUserRepository:
+    """
+    Lecturas de usuarios sin bloquear el IOLoop (las usa el login).
+    """
+
+    def __init__(self, executor, statements):
+        self.executor = executor
+        self.statements = statements
+
+    async def get_by_username(self, username):
+        return await self.executor.get_or_none_prepared(self.statements["usuario_por_nombre"], username=username)
@@ -1,4 +1,6 @@
 from backend.models.coverage_alert import CoverageAlert
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
 
 class CoverageAlertRepository:
     """
@@ -15,13 +17,43 @@ class CoverageAlertRepository:
             fecha_generacion=fecha_generacion
         )
 
+    def create_many(self, alerts):
+        """
+        Inserta varias alertas con un único INSERT multi-fila.
+        Recibe una lista de diccionarios con las mismas claves que create()
+        y devuelve los ids generados en el mismo orden de la lista.
+        """
+        if not alerts:
+            return []
+
+        rows = [{
+            "cobertura": a["cobertura_id"],
+            "tipo_alerta": a["tipo_alerta"],
+            "descripcion": a["descripcion"],
+            "fecha_generacion": a["fecha_generacion"],
+        } for a in alerts]
+
+        inserted = (CoverageAlert
+                    .insert_many(rows)
+                    .returning(CoverageAlert.id)
+                    .tuples()
+                    .execute())
+        # Los ids se asignan en el orden de las filas: ordenados, siguen el orden de 'alerts'.
+        return sorted(alert_id for (alert_id,) in inserted)
+
     # SE ELIMINA @staticmethod
     def get_by_id(self, alert_id):
         return CoverageAlert.get_or_none(CoverageAlert.id == alert_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(CoverageAlert.select())
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else CoverageAlert.select()
+        return list(apply_keyset(query, CoverageAlert.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else CoverageAlert.select()
+        return iterate_query(apply_keyset(query, CoverageAlert.id, after_id))
 
     # SE ELIMINA @staticmethod
     def delete(self, alert_id):
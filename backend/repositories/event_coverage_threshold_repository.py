@@ -0,0 +1,39 @@
+from backend.models.event_coverage_threshold import EventCoverageThreshold
+from backend.strategies.coverage_strategies import UMBRAL_PARCIAL, UMBRAL_CUBIERTA
+
+
+class EventCoverageThresholdRepository:
+    """
+    Repositorio para los umbrales de cobertura configurados por Evento.
+    Los métodos son de instancia para permitir la Inyección de Dependencias.
+    """
+
+    def set_for_event(self, event_id, umbral_parcial, umbral_cubierta):
+        (EventCoverageThreshold
+         .insert(evento=event_id, umbral_parcial=umbral_parcial, umbral_cubierta=umbral_cubierta)
+         .on_conflict(
+             conflict_target=[EventCoverageThreshold.evento],
+             preserve=[EventCoverageThreshold.umbral_parcial, EventCoverageThreshold.umbral_cubierta])
+         .execute())
+        return self.get_for_event(event_id)
+
+    def get_for_event(self, event_id):
+        return EventCoverageThreshold.get_or_none(EventCoverageThreshold.evento == event_id)
+
+    def get_for_event_or_default(self, event):
+        """
+        Umbrales propios del evento o, si no tiene, una fila sin guardar con
+        los umbrales por defecto (los que usa el clasificador en ese caso).
+        """
+        thresholds = self.get_for_event(event.id)
+        if thresholds is None:
+            thresholds = EventCoverageThreshold(
+                evento=event, umbral_parcial=float(UMBRAL_PARCIAL), umbral_cubierta=float(UMBRAL_CUBIERTA)
+            )
+        return thresholds
+
+    def get_all(self):
+        return list(EventCoverageThreshold.select())
+
+    def delete_for_event(self, event_id):
+        return EventCoverageThreshold.delete().where(EventCoverageThreshold.evento == event_id).execute() > 0
@@ -1,4 +1,7 @@
 from backend.models.event import Event
+from backend.models.event_route import EventRoute
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
 
 class EventRepository:
     """
@@ -6,9 +9,18 @@ class EventRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, versions=None):
+        # Versiones por tabla (ETag); sin él, las escrituras no las incrementan.
+        self.versions = versions
+
+    def _bump(self, *models):
+        # Las ETag de los listados y detalles dependen de la versión de la tabla.
+        if self.versions is not None:
+            self.versions.bump(*models)
+
     # SE ELIMINA @staticmethod
     def create(self, codigo_evento, nombre_evento, descripcion, pais_evento, fecha_inicio, fecha_fin):
-        return Event.create(
+        event = Event.create(
             codigo_evento=codigo_evento,
             nombre_evento=nombre_evento,
             descripcion=descripcion,
@@ -16,14 +28,22 @@ class EventRepository:
             fecha_inicio=fecha_inicio,
             fecha_fin=fecha_fin
         )
+        self._bump(Event)
+        return event
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, event_id):
         return Event.get_or_none(Event.id == event_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(Event.select())
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else Event.select()
+        return list(apply_keyset(query, Event.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else Event.select()
+        return iterate_query(apply_keyset(query, Event.id, after_id))
 
     # SE ELIMINA @staticmethod
     def update(self, event_id, **kwargs):
@@ -33,6 +53,7 @@ class EventRepository:
             for key, value in kwargs.items():
                 setattr(event, key, value)
             event.save()
+            self._bump(Event)
             return event
         return None
 
@@ -41,5 +62,7 @@ class EventRepository:
         event = Event.get_or_none(Event.id == event_id)
         if event:
             event.delete_instance()
+            # El borrado se propaga (ON DELETE CASCADE) a las rutas de evento.
+            self._bump(Event, EventRoute)
             return True
         return False
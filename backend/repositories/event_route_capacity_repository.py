@@ -0,0 +1,77 @@
+from peewee import fn, Value, EXCLUDED
+from backend.db.connection import db
+from backend.models.event_route_capacity import EventRouteCapacity
+from backend.models.flight import Flight
+from backend.models.aircraft import Aircraft
+
+
+class EventRouteCapacityRepository:
+    """
+    Repositorio para el agregado de capacidad por Ruta de Evento.
+    En lugar de sumar todos los vuelos en cada cálculo de cobertura, el agregado
+    se actualiza por deltas cada vez que un vuelo o una aeronave cambian.
+    """
+
+    def add_flight(self, ruta_evento_id, aeronave_id, sign=1):
+        """
+        Suma (sign=1) o resta (sign=-1) la capacidad de la aeronave al agregado
+        de la ruta de evento. Un vuelo sin ruta o sin aeronave no aporta capacidad.
+        La fila de la aeronave se bloquea en modo compartido: si hay un cambio de
+        capacidad en curso, se espera a que confirme y se suma el valor nuevo.
+        """
+        if ruta_evento_id is None or aeronave_id is None:
+            return
+
+        capacidad = (Aircraft
+                     .select(Value(ruta_evento_id), Aircraft.capacidad * sign)
+                     .where(Aircraft.id == aeronave_id)
+                     .for_update('FOR SHARE'))
+
+        (EventRouteCapacity
+         .insert_from(capacidad, fields=[EventRouteCapacity.ruta_evento, EventRouteCapacity.capacidad_total])
+         .on_conflict(
+             conflict_target=[EventRouteCapacity.ruta_evento],
+             update={EventRouteCapacity.capacidad_total:
+                     EventRouteCapacity.capacidad_total + EXCLUDED.capacidad_total})
+         .execute())
+
+    def remove_flight(self, ruta_evento_id, aeronave_id):
+        self.add_flight(ruta_evento_id, aeronave_id, sign=-1)
+
+    def apply_aircraft_capacity_change(self, aeronave_id, delta):
+        """
+        Propaga el cambio de capacidad de una aeronave a todas las rutas de evento
+        donde vuela, multiplicando el delta por la cantidad de vuelos en cada ruta.
+        """
+        if not delta:
+            return
+
+        vuelos = (Flight
+                  .select(Flight.ruta_evento, fn.COUNT(Flight.id).alias('total_vuelos'))
+                  .where((Flight.aeronave == aeronave_id) & (Flight.ruta_evento.is_null(False)))
+                  .group_by(Flight.ruta_evento)
+                  .alias('vuelos_aeronave'))
+
+        (EventRouteCapacity
+         .update(capacidad_total=EventRouteCapacity.capacidad_total + vuelos.c.total_vuelos * delta)
+         .from_(vuelos)
+         .where(EventRouteCapacity.ruta_evento == vuelos.c.ruta_evento_id)
+         .execute())
+
+    def rebuild(self):
+        """Recalcula el agregado completo a partir de los vuelos (carga inicial)."""
+        capacidad = (Flight
+                     .select(Flight.ruta_evento, fn.SUM(Aircraft.capacidad))
+                     .join(Aircraft, on=(Flight.aeronave == Aircraft.id))
+                     .where(Flight.ruta_evento.is_null(False))
+                     .group_by(Flight.ruta_evento))
+
+        with db.atomic():
+            EventRouteCapacity.delete().execute()
+            (EventRouteCapacity
+             .insert_from(capacidad, fields=[EventRouteCapacity.ruta_evento, EventRouteCapacity.capacidad_total])
+             .execute())
+
+    def get_for_event_route(self, ruta_evento_id):
+        aggregate = EventRouteCapacity.get_or_none(EventRouteCapacity.ruta_evento == ruta_evento_id)
+        return aggregate.capacidad_total if aggregate else 0
@@ -1,6 +1,8 @@
 from backend.models.event_route import EventRoute
 from backend.models.route import Route
 from backend.models.event import Event
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
 from peewee import JOIN, IntegrityError
 
 
@@ -10,10 +12,19 @@ class EventRouteRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, versions=None):
+        # Versiones por tabla (ETag); sin él, las escrituras no las incrementan.
+        self.versions = versions
+
+    def _bump(self, *models):
+        # Las ETag de los listados y detalles dependen de la versión de la tabla.
+        if self.versions is not None:
+            self.versions.bump(*models)
+
     # SE ELIMINA @staticmethod
     def create(self, ruta_id, evento_id, demanda_estimada):
         try:
-            return EventRoute.create(
+            event_route = EventRoute.create(
                 ruta=ruta_id,
                 evento=evento_id,
                 demanda_estimada=demanda_estimada
@@ -21,6 +32,8 @@ class EventRouteRepository:
         except IntegrityError:
             # Capturar el error de integridad y lanzar un error más descriptivo
             raise ValueError("Esta ruta ya está asignada a este evento.")
+        self._bump(EventRoute)
+        return event_route
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, event_route_id):
@@ -35,17 +48,23 @@ class EventRouteRepository:
             .get_or_none()
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(
-            EventRoute.select(
-                EventRoute,
-                Route,
-                Event
-            ) \
-                .join(Route, JOIN.LEFT_OUTER, on=(EventRoute.ruta == Route.id)) \
-                .join(Event, JOIN.LEFT_OUTER, on=(EventRoute.evento == Event.id)) \
-                .order_by(EventRoute.id)
-        )
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else self._list_query()
+        return list(apply_keyset(query, EventRoute.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else self._list_query()
+        return iterate_query(apply_keyset(query, EventRoute.id, after_id))
+
+    def _list_query(self):
+        return EventRoute.select(
+            EventRoute,
+            Route,
+            Event
+        ) \
+            .join(Route, JOIN.LEFT_OUTER, on=(EventRoute.ruta == Route.id)) \
+            .join(Event, JOIN.LEFT_OUTER, on=(EventRoute.evento == Event.id))
 
     # SE ELIMINA @staticmethod
     def update(self, event_route_id, **kwargs):
@@ -67,16 +86,19 @@ class EventRouteRepository:
         try:
             query = EventRoute.update(**update_data).where(EventRoute.id == event_route_id)
             rows_updated = query.execute()
-            return rows_updated > 0
         except IntegrityError:
             # Esto previene que se asigne una combinación de ruta y evento que ya existe
             raise ValueError("Error: La combinación de esta ruta y evento ya existe.")
+        if rows_updated:
+            self._bump(EventRoute)
+        return rows_updated > 0
 
     # SE ELIMINA @staticmethod
     def delete(self, event_route_id):
         event_route = EventRoute.get_or_none(EventRoute.id == event_route_id)
         if event_route:
             event_route.delete_instance()
+            self._bump(EventRoute)
             return True
         return False
 
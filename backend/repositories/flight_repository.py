@@ -3,51 +3,83 @@ from backend.models.aircraft import Aircraft
 from backend.models.event_route import EventRoute
 from backend.models.route import Route
 from backend.models.event import Event
+from backend.db.connection import db
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
 from peewee import JOIN
 
+
+def flight_detail_query():
+    """
+    Vuelos con su aeronave, ruta de evento, ruta y evento en una sola consulta.
+    La comparten el repositorio síncrono y el asíncrono.
+    """
+    return Flight.select(
+            Flight,
+            Aircraft,
+            EventRoute,
+            Route,
+            Event
+        )\
+        .join(Aircraft, JOIN.LEFT_OUTER).switch(Flight)\
+        .join(EventRoute, JOIN.LEFT_OUTER)\
+        .join(Route, JOIN.LEFT_OUTER, on=(EventRoute.ruta == Route.id))\
+        .join(Event, JOIN.LEFT_OUTER, on=(EventRoute.evento == Event.id))
+
+
+def overlapping_flight_query(aeronave_id, fecha_salida, fecha_llegada):
+    """Vuelos de la aeronave cuyo horario se cruza con el intervalo indicado."""
+    return Flight.select().where(
+        (Flight.aeronave == aeronave_id) &
+        (
+                (Flight.fecha_salida < fecha_llegada) & (Flight.fecha_llegada > fecha_salida)
+        )
+    )
+
+
 class FlightRepository:
+    def __init__(self, capacity_repo, statements=None):
+        # Agregado de capacidad por ruta de evento, se actualiza en cada escritura de vuelos.
+        self.capacity_repo = capacity_repo
+        # Registro de sentencias preparadas; sin él, las consultas se arman con peewee.
+        self.statements = statements
+
     # SE ELIMINA @staticmethod
     def create(self, codigo_vuelo, aeronave_id, ruta_evento_id, fecha_salida, fecha_llegada):
-        return Flight.create(
-            codigo_vuelo=codigo_vuelo,
-            aeronave=aeronave_id,
-            ruta_evento=ruta_evento_id,
-            fecha_salida=fecha_salida,
-            fecha_llegada=fecha_llegada
-        )
+        with db.atomic():
+            flight = Flight.create(
+                codigo_vuelo=codigo_vuelo,
+                aeronave=aeronave_id,
+                ruta_evento=ruta_evento_id,
+                fecha_salida=fecha_salida,
+                fecha_llegada=fecha_llegada
+            )
+            self.capacity_repo.add_flight(ruta_evento_id, aeronave_id)
+        return flight
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, flight_id):
-        return Flight.select(
-                Flight,
-                Aircraft,
-                EventRoute,
-                Route,
-                Event
-            )\
-            .join(Aircraft, JOIN.LEFT_OUTER).switch(Flight)\
-            .join(EventRoute, JOIN.LEFT_OUTER)\
-            .join(Route, JOIN.LEFT_OUTER, on=(EventRoute.ruta == Route.id))\
-            .join(Event, JOIN.LEFT_OUTER, on=(EventRoute.evento == Event.id))\
-            .where(Flight.id == flight_id)\
-            .get_or_none()
+        if self.statements is not None:
+            return self.statements.get_or_none("vuelo_por_id", flight_id=flight_id)
+        return flight_detail_query().where(Flight.id == flight_id).get_or_none()
+
+    def find_overlapping(self, aeronave_id, fecha_salida, fecha_llegada):
+        """Primer vuelo de la aeronave que se solapa con el horario, o None."""
+        if self.statements is not None:
+            return self.statements.get_or_none(
+                "vuelo_solapado", aeronave_id=aeronave_id, fecha_salida=fecha_salida, fecha_llegada=fecha_llegada
+            )
+        return overlapping_flight_query(aeronave_id, fecha_salida, fecha_llegada).first()
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(
-            Flight.select(
-                Flight,
-                Aircraft,
-                EventRoute,
-                Route,
-                Event
-            )\
-            .join(Aircraft, JOIN.LEFT_OUTER).switch(Flight)\
-            .join(EventRoute, JOIN.LEFT_OUTER)\
-            .join(Route, JOIN.LEFT_OUTER, on=(EventRoute.ruta == Route.id))\
-            .join(Event, JOIN.LEFT_OUTER, on=(EventRoute.evento == Event.id))\
-            .order_by(Flight.id)
-        )
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else flight_detail_query()
+        return list(apply_keyset(query, Flight.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else flight_detail_query()
+        return iterate_query(apply_keyset(query, Flight.id, after_id))
 
     def update(self, flight_id, **kwargs):
         allowed_fields = [
@@ -70,18 +102,34 @@ class FlightRepository:
         if not update_data:
             return False
 
-        # Ahora la consulta recibe los nombres de campo correctos que Peewee espera.
-        query = Flight.update(**update_data).where(Flight.id == flight_id)
-        rows_updated = query.execute()
+        with db.atomic():
+            # Se lee (y bloquea) la asignación anterior para mover la capacidad entre agregados;
+            # una reasignación concurrente del mismo vuelo espera y lee la asignación ya movida.
+            previous = Flight.select().where(Flight.id == flight_id).for_update().get_or_none()
+            if not previous:
+                return False
+
+            # Ahora la consulta recibe los nombres de campo correctos que Peewee espera.
+            query = Flight.update(**update_data).where(Flight.id == flight_id)
+            rows_updated = query.execute()
+
+            if rows_updated and ('aeronave' in update_data or 'ruta_evento' in update_data):
+                self.capacity_repo.remove_flight(previous.ruta_evento_id, previous.aeronave_id)
+                self.capacity_repo.add_flight(
+                    update_data.get('ruta_evento', previous.ruta_evento_id),
+                    update_data.get('aeronave', previous.aeronave_id)
+                )
 
         return rows_updated > 0
 
     # SE ELIMINA @staticmethod
     def delete(self, flight_id):
-        flight = Flight.get_or_none(Flight.id == flight_id)
-        if flight:
-            flight.delete_instance()
-            return True
+        with db.atomic():
+            flight = Flight.select().where(Flight.id == flight_id).for_update().get_or_none()
+            # Solo el borrado que elimina la fila descuenta su capacidad del agregado.
+            if flight and flight.delete_instance():
+                self.capacity_repo.remove_flight(flight.ruta_evento_id, flight.aeronave_id)
+                return True
         return False
 
     # Nueva Funcionalidad
@@ -0,0 +1,34 @@
+from backend.db.prepared_statements import PreparedStatementRegistry, Placeholder
+from backend.models.flight import Flight
+from backend.models.user import User
+from backend.repositories.flight_repository import flight_detail_query, overlapping_flight_query
+from backend.repositories.real_coverage_repository import latest_for_event_route_query
+
+def build_prepared_statements(database):
+    """
+    Registra, con las mismas consultas que usan los repositorios, las
+    lecturas que más se repiten: el vuelo con sus cuatro uniones, el último
+    cálculo de una ruta, el usuario del login y el cruce de horarios de una
+    aeronave que revisa FlightValidator. El nombre de cada consulta es
+    también el de la sentencia preparada en PostgreSQL.
+    """
+    registry = PreparedStatementRegistry(database)
+    registry.register(
+        "vuelo_por_id",
+        flight_detail_query().where(Flight.id == Placeholder("flight_id")).limit(1)
+    )
+    registry.register(
+        "ultima_cobertura_ruta",
+        latest_for_event_route_query(Placeholder("ruta_evento_id")).limit(1)
+    )
+    registry.register(
+        "usuario_por_nombre",
+        User.select().where(User.username == Placeholder("username")).limit(1)
+    )
+    registry.register(
+        "vuelo_solapado",
+        overlapping_flight_query(
+            Placeholder("aeronave_id"), Placeholder("fecha_salida"), Placeholder("fecha_llegada")
+        ).limit(1)
+    )
+    return registry
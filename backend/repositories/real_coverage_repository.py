@@ -1,4 +1,21 @@
+import datetime
+from peewee import fn, SQL, EXCLUDED
+from backend.db.connection import db
 from backend.models.real_coverage import RealCoverage
+from backend.models.latest_coverage import LatestCoverage
+from backend.models.coverage_daily_rollup import CoverageDailyRollup
+from backend.models.coverage_alert import CoverageAlert
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
+
+
+def latest_for_event_route_query(ruta_evento_id):
+    """Último cálculo de una ruta de evento a través de la tabla de punteros."""
+    return (RealCoverage
+            .select()
+            .join(LatestCoverage, on=(LatestCoverage.cobertura == RealCoverage.id))
+            .where(LatestCoverage.ruta_evento == ruta_evento_id))
+
 
 class RealCoverageRepository:
     """
@@ -6,34 +23,202 @@ class RealCoverageRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, statements=None):
+        # Registro de sentencias preparadas; sin él, las consultas se arman con peewee.
+        self.statements = statements
+
     # SE ELIMINA @staticmethod
     def create(self, ruta_evento_id, capacidad_real, porcentaje_cobertura, estado_cobertura, fecha_calculo):
-        return RealCoverage.create(
-            ruta_evento=ruta_evento_id,
-            capacidad_real=capacidad_real,
-            porcentaje_cobertura=porcentaje_cobertura,
-            estado_cobertura=estado_cobertura,
-            fecha_calculo=fecha_calculo
-        )
+        with db.atomic():
+            coverage = RealCoverage.create(
+                ruta_evento=ruta_evento_id,
+                capacidad_real=capacidad_real,
+                porcentaje_cobertura=porcentaje_cobertura,
+                estado_cobertura=estado_cobertura,
+                fecha_calculo=fecha_calculo
+            )
+            self._mark_latest([(ruta_evento_id, coverage.id)])
+        return coverage
+
+    def create_many(self, coverages):
+        """
+        Inserta varios cálculos de cobertura con un único INSERT multi-fila.
+        Recibe una lista de diccionarios con las mismas claves que create() y
+        devuelve los ids generados en el mismo orden de la lista.
+        """
+        if not coverages:
+            return []
+
+        rows = [{
+            "ruta_evento": c["ruta_evento_id"],
+            "capacidad_real": c["capacidad_real"],
+            "porcentaje_cobertura": c["porcentaje_cobertura"],
+            "estado_cobertura": c["estado_cobertura"],
+            "fecha_calculo": c["fecha_calculo"],
+        } for c in coverages]
+
+        # Un INSERT multi-fila y la actualización de los punteros al último
+        # cálculo; se integra en la transacción del llamador si existe una abierta.
+        with db.atomic():
+            inserted = (RealCoverage
+                        .insert_many(rows)
+                        .returning(RealCoverage.id)
+                        .tuples()
+                        .execute())
+            # La secuencia asigna los ids en el orden de las filas del INSERT:
+            # ordenados se emparejan por posición, aunque una ruta se repita en el lote.
+            coverage_ids = sorted(coverage_id for (coverage_id,) in inserted)
+            # Con rutas repetidas, el puntero queda en el último cálculo del lote.
+            latest = dict(zip((c["ruta_evento_id"] for c in coverages), coverage_ids))
+            self._mark_latest(latest.items())
+        return coverage_ids
+
+    def _mark_latest(self, route_coverage_pairs):
+        """Apunta cada ruta de evento a su cálculo recién insertado."""
+        rows = [{"ruta_evento": ruta_evento_id, "cobertura": coverage_id}
+                for ruta_evento_id, coverage_id in route_coverage_pairs]
+        if not rows:
+            return
+        (LatestCoverage
+         .insert_many(rows)
+         .on_conflict(
+             conflict_target=[LatestCoverage.ruta_evento],
+             update={LatestCoverage.cobertura: EXCLUDED.cobertura_id})
+         .execute())
+
+    def rebuild_latest(self, ruta_evento_id=None):
+        """
+        Recalcula los punteros al último cálculo a partir de la tabla de
+        coberturas (carga inicial, o tras borrar el cálculo más reciente de una ruta).
+        """
+        ultimas = (RealCoverage
+                   .select(RealCoverage.ruta_evento, RealCoverage.id)
+                   .distinct(RealCoverage.ruta_evento)
+                   .order_by(RealCoverage.ruta_evento, RealCoverage.fecha_calculo.desc(), RealCoverage.id.desc()))
+        if ruta_evento_id is not None:
+            ultimas = ultimas.where(RealCoverage.ruta_evento == ruta_evento_id)
+
+        (LatestCoverage
+         .insert_from(ultimas, fields=[LatestCoverage.ruta_evento, LatestCoverage.cobertura])
+         .on_conflict(
+             conflict_target=[LatestCoverage.ruta_evento],
+             update={LatestCoverage.cobertura: EXCLUDED.cobertura_id})
+         .execute())
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, coverage_id):
         return RealCoverage.get_or_none(RealCoverage.id == coverage_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(RealCoverage.select())
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else RealCoverage.select()
+        return list(apply_keyset(query, RealCoverage.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else RealCoverage.select()
+        return iterate_query(apply_keyset(query, RealCoverage.id, after_id))
 
     # SE ELIMINA @staticmethod
     def delete(self, coverage_id):
         coverage = RealCoverage.get_or_none(RealCoverage.id == coverage_id)
         if coverage:
-            coverage.delete_instance()
+            with db.atomic():
+                # Si era el último cálculo de la ruta, su puntero se borra en
+                # cascada y se vuelve a apuntar al anterior.
+                coverage.delete_instance()
+                self.rebuild_latest(coverage.ruta_evento_id)
             return True
         return False
 
     # SE ELIMINA @staticmethod
     def get_latest_for_event_route(self, ruta_evento_id):
-        """Obtiene el cálculo de cobertura más reciente para una EventRoute."""
-        return RealCoverage.select().where(RealCoverage.ruta_evento == ruta_evento_id).order_by(
-            RealCoverage.fecha_calculo.desc()).get_or_none()
+        """Obtiene el cálculo de cobertura más reciente para una EventRoute (búsqueda por clave)."""
+        if self.statements is not None:
+            return self.statements.get_or_none("ultima_cobertura_ruta", ruta_evento_id=ruta_evento_id)
+        return latest_for_event_route_query(ruta_evento_id).get_or_none()
+
+    def get_latest_for_event_routes(self, ruta_evento_ids):
+        """
+        Último cálculo de varias rutas de evento en una sola consulta.
+        Devuelve un diccionario {ruta_evento_id: RealCoverage}; las rutas sin
+        cálculos no aparecen.
+        """
+        if not ruta_evento_ids:
+            return {}
+        query = (RealCoverage
+                 .select()
+                 .join(LatestCoverage, on=(LatestCoverage.cobertura == RealCoverage.id))
+                 .where(LatestCoverage.ruta_evento.in_(list(ruta_evento_ids))))
+        return {coverage.ruta_evento_id: coverage for coverage in query}
+
+    # --- Retención ---
+
+    def _compactable(self, query, desde, hasta):
+        """
+        Cálculos del rango [desde, hasta) que pueden compactarse: se conservan
+        los que tienen alertas y los que siguen siendo el último de su ruta.
+        """
+        con_alerta = CoverageAlert.select(SQL('1')).where(CoverageAlert.cobertura == RealCoverage.id)
+        es_ultimo = LatestCoverage.select(SQL('1')).where(LatestCoverage.cobertura == RealCoverage.id)
+        return query.where(
+            (RealCoverage.fecha_calculo >= desde) &
+            (RealCoverage.fecha_calculo < hasta) &
+            ~fn.EXISTS(con_alerta) &
+            ~fn.EXISTS(es_ultimo)
+        )
+
+    def compact_before(self, cutoff):
+        """
+        Resume por ruta y día los cálculos anteriores a 'cutoff' en la tabla
+        diaria y los borra del detalle. Se procesa un día por transacción.
+        Devuelve la cantidad de cálculos compactados.
+        """
+        # Solo se compactan días completos.
+        cutoff = datetime.datetime.combine(cutoff.date(), datetime.time.min)
+        dias = [dia for (dia,) in self._compactable(
+            RealCoverage.select(RealCoverage.fecha_calculo.cast('date')).distinct(),
+            datetime.datetime.min, cutoff
+        ).tuples()]
+
+        total = 0
+        for dia in sorted(dias):
+            desde = datetime.datetime.combine(dia, datetime.time.min)
+            hasta = desde + datetime.timedelta(days=1)
+            estado = RealCoverage.estado_cobertura
+            resumen = self._compactable(RealCoverage.select(
+                RealCoverage.ruta_evento,
+                RealCoverage.fecha_calculo.cast('date'),
+                fn.COUNT(RealCoverage.id),
+                fn.AVG(RealCoverage.porcentaje_cobertura),
+                fn.MIN(RealCoverage.porcentaje_cobertura),
+                fn.MAX(RealCoverage.porcentaje_cobertura),
+                fn.COUNT(RealCoverage.id).filter(estado == "Cubierta"),
+                fn.COUNT(RealCoverage.id).filter(estado == "Parcial"),
+                fn.COUNT(RealCoverage.id).filter(estado == "Crítica")
+            ), desde, hasta).group_by(RealCoverage.ruta_evento, RealCoverage.fecha_calculo.cast('date'))
+
+            rollup = CoverageDailyRollup
+            with db.atomic():
+                (rollup
+                 .insert_from(resumen, fields=[
+                     rollup.ruta_evento, rollup.dia, rollup.muestras, rollup.porcentaje_promedio,
+                     rollup.porcentaje_minimo, rollup.porcentaje_maximo,
+                     rollup.cubiertas, rollup.parciales, rollup.criticas])
+                 .on_conflict(
+                     conflict_target=[rollup.ruta_evento, rollup.dia],
+                     update={
+                         rollup.porcentaje_promedio:
+                             (rollup.porcentaje_promedio * rollup.muestras +
+                              EXCLUDED.porcentaje_promedio * EXCLUDED.muestras) /
+                             (rollup.muestras + EXCLUDED.muestras),
+                         rollup.muestras: rollup.muestras + EXCLUDED.muestras,
+                         rollup.porcentaje_minimo: fn.LEAST(rollup.porcentaje_minimo, EXCLUDED.porcentaje_minimo),
+                         rollup.porcentaje_maximo: fn.GREATEST(rollup.porcentaje_maximo, EXCLUDED.porcentaje_maximo),
+                         rollup.cubiertas: rollup.cubiertas + EXCLUDED.cubiertas,
+                         rollup.parciales: rollup.parciales + EXCLUDED.parciales,
+                         rollup.criticas: rollup.criticas + EXCLUDED.criticas,
+                     })
+                 .execute())
+                total += self._compactable(RealCoverage.delete(), desde, hasta).execute()
+        return total
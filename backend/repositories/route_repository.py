@@ -1,4 +1,7 @@
 from backend.models.route import Route
+from backend.models.event_route import EventRoute
+from backend.db.streaming import iterate_query
+from backend.utils.pagination import apply_keyset
 
 class RouteRepository:
     """
@@ -6,17 +9,34 @@ class RouteRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, versions=None):
+        # Versiones por tabla (ETag); sin él, las escrituras no las incrementan.
+        self.versions = versions
+
+    def _bump(self, *models):
+        # Las ETag de los listados y detalles dependen de la versión de la tabla.
+        if self.versions is not None:
+            self.versions.bump(*models)
+
     # SE ELIMINA @staticmethod
     def create(self, origen, destino, distancia):
-        return Route.create(origen=origen, destino=destino, distancia=distancia)
+        route = Route.create(origen=origen, destino=destino, distancia=distancia)
+        self._bump(Route)
+        return route
 
     # SE ELIMINA @staticmethod
     def get_by_id(self, route_id):
         return Route.get_or_none(Route.id == route_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(Route.select())
+    def get_all(self, after_id=None, limit=None, projection=None):
+        query = projection.select() if projection else Route.select()
+        return list(apply_keyset(query, Route.id, after_id, limit))
+
+    def iter_all(self, after_id=None, projection=None):
+        """Todos los registros desde 'after_id', leídos por lotes con un cursor del lado del servidor."""
+        query = projection.select() if projection else Route.select()
+        return iterate_query(apply_keyset(query, Route.id, after_id))
 
     def update(self, route_id, **kwargs):
         allowed_fields = ['origen', 'destino', 'distancia']
@@ -24,6 +44,8 @@ class RouteRepository:
 
         query = Route.update(**update_data).where(Route.id == route_id)
         rows_updated = query.execute()
+        if rows_updated:
+            self._bump(Route)
         return rows_updated > 0
 
     # SE ELIMINA @staticmethod
@@ -31,5 +53,7 @@ class RouteRepository:
         route = Route.get_or_none(Route.id == route_id)
         if route:
             route.delete_instance()
+            # El borrado se propaga (ON DELETE CASCADE) a las rutas de evento.
+            self._bump(Route, EventRoute)
             return True
         return False
@@ -0,0 +1,21 @@
+from backend.models.table_version import TableVersion
+
+
+class TableVersionRepository:
+    """
+    Repositorio de los contadores de cambios por tabla (version_tabla).
+    Los métodos son de instancia para permitir la Inyección de Dependencias.
+    """
+
+    def increment(self, tablas):
+        """Suma uno a la versión de cada tabla (la crea si no existe) y devuelve {tabla: versión}."""
+        query = (TableVersion
+                 .insert_many([{"tabla": tabla, "version": 1} for tabla in tablas])
+                 .on_conflict(conflict_target=[TableVersion.tabla],
+                              update={TableVersion.version: TableVersion.version + 1})
+                 .returning(TableVersion.tabla, TableVersion.version)
+                 .tuples())
+        return dict(query.execute())
+
+    def get_all(self):
+        return dict(TableVersion.select(TableVersion.tabla, TableVersion.version).tuples())
@@ -1,4 +1,5 @@
 from backend.models.user import User
+from backend.utils.pagination import apply_keyset
 
 class UserRepository:
     """
@@ -6,6 +7,10 @@ class UserRepository:
     Los métodos son de instancia para permitir la Inyección de Dependencias.
     """
 
+    def __init__(self, statements=None):
+        # Registro de sentencias preparadas; sin él, las consultas se arman con peewee.
+        self.statements = statements
+
     # SE ELIMINA @staticmethod
     def create(self, username, password, role):
         # La lógica de hashing de la contraseña debería estar en el controlador/servicio,
@@ -14,14 +19,16 @@ class UserRepository:
 
     # SE ELIMINA @staticmethod
     def get_by_username(self, username):
+        if self.statements is not None:
+            return self.statements.get_or_none("usuario_por_nombre", username=username)
         return User.get_or_none(User.username == username)
 
     def get_by_id(self, user_id):
         return User.get_or_none(User.id == user_id)
 
     # SE ELIMINA @staticmethod
-    def get_all(self):
-        return list(User.select())
+    def get_all(self, after_id=None, limit=None):
+        return list(apply_keyset(User.select(), User.id, after_id, limit))
 
     # SE ELIMINA @staticmethod
     def delete(self, user_id):
@@ -0,0 +1,51 @@
+from backend.utils.cache import TTLCache
+
+
+class CoverageResultCache:
+    """
+    Caché de resultados del panel de cobertura y del detalle de ruta.
+    Las entradas expiran por TTL y, además, los controladores de escritura
+    las invalidan para que nunca sobrevivan a los datos con que se calcularon.
+    """
+
+    def __init__(self, max_size, ttl_seconds):
+        # Clave: (event_id, status_filter, page, limit, after_id)
+        self.dashboard = TTLCache(max_size, ttl_seconds)
+        # Clave: ruta_evento_id
+        self.route_detail = TTLCache(max_size, ttl_seconds)
+
+    @staticmethod
+    def dashboard_key(event_id, status_filter, page, limit, after_id=None):
+        return (event_id, status_filter.lower() if status_filter else None, page, limit, after_id)
+
+    # --- Ganchos de invalidación ---
+
+    def invalidate_route(self, ruta_evento_id=None):
+        """Descarta el detalle de una ruta de evento (o de todas si es None)."""
+        if ruta_evento_id is None:
+            self.route_detail.clear()
+        else:
+            self.route_detail.invalidate(int(ruta_evento_id))
+
+    def invalidate_event(self, event_id=None):
+        """
+        Descarta las páginas del panel de un evento y las de toda la red
+        (todas si event_id es None). El detalle de ruta muestra el último
+        cálculo de la ruta, así que también se descarta.
+        """
+        if event_id is None:
+            self.dashboard.clear()
+        else:
+            event_id = int(event_id)
+            self.dashboard.invalidate_where(lambda key: key[0] in (event_id, None))
+        self.route_detail.clear()
+
+    def invalidate_all(self):
+        self.dashboard.clear()
+        self.route_detail.clear()
+
+    def stats(self):
+        return {
+            "dashboard": self.dashboard.stats(),
+            "route_detail": self.route_detail.stats(),
+        }
@@ -0,0 +1,36 @@
+from backend.strategies.coverage_strategies import (
+    ThresholdCoverageClassifier,
+    build_threshold_table,
+    DEFAULT_CLASSIFIER
+)
+
+
+class CoverageClassifierRegistry:
+    """
+    Mantiene un clasificador compilado por evento a partir de los umbrales
+    configurados. Los clasificadores se construyen una vez y se reutilizan
+    hasta que los umbrales cambian (invalidate).
+    """
+
+    def __init__(self, threshold_repo):
+        self.threshold_repo = threshold_repo
+        self._by_event = None
+
+    def _load(self):
+        self._by_event = by_event = {
+            threshold.evento_id: ThresholdCoverageClassifier(build_threshold_table(
+                float(threshold.umbral_parcial), float(threshold.umbral_cubierta)
+            ))
+            for threshold in self.threshold_repo.get_all()
+        }
+        return by_event
+
+    def for_event(self, event_id) -> ThresholdCoverageClassifier:
+        # Se lee una sola vez: invalidate() puede correr en otro hilo.
+        by_event = self._by_event
+        if by_event is None:
+            by_event = self._load()
+        return by_event.get(event_id, DEFAULT_CLASSIFIER)
+
+    def invalidate(self):
+        self._by_event = None
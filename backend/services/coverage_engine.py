@@ -0,0 +1,351 @@
+import datetime
+import numpy as np
+from peewee import fn, Case, SQL, JOIN, Value
+
+from backend.strategies.coverage_strategies import UMBRAL_PARCIAL, UMBRAL_CUBIERTA, DEFAULT_CLASSIFIER
+from backend.models.event_route import EventRoute
+from backend.models.route import Route
+from backend.models.event import Event
+from backend.models.event_route_capacity import EventRouteCapacity
+from backend.models.event_coverage_threshold import EventCoverageThreshold
+from backend.models.real_coverage import RealCoverage
+from backend.models.latest_coverage import LatestCoverage
+from backend.db.streaming import server_side_cursor
+
+ESTADOS_COBERTURA = ("Cubierta", "Parcial", "Crítica")
+
+
+class SqlCoverageEngine:
+    """
+    Motor de cobertura que delega en PostgreSQL el cálculo del porcentaje,
+    la clasificación del estado, el filtro por estado, el resumen y la paginación.
+    Todo se resuelve en una sola consulta; Python solo recorre las filas de la página.
+    """
+
+    def _classified_cte(self, event_id):
+        """
+        Construye las CTE con la cobertura de cada ruta ya clasificada.
+        Devuelve la lista de CTE a declarar y la CTE final 'clasificadas'.
+        """
+        # La capacidad por ruta se lee del agregado mantenido por deltas,
+        # sin recorrer la tabla de vuelos.
+        capacidad_real = fn.COALESCE(EventRouteCapacity.capacidad_total, 0).cast('float8')
+        porcentaje = Case(None, [
+            (EventRoute.demanda_estimada > 0,
+             capacidad_real / EventRoute.demanda_estimada.cast('float8') * 100)
+        ], SQL('100.0'))
+
+        coberturas = (
+            EventRoute.select(
+                EventRoute.id,
+                EventRoute.demanda_estimada.cast('float8').alias('demanda_estimada'),
+                Route.origen,
+                Route.destino,
+                EventRoute.evento,
+                Event.nombre_evento,
+                capacidad_real.alias('capacidad_real'),
+                porcentaje.alias('porcentaje_cobertura'),
+                fn.COALESCE(EventCoverageThreshold.umbral_parcial, UMBRAL_PARCIAL).cast('float8').alias('umbral_parcial'),
+                fn.COALESCE(EventCoverageThreshold.umbral_cubierta, UMBRAL_CUBIERTA).cast('float8').alias('umbral_cubierta')
+            )
+            .join(Route, on=(EventRoute.ruta == Route.id))
+            .switch(EventRoute)
+            .join(Event, on=(EventRoute.evento == Event.id))
+            .switch(EventRoute)
+            .join(EventRouteCapacity, JOIN.LEFT_OUTER, on=(EventRouteCapacity.ruta_evento == EventRoute.id))
+            .switch(EventRoute)
+            .join(EventCoverageThreshold, JOIN.LEFT_OUTER, on=(EventCoverageThreshold.evento == EventRoute.evento))
+        )
+        if event_id is not None:
+            coberturas = coberturas.where(EventRoute.evento == event_id)
+        coberturas = coberturas.cte('coberturas')
+
+        # Misma tabla de umbrales que el clasificador: la del evento si está
+        # configurada, o los umbrales por defecto.
+        estado = Case(None, [
+            (coberturas.c.porcentaje_cobertura < 0, "Indefinido"),
+            (coberturas.c.porcentaje_cobertura < coberturas.c.umbral_parcial, "Crítica"),
+            (coberturas.c.porcentaje_cobertura < coberturas.c.umbral_cubierta, "Parcial"),
+        ], "Cubierta")
+
+        clasificadas = coberturas.select_from(
+            coberturas.c.id,
+            coberturas.c.demanda_estimada,
+            coberturas.c.origen,
+            coberturas.c.destino,
+            coberturas.c.evento_id,
+            coberturas.c.nombre_evento,
+            coberturas.c.capacidad_real,
+            coberturas.c.porcentaje_cobertura,
+            estado.alias('estado_cobertura'),
+            Value(datetime.datetime.now()).cast('timestamp').alias('fecha_calculo')
+        ).cte('clasificadas')
+        return [coberturas, clasificadas], clasificadas
+
+    @staticmethod
+    def _to_dashboard_row(row):
+        return {
+            "id": row['id'],
+            "nombre_ruta": f"{row['origen']}-{row['destino']}",
+            "evento_id": row['evento_id'],
+            "nombre_evento": row['nombre_evento'],
+            "demanda_estimada": row['demanda_estimada'],
+            "capacidad_real": row['capacidad_real'],
+            "porcentaje_cobertura": round(row['porcentaje_cobertura'], 2),
+            "estado_cobertura": row['estado_cobertura'],
+            "fecha_calculo": row['fecha_calculo'].isoformat()
+        }
+
+    def iter_rows(self, event_id):
+        """Recorre todas las filas clasificadas del alcance indicado, ordenadas por id."""
+        ctes, clasificadas = self._classified_cte(event_id)
+        query = (clasificadas.select_from(SQL('*'))
+                 .order_by(clasificadas.c.id)
+                 .with_cte(*ctes))
+        for row in query.dicts().iterator():
+            yield self._to_dashboard_row(row)
+
+    @staticmethod
+    def _filter_by_status(clasificadas, status_filter):
+        query = clasificadas.select_from(SQL('*'))
+        if status_filter is not None:
+            # La comparación sin distinguir mayúsculas se resuelve aquí para no
+            # depender de la configuración regional de LOWER() en el servidor.
+            estado_buscado = next(
+                (e for e in ESTADOS_COBERTURA if e.lower() == status_filter.lower()),
+                status_filter
+            )
+            query = query.where(clasificadas.c.estado_cobertura == estado_buscado)
+        return query
+
+    def stream_rows(self, event_id, status_filter=None, batch_size=2000):
+        """
+        Recorre todas las filas del alcance con un cursor del lado del servidor:
+        PostgreSQL entrega 'batch_size' filas por viaje, así que la memoria usada
+        no depende de cuántas rutas de evento haya.
+        """
+        ctes, clasificadas = self._classified_cte(event_id)
+        query = (self._filter_by_status(clasificadas, status_filter)
+                 .order_by(clasificadas.c.id)
+                 .with_cte(*ctes))
+        sql, params = query.sql()
+
+        with server_side_cursor(sql, params, batch_size, name="exportacion_cobertura") as cursor:
+            columnas = None
+            for registro in cursor:
+                if columnas is None:
+                    columnas = [d[0] for d in cursor.description]
+                yield self._to_dashboard_row(dict(zip(columnas, registro)))
+
+    def get_page(self, event_id, status_filter=None, page=1, limit=10, after_id=None):
+        """
+        Devuelve las filas de la página solicitada, los conteos por estado
+        del conjunto filtrado y si quedan más filas, en un único viaje a la
+        base de datos. Con 'after_id' la página se busca por clave (id > after_id)
+        en lugar de por desplazamiento.
+        """
+        query = self.page_query(event_id, status_filter, page, limit, after_id=after_id)
+        return self.page_result(query, limit)
+
+    def page_query(self, event_id, status_filter=None, page=1, limit=10, after_id=None):
+        """
+        Consulta (sin ejecutar) de get_page, para poder ejecutarla con otro
+        ejecutor; sus filas se interpretan con page_result.
+        """
+        ctes, clasificadas = self._classified_cte(event_id)
+
+        filtradas = self._filter_by_status(clasificadas, status_filter).cte('filtradas')
+
+        resumen = filtradas.select_from(
+            fn.COUNT(SQL('*')).alias('total_items'),
+            fn.COUNT(SQL('*')).filter(filtradas.c.estado_cobertura == "Cubierta").alias('cubiertas'),
+            fn.COUNT(SQL('*')).filter(filtradas.c.estado_cobertura == "Parcial").alias('parciales'),
+            fn.COUNT(SQL('*')).filter(filtradas.c.estado_cobertura == "Crítica").alias('criticas')
+        ).cte('resumen')
+
+        # Se pide una fila de más para saber si existe una página siguiente.
+        pagina = filtradas.select_from(SQL('*')).order_by(filtradas.c.id).limit(limit + 1)
+        if after_id is not None:
+            pagina = pagina.where(filtradas.c.id > after_id)
+        else:
+            pagina = pagina.offset(max(page - 1, 0) * limit)
+        pagina = pagina.cte('pagina')
+
+        # El resumen se une por la izquierda para obtener los conteos
+        # incluso cuando la página solicitada no tiene filas.
+        return (
+            resumen.select_from(
+                resumen.c.total_items, resumen.c.cubiertas, resumen.c.parciales, resumen.c.criticas,
+                pagina.c.id, pagina.c.demanda_estimada, pagina.c.origen, pagina.c.destino,
+                pagina.c.evento_id, pagina.c.nombre_evento, pagina.c.capacidad_real,
+                pagina.c.porcentaje_cobertura, pagina.c.estado_cobertura, pagina.c.fecha_calculo
+            )
+            .join(pagina, JOIN.LEFT_OUTER, on=SQL('TRUE'))
+            .order_by(pagina.c.id)
+            .with_cte(*ctes, filtradas, resumen, pagina)
+            .dicts()
+        )
+
+    def page_result(self, page_rows, limit):
+        rows = []
+        counts = {"total_items": 0, "Cubierta": 0, "Parcial": 0, "Crítica": 0}
+
+        for row in page_rows:
+            counts = {
+                "total_items": row['total_items'],
+                "Cubierta": row['cubiertas'],
+                "Parcial": row['parciales'],
+                "Crítica": row['criticas'],
+            }
+            if row['id'] is not None:
+                rows.append(self._to_dashboard_row(row))
+
+        return rows[:limit], counts, len(rows) > limit
+
+
+class SnapshotCoverageEngine(SqlCoverageEngine):
+    """
+    Variante de solo lectura que sirve el último cálculo persistido de cada
+    ruta de evento en lugar de recalcular contra los vuelos. La paginación,
+    el filtro y el resumen son los mismos que los del motor SQL.
+    """
+
+    def _classified_cte(self, event_id):
+        # El último cálculo de cada ruta se resuelve por clave con la tabla de punteros.
+        ultimas = (
+            RealCoverage.select(
+                RealCoverage.ruta_evento,
+                RealCoverage.capacidad_real,
+                RealCoverage.porcentaje_cobertura,
+                RealCoverage.estado_cobertura,
+                RealCoverage.fecha_calculo
+            )
+            .join(LatestCoverage, on=(LatestCoverage.cobertura == RealCoverage.id))
+            .cte('ultimas_coberturas')
+        )
+
+        clasificadas = (
+            EventRoute.select(
+                EventRoute.id,
+                EventRoute.demanda_estimada.cast('float8').alias('demanda_estimada'),
+                Route.origen,
+                Route.destino,
+                EventRoute.evento,
+                Event.nombre_evento,
+                ultimas.c.capacidad_real.cast('float8').alias('capacidad_real'),
+                ultimas.c.porcentaje_cobertura.cast('float8').alias('porcentaje_cobertura'),
+                ultimas.c.estado_cobertura,
+                ultimas.c.fecha_calculo
+            )
+            .join(Route, on=(EventRoute.ruta == Route.id))
+            .switch(EventRoute)
+            .join(Event, on=(EventRoute.evento == Event.id))
+            .join(ultimas, on=(EventRoute.id == ultimas.c.ruta_evento_id))
+        )
+        if event_id is not None:
+            clasificadas = clasificadas.where(EventRoute.evento == event_id)
+        clasificadas = clasificadas.cte('clasificadas')
+        return [ultimas, clasificadas], clasificadas
+
+
+class NumpyCoverageEngine:
+    """
+    Motor vectorizado para recálculos de toda la red. Carga demanda y capacidad
+    en arreglos de NumPy, calcula los porcentajes en bloque y clasifica con
+    np.searchsorted sobre la tabla de umbrales de cada evento.
+    """
+
+    # Todas las tablas de umbrales comparten las mismas etiquetas; un
+    # porcentaje bajo el primer límite queda 'Indefinido'.
+    ETIQUETAS = np.array(DEFAULT_CLASSIFIER.labels, dtype=object)
+
+    def __init__(self, classifier_registry=None):
+        self.classifier_registry = classifier_registry
+
+    def _classifier_for(self, event_id):
+        if self.classifier_registry is None:
+            return DEFAULT_CLASSIFIER
+        return self.classifier_registry.for_event(event_id)
+
+    def compute(self, demanda, capacidad, eventos=None):
+        """
+        Calcula porcentaje y código de estado para arreglos de demanda y capacidad.
+        El código es el índice en ETIQUETAS. Si se pasan los eventos de cada fila,
+        cada grupo se clasifica con los umbrales de su evento.
+        """
+        demanda = np.asarray(demanda, dtype=np.float64)
+        capacidad = np.asarray(capacidad, dtype=np.float64)
+
+        porcentajes = np.full(demanda.shape, 100.0)
+        con_demanda = demanda > 0
+        np.divide(capacidad, demanda, out=porcentajes, where=con_demanda)
+        porcentajes[con_demanda] *= 100
+
+        if eventos is None:
+            limites = np.asarray(self._classifier_for(None).limits)
+            return porcentajes, np.searchsorted(limites, porcentajes, side='right')
+
+        codigos = np.empty(porcentajes.shape, dtype=np.intp)
+        for event_id in np.unique(eventos):
+            grupo = eventos == event_id
+            limites = np.asarray(self._classifier_for(int(event_id)).limits)
+            codigos[grupo] = np.searchsorted(limites, porcentajes[grupo], side='right')
+        return porcentajes, codigos
+
+    def summarize(self, codigos):
+        """Histograma de estados: cantidad de rutas por etiqueta."""
+        histograma = np.bincount(codigos, minlength=len(self.ETIQUETAS))
+        return {etiqueta: int(total) for etiqueta, total in zip(self.ETIQUETAS, histograma)}
+
+    def load_state(self, event_id):
+        """
+        Lee en una consulta las rutas del alcance ordenadas por id y devuelve
+        las filas junto con los arreglos de demanda, capacidad y evento.
+        """
+        query = (
+            EventRoute.select(
+                EventRoute.id,
+                EventRoute.demanda_estimada,
+                Route.origen,
+                Route.destino,
+                Event.nombre_evento,
+                fn.COALESCE(EventRouteCapacity.capacidad_total, 0),
+                EventRoute.evento
+            )
+            .join(Route, on=(EventRoute.ruta == Route.id))
+            .switch(EventRoute)
+            .join(Event, on=(EventRoute.evento == Event.id))
+            .switch(EventRoute)
+            .join(EventRouteCapacity, JOIN.LEFT_OUTER, on=(EventRouteCapacity.ruta_evento == EventRoute.id))
+            .order_by(EventRoute.id)
+        )
+        if event_id is not None:
+            query = query.where(EventRoute.evento == event_id)
+
+        rows = list(query.tuples())
+        demanda = np.fromiter((float(r[1]) for r in rows), dtype=np.float64, count=len(rows))
+        capacidad = np.fromiter((r[5] for r in rows), dtype=np.float64, count=len(rows))
+        eventos = np.fromiter((r[6] for r in rows), dtype=np.int64, count=len(rows))
+        return rows, demanda, capacidad, eventos
+
+    def _to_dashboard_rows(self, rows, demanda, capacidad, porcentajes, codigos, indices):
+        fecha_calculo = datetime.datetime.now().isoformat()
+        etiquetas = self.ETIQUETAS[codigos[indices]]
+        return [{
+            "id": rows[i][0],
+            "nombre_ruta": f"{rows[i][2]}-{rows[i][3]}",
+            "evento_id": rows[i][6],
+            "nombre_evento": rows[i][4],
+            "demanda_estimada": float(demanda[i]),
+            "capacidad_real": float(capacidad[i]),
+            # round() de Python y no np.round, que puede diferir en los empates.
+            "porcentaje_cobertura": round(float(porcentajes[i]), 2),
+            "estado_cobertura": etiquetas[pos],
+            "fecha_calculo": fecha_calculo
+        } for pos, i in enumerate(indices)]
+
+    def iter_rows(self, event_id):
+        rows, demanda, capacidad, eventos = self.load_state(event_id)
+        porcentajes, codigos = self.compute(demanda, capacidad, eventos)
+        yield from self._to_dashboard_rows(rows, demanda, capacidad, porcentajes, codigos,
+                                           np.arange(len(rows)))
@@ -0,0 +1,52 @@
+import datetime
+import traceback
+import tornado.ioloop
+
+
+class CoverageRetentionScheduler:
+    """
+    Tarea periódica que mantiene acotada la tabla cobertura_real: los cálculos
+    más antiguos que la retención se resumen por ruta y día en
+    cobertura_real_diaria y se borran del detalle. Se conservan los cálculos
+    con alertas y el último de cada ruta. La compactación corre en el pool de
+    hilos de las llamadas bloqueantes, fuera del IOLoop.
+    """
+
+    def __init__(self, real_coverage_repo, blocking_executor, retention_days, interval_seconds, response_cache=None):
+        self.real_coverage_repo = real_coverage_repo
+        self.blocking_executor = blocking_executor
+        # Respuestas cacheadas que muestran la cobertura (manifiestos).
+        self.response_cache = response_cache
+        self.retention_days = retention_days
+        self.interval_seconds = interval_seconds
+        self._callback = None
+        self._running = False
+
+    def start(self):
+        if self._callback is not None:
+            return
+        self._callback = tornado.ioloop.PeriodicCallback(self.run_once, self.interval_seconds * 1000)
+        self._callback.start()
+        tornado.ioloop.IOLoop.current().add_callback(self.run_once)
+
+    def stop(self):
+        if self._callback is not None:
+            self._callback.stop()
+            self._callback = None
+
+    async def run_once(self):
+        if self._running:
+            return
+        self._running = True
+        try:
+            cutoff = datetime.datetime.now() - datetime.timedelta(days=self.retention_days)
+            total = await self.blocking_executor.run(self.real_coverage_repo.compact_before, cutoff)
+            if total:
+                if self.response_cache is not None:
+                    self.response_cache.invalidate_entity("coverage")
+                print(f"Compactación de cobertura: {total} cálculos anteriores a {cutoff.date()} resumidos por día.")
+        except Exception as e:
+            print(f"\n!!!! ERROR EN LA COMPACTACIÓN DE COBERTURA: {e} !!!!")
+            traceback.print_exc()
+        finally:
+            self._running = False
@@ -0,0 +1,59 @@
+import traceback
+import tornado.ioloop
+
+
+class CoverageRecomputeScheduler:
+    """
+    Tarea periódica sobre el IOLoop de Tornado que recalcula la cobertura y
+    persiste los resultados. El panel solo lee estos cálculos, por lo que el
+    costo de escritura es fijo sin importar cuántos clientes lo consulten.
+    El recálculo corre en el pool de hilos de las llamadas bloqueantes: el
+    IOLoop sigue atendiendo peticiones mientras dura.
+    """
+
+    def __init__(self, coverage_service, coverage_cache, blocking_executor, interval_seconds, event_ids=None,
+                 response_cache=None):
+        self.coverage_service = coverage_service
+        self.blocking_executor = blocking_executor
+        self.coverage_cache = coverage_cache
+        # Respuestas cacheadas que muestran la cobertura (manifiestos).
+        self.response_cache = response_cache
+        self.interval_seconds = interval_seconds
+        # Lista de eventos a recalcular; vacía o None significa toda la red.
+        self.event_ids = list(event_ids) if event_ids else [None]
+        self._callback = None
+        self._running = False
+
+    def start(self):
+        """Lanza un recálculo inmediato y programa los siguientes."""
+        if self._callback is not None:
+            return
+        self._callback = tornado.ioloop.PeriodicCallback(self.run_once, self.interval_seconds * 1000)
+        self._callback.start()
+        tornado.ioloop.IOLoop.current().add_callback(self.run_once)
+
+    def stop(self):
+        if self._callback is not None:
+            self._callback.stop()
+            self._callback = None
+
+    async def run_once(self):
+        # Si un recálculo tarda más que el intervalo, no se solapa con el siguiente.
+        if self._running:
+            return
+        self._running = True
+        try:
+            for event_id in self.event_ids:
+                try:
+                    # Cada recálculo toma una conexión del pool y la devuelve al terminar.
+                    total = await self.blocking_executor.run(self.coverage_service.recompute_coverage, event_id)
+                    # Hay cálculos nuevos: los resultados cacheados del alcance quedan obsoletos.
+                    self.coverage_cache.invalidate_event(event_id)
+                    if self.response_cache is not None:
+                        self.response_cache.invalidate_entity("coverage")
+                    print(f"Cobertura recalculada para {'toda la red' if event_id is None else f'el evento {event_id}'}: {total} rutas.")
+                except Exception as e:
+                    print(f"\n!!!! ERROR EN EL RECÁLCULO DE COBERTURA (evento {event_id}): {e} !!!!")
+                    traceback.print_exc()
+        finally:
+            self._running = False
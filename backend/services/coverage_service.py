@@ -1,143 +1,211 @@
 import datetime
 import math
-from peewee import fn, SQL
-
-# 1. Importa las nuevas estrategias
-from backend.strategies.coverage_strategies import (
-    CriticalStatusStrategy,
-    PartialStatusStrategy,
-    CoveredStatusStrategy,
-    ICoverageStatusStrategy
-)
+from peewee import fn, SQL, JOIN
 
+from backend.db.connection import db
 from backend.models.event_route import EventRoute
 from backend.models.route import Route
 from backend.models.event import Event
 from backend.models.flight import Flight
 from backend.models.aircraft import Aircraft
+from backend.models.real_coverage import RealCoverage
+from backend.models.latest_coverage import LatestCoverage
+from backend.services.coverage_simulation import CoverageSimulation
+from backend.utils.pagination import encode_cursor
+
+# Máximo representable por cobertura_real.porcentaje_cobertura (DECIMAL(5, 2)).
+MAX_PORCENTAJE_PERSISTIDO = 999.99
+
+
+def _summary_metrics(counts):
+    """Porcentaje de rutas en cada estado sobre el total del conjunto."""
+    total = counts["total_items"]
+    porcentaje = lambda estado: round((counts[estado] / total) * 100, 2) if total > 0 else 0
+    return {"cubiertas": porcentaje("Cubierta"), "parciales": porcentaje("Parcial"),
+            "criticas": porcentaje("Crítica"), "total_routes": total}
 
 
 class CoverageService:
-    def __init__(self, real_coverage_repo, coverage_alert_repo):
+    # Cantidad de filas que se persisten por lote durante un recálculo.
+    RECOMPUTE_BATCH_SIZE = 500
+
+    def __init__(self, real_coverage_repo, coverage_alert_repo, coverage_engine, snapshot_engine,
+                 classifier_registry, simulation_engine, alert_broker, query_executor):
         self.real_coverage_repo = real_coverage_repo
         self.coverage_alert_repo = coverage_alert_repo
-        # 2. Define la lista de estrategias que el servicio usará
-        self.status_strategies: list[ICoverageStatusStrategy] = [
-            CriticalStatusStrategy(),
-            PartialStatusStrategy(),
-            CoveredStatusStrategy()
-        ]
+        # Motor que recalcula contra los vuelos (lo usa el recálculo periódico)
+        self.coverage_engine = coverage_engine
+        # Motor de solo lectura sobre los últimos cálculos persistidos (lo usa el panel)
+        self.snapshot_engine = snapshot_engine
+        # Ejecutor de las lecturas del panel y del detalle (pool asíncrono o peewee)
+        self.query_executor = query_executor
+        # Clasificadores compilados por evento a partir de su tabla de umbrales
+        self.classifier_registry = classifier_registry
+        # Motor vectorizado con el que se evalúan los escenarios hipotéticos
+        self.simulation_engine = simulation_engine
+        # Último estado conocido de cada ruta de evento, como (evento_id, estado);
+        # el estado es None si nunca se calculó. Lo persistido es el último cálculo
+        # de cada ruta; esto evita releerlo. Cada recálculo poda las rutas que ya no existen.
+        self._last_status = {}
+        # Publica las transiciones de estado y sus alertas (tema: id del evento)
+        self.alert_broker = alert_broker
 
-    def _determine_coverage_status(self, percentage: float) -> str:
+    def _determine_coverage_status(self, percentage: float, event_id=None) -> str:
         """
-        Este método aplica el Patrón Estrategia.
-        Itera sobre las estrategias y usa la primera que devuelva un resultado.
+        Clasifica un porcentaje con los umbrales del evento (o los por defecto).
+        Devuelve 'Indefinido' si ningún umbral aplica.
         """
-        for strategy in self.status_strategies:
-            status = strategy.get_status(percentage)
-            if status:
-                return status
-        return "Indefinido"  # Un valor por defecto si ninguna estrategia aplica
+        return self.classifier_registry.for_event(event_id).classify(percentage)
 
-    async def calculate_coverage_for_event(self, event_id, status_filter=None, page=1, limit=10):
+    def _previous_statuses(self, coverage_rows):
+        """
+        Estado anterior de cada ruta del lote. Las rutas que no están en memoria
+        se leen juntas, en una consulta, desde su último cálculo persistido.
+        """
+        missing = [er_data for er_data in coverage_rows if er_data['id'] not in self._last_status]
+        if missing:
+            latest = self.real_coverage_repo.get_latest_for_event_routes([er_data['id'] for er_data in missing])
+            for er_data in missing:
+                coverage = latest.get(er_data['id'])
+                self._last_status[er_data['id']] = (er_data['evento_id'],
+                                                    coverage.estado_cobertura if coverage else None)
+        return {er_data['id']: self._last_status[er_data['id']][1] for er_data in coverage_rows}
 
-        subquery_flights_capacity = (
-            Flight.select(
-                Flight.ruta_evento,
-                fn.SUM(Aircraft.capacidad).alias('total_capacidad_vuelos')
-            )
-            .join(Aircraft, on=(Flight.aeronave == Aircraft.id))
-            .group_by(Flight.ruta_evento)
-            .alias('flight_capacity_subquery')
-        )
+    def _prune_last_status(self, event_id, seen):
+        """
+        Olvida las rutas del alcance recalculado (un evento, o toda la red) que
+        no aparecieron en el recálculo: se borraron y no volverán a calcularse.
+        """
+        self._last_status = {
+            ruta_evento_id: estado for ruta_evento_id, estado in self._last_status.items()
+            if ruta_evento_id in seen or (event_id is not None and estado[0] != event_id)
+        }
+
+    @staticmethod
+    def _transition_alert(er_data, anterior):
+        """
+        Tipo y descripción de la alerta para un cambio de estado, o None si no
+        corresponde alertar. Solo se alerta al entrar en Parcial o Crítica y al
+        recuperarse a Cubierta; un estado que se repite no genera alerta.
+        """
+        estado = er_data['estado_cobertura']
+        if estado == anterior:
+            return None
+
+        detalle = f"({er_data['porcentaje_cobertura']:.2f}%). Demanda: {er_data['demanda_estimada']}, Capacidad: {er_data['capacidad_real']}."
+        if anterior is not None:
+            detalle += f" Estado anterior: {anterior}."
+        ruta = f"la ruta '{er_data['nombre_ruta']}' en el evento '{er_data['nombre_evento']}'"
+
+        if estado == "Crítica":
+            return "roja", f"La cobertura para {ruta} es CRÍTICA {detalle}"
+        if estado == "Parcial":
+            return "amarilla", f"La cobertura para {ruta} es PARCIAL {detalle}"
+        if estado == "Cubierta" and anterior in ("Parcial", "Crítica"):
+            return "verde", f"La cobertura para {ruta} se recuperó a CUBIERTA {detalle}"
+        return None
+
+    def _persist_snapshots(self, coverage_rows):
+        """
+        Guarda en bloque los cálculos de cobertura y las alertas de las rutas
+        que cambiaron de estado. Son dos sentencias (una por tabla) dentro de
+        una misma transacción. Las filas provienen del motor de cobertura, por
+        lo que cada ruta de evento ya existe y no hace falta volver a consultarla.
+        """
+        if not coverage_rows:
+            return
+
+        fecha_calculo = datetime.datetime.now()
+        # Se lee antes de insertar: el lote reemplaza al último cálculo de cada ruta.
+        previous = self._previous_statuses(coverage_rows)
+
+        with db.atomic():
+            coverage_ids = self.real_coverage_repo.create_many([{
+                "ruta_evento_id": er_data['id'],
+                "capacidad_real": er_data['capacidad_real'],
+                # La columna es DECIMAL(5, 2): se acota para que una ruta
+                # sobreasignada no haga fallar el lote completo.
+                "porcentaje_cobertura": min(er_data['porcentaje_cobertura'], MAX_PORCENTAJE_PERSISTIDO),
+                "estado_cobertura": er_data['estado_cobertura'],
+                "fecha_calculo": fecha_calculo
+            } for er_data in coverage_rows])
+
+            alerts = []
+            transitions = []
+            for coverage_id, er_data in zip(coverage_ids, coverage_rows):
+                if er_data['estado_cobertura'] == previous[er_data['id']]:
+                    continue
+                alert = self._transition_alert(er_data, previous[er_data['id']])
+                if alert is not None:
+                    tipo_alerta, descripcion = alert
+                    alerts.append({
+                        "cobertura_id": coverage_id,
+                        "tipo_alerta": tipo_alerta,
+                        "descripcion": descripcion,
+                        "fecha_generacion": fecha_calculo
+                    })
+                transitions.append((coverage_id, er_data, alerts[-1] if alert is not None else None))
+
+            alert_ids = self.coverage_alert_repo.create_many(alerts)
+            for alert, alert_id in zip(alerts, alert_ids):
+                alert["id"] = alert_id
+
+        # Solo tras confirmar la transacción: si falla, el estado anterior sigue vigente.
+        self._last_status.update((er_data['id'], (er_data['evento_id'], er_data['estado_cobertura']))
+                                 for er_data in coverage_rows)
+
+        for coverage_id, er_data, alert in transitions:
+            self.alert_broker.publish({
+                "tipo": "transicion_cobertura",
+                "cobertura_id": coverage_id,
+                "ruta_evento_id": er_data['id'],
+                "evento_id": er_data['evento_id'],
+                "nombre_ruta": er_data['nombre_ruta'],
+                "estado_anterior": previous[er_data['id']],
+                "estado_cobertura": er_data['estado_cobertura'],
+                "porcentaje_cobertura": er_data['porcentaje_cobertura'],
+                "fecha_calculo": fecha_calculo.isoformat(),
+                "alerta": {
+                    "id": alert["id"],
+                    "tipo_alerta": alert["tipo_alerta"],
+                    "descripcion": alert["descripcion"]
+                } if alert else None
+            }, topic=er_data['evento_id'])
+
+    def recompute_coverage(self, event_id=None):
+        """
+        Recalcula la cobertura de todas las rutas del alcance indicado (un evento,
+        o toda la red si event_id es None) y persiste los resultados por lotes.
+        Devuelve la cantidad de rutas recalculadas.
+        """
+        batch = []
+        total = 0
+        seen = set()
+        for er_data in self.coverage_engine.iter_rows(event_id):
+            batch.append(er_data)
+            seen.add(er_data['id'])
+            if len(batch) >= self.RECOMPUTE_BATCH_SIZE:
+                self._persist_snapshots(batch)
+                total += len(batch)
+                batch = []
+
+        self._persist_snapshots(batch)
+        self._prune_last_status(event_id, seen)
+        return total + len(batch)
 
-        query = EventRoute.select(
-            EventRoute.id,
-            EventRoute.demanda_estimada,
-            Route.origen,
-            Route.destino,
-            Event.nombre_evento,
-            subquery_flights_capacity.c.total_capacidad_vuelos.alias('capacidad_real_vuelos')
-        ).join(
-            Route, on=(EventRoute.ruta == Route.id)
-        ).join(
-            Event, on=(EventRoute.evento == Event.id)
-        ).left_outer_join(
-            subquery_flights_capacity, on=(EventRoute.id == subquery_flights_capacity.c.ruta_evento_id)
+    async def calculate_coverage_for_event(self, event_id, status_filter=None, page=1, limit=10, after_id=None):
+
+        # El panel es una lectura: sirve el último cálculo persistido por el
+        # recálculo periódico. Porcentaje, estado, filtro, conteos y paginación
+        # se resuelven en una sola consulta; aquí solo llegan las filas de la página.
+        # Con 'after_id' la página se busca por clave y no por desplazamiento.
+        query = self.snapshot_engine.page_query(event_id, status_filter, page, limit, after_id=after_id)
+        paged_routes, counts, has_more = self.snapshot_engine.page_result(
+            await self.query_executor.execute(query), limit
         )
 
-        if event_id is not None:
-            query = query.where(EventRoute.evento == event_id)
-
-        all_event_routes_processed = []
-
-        for er_data_row in query.dicts().iterator():
-            demanda_estimada = float(er_data_row['demanda_estimada'])
-            capacidad_real = float(er_data_row['capacidad_real_vuelos']) if er_data_row[
-                                                                                'capacidad_real_vuelos'] is not None else 0.0
-
-            if demanda_estimada > 0:
-                porcentaje_cobertura = (capacidad_real / demanda_estimada) * 100
-            else:
-                porcentaje_cobertura = 100.0
-
-            # --- 3. REEMPLAZO DEL IF/ELIF/ELSE ---
-            # En lugar del bloque de condicionales, ahora llamamos a nuestro método de estrategia.
-            estado_cobertura = self._determine_coverage_status(porcentaje_cobertura)
-
-            if status_filter is None or estado_cobertura.lower() == status_filter.lower():
-                all_event_routes_processed.append({
-                    "id": er_data_row['id'],
-                    "nombre_ruta": f"{er_data_row['origen']}-{er_data_row['destino']}",
-                    "nombre_evento": er_data_row['nombre_evento'],
-                    "demanda_estimada": demanda_estimada,
-                    "capacidad_real": capacidad_real,
-                    "porcentaje_cobertura": round(porcentaje_cobertura, 2),
-                    "estado_cobertura": estado_cobertura,
-                    "fecha_calculo": datetime.datetime.now().isoformat()
-                })
-
-        total_items_filtered_by_status = len(all_event_routes_processed)
-        cubiertas_count = sum(1 for r in all_event_routes_processed if r['estado_cobertura'] == "Cubierta")
-        parciales_count = sum(1 for r in all_event_routes_processed if r['estado_cobertura'] == "Parcial")
-        criticas_count = sum(1 for r in all_event_routes_processed if r['estado_cobertura'] == "Crítica")
-        porcentaje_cubiertas = round((cubiertas_count / total_items_filtered_by_status) * 100,
-                                     2) if total_items_filtered_by_status > 0 else 0
-        porcentaje_parciales = round((parciales_count / total_items_filtered_by_status) * 100,
-                                     2) if total_items_filtered_by_status > 0 else 0
-        porcentaje_criticas = round((criticas_count / total_items_filtered_by_status) * 100,
-                                    2) if total_items_filtered_by_status > 0 else 0
-        summary_metrics = {"cubiertas": porcentaje_cubiertas, "parciales": porcentaje_parciales,
-                           "criticas": porcentaje_criticas, "total_routes": total_items_filtered_by_status}
-        start_index = (page - 1) * limit
-        end_index = start_index + limit
-        paged_routes = all_event_routes_processed[start_index:end_index]
-
-        for er_data in paged_routes:
-            original_er = EventRoute.get_or_none(EventRoute.id == er_data['id'])
-            if original_er:
-                real_coverage = self.real_coverage_repo.create(
-                    ruta_evento_id=original_er.id,
-                    capacidad_real=er_data['capacidad_real'],
-                    porcentaje_cobertura=er_data['porcentaje_cobertura'],
-                    estado_cobertura=er_data['estado_cobertura'],
-                    fecha_calculo=datetime.datetime.now()
-                )
-
-                if er_data['estado_cobertura'] == "Crítica":
-                    self.coverage_alert_repo.create(
-                        cobertura_id=real_coverage.id,
-                        tipo_alerta="roja",
-                        descripcion=f"La cobertura para la ruta '{er_data['nombre_ruta']}' en el evento '{er_data['nombre_evento']}' es CRÍTICA ({er_data['porcentaje_cobertura']:.2f}%). Demanda: {er_data['demanda_estimada']}, Capacidad: {er_data['capacidad_real']}.",
-                        fecha_generacion=datetime.datetime.now()
-                    )
-                elif er_data['estado_cobertura'] == "Parcial":
-                    self.coverage_alert_repo.create(
-                        cobertura_id=real_coverage.id,
-                        tipo_alerta="amarilla",
-                        descripcion=f"La cobertura para la ruta '{er_data['nombre_ruta']}' en el evento '{er_data['nombre_evento']}' es PARCIAL ({er_data['porcentaje_cobertura']:.2f}%). Demanda: {er_data['demanda_estimada']}, Capacidad: {er_data['capacidad_real']}.",
-                        fecha_generacion=datetime.datetime.now()
-                    )
+        total_items_filtered_by_status = counts["total_items"]
+        summary_metrics = _summary_metrics(counts)
 
         total_pages = math.ceil(total_items_filtered_by_status / limit) if total_items_filtered_by_status > 0 else 1
 
@@ -145,66 +213,146 @@ class CoverageService:
             "dashboard_data": paged_routes,
             "summary_metrics": summary_metrics,
             "total_pages": total_pages,
-            "total_items": total_items_filtered_by_status
+            "total_items": total_items_filtered_by_status,
+            "next_cursor": encode_cursor(paged_routes[-1]["id"]) if has_more else None
         }
 
-    async def get_route_detail(self, ruta_evento_id):
+    def simulate_coverage(self, event_id, escenarios):
+        """
+        Evalúa escenarios hipotéticos (vuelos agregados o quitados, cambios de
+        demanda) sobre el estado actual del evento, cargado una sola vez.
+        No escribe en la base de datos. Lanza ValueError si un cambio no es válido.
+        """
+        simulation = CoverageSimulation.load(self.simulation_engine, event_id)
+        actual = dict(simulation.counts, total_items=len(simulation.rows))
+
+        resultados = []
+        for cambios in escenarios:
+            counts, afectadas = simulation.evaluate(cambios)
+            resultados.append({
+                "summary_metrics": _summary_metrics(counts),
+                "rutas_afectadas": afectadas
+            })
+
+        return {
+            "summary_metrics_actual": _summary_metrics(actual),
+            "escenarios": resultados
+        }
+
+    def export_coverage(self, event_id=None, status_filter=None):
+        """
+        Iterador con todas las filas del panel (último cálculo persistido),
+        leídas por lotes desde un cursor del lado del servidor.
+        """
+        return self.snapshot_engine.stream_rows(event_id, status_filter)
+
+    # Nombres de los días indexados como EXTRACT('dow'): 0 es domingo.
+    DAY_NAMES = {0: "Domingo", 1: "Lunes", 2: "Martes", 3: "Miércoles", 4: "Jueves", 5: "Viernes", 6: "Sábado"}
+
+    def _route_detail_query(self, ruta_evento_id):
+        """
+        Una sola consulta con la cabecera de la ruta, su último cálculo de
+        cobertura y una fila por cada día calendario del evento con la
+        capacidad ofrecida ese día.
+        """
+        cabecera = (
+            EventRoute.select(
+                EventRoute.id,
+                EventRoute.demanda_estimada,
+                Route.origen,
+                Route.destino,
+                Event.nombre_evento,
+                Event.fecha_inicio,
+                Event.fecha_fin
+            )
+            .join(Route, on=(EventRoute.ruta == Route.id))
+            .switch(EventRoute)
+            .join(Event, on=(EventRoute.evento == Event.id))
+            .where(EventRoute.id == ruta_evento_id)
+            .cte('cabecera')
+        )
+
+        ultima = (
+            RealCoverage.select(
+                RealCoverage.capacidad_real,
+                RealCoverage.porcentaje_cobertura,
+                RealCoverage.estado_cobertura
+            )
+            .join(LatestCoverage, on=(LatestCoverage.cobertura == RealCoverage.id))
+            .where(LatestCoverage.ruta_evento == ruta_evento_id)
+            .cte('ultima_cobertura')
+        )
+
+        # Un día por fila entre el inicio y el fin del evento, ambos incluidos.
+        dias = cabecera.select_from(
+            fn.generate_series(cabecera.c.fecha_inicio, cabecera.c.fecha_fin, SQL("interval '1 day'"))
+            .cast('date').alias('dia')
+        ).cte('dias')
+
+        capacidad_diaria = (
+            Flight.select(
+                Flight.fecha_salida.cast('date').alias('dia'),
+                fn.SUM(Aircraft.capacidad).alias('capacidad')
+            )
+            .join(Aircraft)
+            .where(Flight.ruta_evento == ruta_evento_id)
+            .group_by(Flight.fecha_salida.cast('date'))
+            .cte('capacidad_diaria')
+        )
+
+        return (
+            cabecera.select_from(
+                cabecera.c.id, cabecera.c.demanda_estimada, cabecera.c.origen, cabecera.c.destino,
+                cabecera.c.nombre_evento, cabecera.c.fecha_inicio, cabecera.c.fecha_fin,
+                ultima.c.capacidad_real, ultima.c.porcentaje_cobertura, ultima.c.estado_cobertura,
+                dias.c.dia,
+                fn.COALESCE(capacidad_diaria.c.capacidad, 0).alias('capacidad_dia')
+            )
+            .join(ultima, JOIN.LEFT_OUTER, on=SQL('TRUE'))
+            .join(dias, JOIN.LEFT_OUTER, on=SQL('TRUE'))
+            .join(capacidad_diaria, JOIN.LEFT_OUTER, on=(capacidad_diaria.c.dia == dias.c.dia))
+            .order_by(dias.c.dia)
+            .with_cte(cabecera, ultima, dias, capacidad_diaria)
+            .dicts()
+        )
 
-        event_route = (EventRoute.select(EventRoute, Route, Event)
-                       .join(Route, on=(EventRoute.ruta == Route.id))
-                       .switch(EventRoute)  # Volvemos a EventRoute
-                       .join(Event, on=(EventRoute.evento == Event.id))
-                       .where(EventRoute.id == ruta_evento_id)
-                       .get_or_none())
+    async def get_route_detail(self, ruta_evento_id):
 
-        if not event_route:
+        rows = await self.query_executor.execute(self._route_detail_query(ruta_evento_id))
+        if not rows:
             return None
 
-        demanda_estimada = float(event_route.demanda_estimada)
-
-        latest_coverage = self.real_coverage_repo.get_latest_for_event_route(ruta_evento_id)
-
-        capacidad_real_total = float(latest_coverage.capacidad_real) if latest_coverage else 0.0
-        porcentaje_cobertura_total = float(latest_coverage.porcentaje_cobertura) if latest_coverage else 0.0
-        estado_cobertura_total = latest_coverage.estado_cobertura if latest_coverage else "Sin Datos"
-
-        fecha_inicio_evento = event_route.evento.fecha_inicio
-        fecha_fin_evento = event_route.evento.fecha_fin
-
-        if isinstance(fecha_inicio_evento, datetime.date) and not isinstance(fecha_inicio_evento, datetime.datetime):
-            fecha_inicio_evento = datetime.datetime.combine(fecha_inicio_evento, datetime.time.min)
-        if isinstance(fecha_fin_evento, datetime.date) and not isinstance(fecha_fin_evento, datetime.datetime):
-            fecha_fin_evento = datetime.datetime.combine(fecha_fin_evento, datetime.time.max)
-
-        flights_weekly_capacity_query = Flight.select(
-            SQL("EXTRACT('dow' FROM fecha_salida) AS day_of_week_num"),
-            fn.SUM(Aircraft.capacidad).alias('total_capacity_for_day')
-        ).join(Aircraft).where(
-            (Flight.ruta_evento == event_route.id) &
-            (Flight.fecha_salida >= fecha_inicio_evento) &
-            (Flight.fecha_salida <= fecha_fin_evento)
-        ).group_by(SQL("EXTRACT('dow' FROM fecha_salida)")).dicts()
-
-        weekly_capacities_map = {int(entry['day_of_week_num']): float(entry['total_capacity_for_day']) for entry in
-                                 flights_weekly_capacity_query}
-        day_names_map = {0: "Domingo", 1: "Lunes", 2: "Martes", 3: "Miércoles", 4: "Jueves", 5: "Viernes", 6: "Sábado"}
-        weekly_coverage_data = []
-        for dow_num in range(7):
-            day_name = day_names_map[dow_num]
-            capacidad_ofrecida_semana_dia = weekly_capacities_map.get(dow_num, 0)
-            percentage = (capacidad_ofrecida_semana_dia / demanda_estimada) * 100 if demanda_estimada > 0 else 0.0
-            weekly_coverage_data.append({"day": day_name, "coverage": round(percentage, 2)})
+        header = rows[0]
+        demanda_estimada = float(header['demanda_estimada'])
+
+        tiene_cobertura = header['estado_cobertura'] is not None
+        capacidad_real_total = float(header['capacidad_real']) if tiene_cobertura else 0.0
+        porcentaje_cobertura_total = float(header['porcentaje_cobertura']) if tiene_cobertura else 0.0
+        estado_cobertura_total = header['estado_cobertura'] if tiene_cobertura else "Sin Datos"
+
+        # Serie por día calendario: los días sin vuelos aparecen con cobertura 0.
+        daily_coverage_data = []
+        for row in rows:
+            if row['dia'] is None:
+                continue
+            capacidad_dia = float(row['capacidad_dia'])
+            percentage = (capacidad_dia / demanda_estimada) * 100 if demanda_estimada > 0 else 0.0
+            daily_coverage_data.append({
+                "date": row['dia'].isoformat(),
+                "day": self.DAY_NAMES[row['dia'].isoweekday() % 7],
+                "capacity": capacidad_dia,
+                "coverage": round(percentage, 2)
+            })
 
         return {
-            "id": event_route.id,
-            "route_name": f"{event_route.ruta.origen} - {event_route.ruta.destino}",
+            "id": header['id'],
+            "route_name": f"{header['origen']} - {header['destino']}",
             "status": estado_cobertura_total,
-            "event_name": event_route.evento.nombre_evento,
-            "event_start_date": event_route.evento.fecha_inicio.isoformat(),
-            "event_end_date": event_route.evento.fecha_fin.isoformat(),
+            "event_name": header['nombre_evento'],
+            "event_start_date": header['fecha_inicio'].isoformat(),
+            "event_end_date": header['fecha_fin'].isoformat(),
             "demanda_estimada": demanda_estimada,
             "capacidad_ofrecida": capacidad_real_total,
             "porcentaje_cobertura": porcentaje_cobertura_total,
-            "daily_coverage": weekly_coverage_data
+            "daily_coverage": daily_coverage_data
         }
-
@@ -0,0 +1,143 @@
+import numpy as np
+
+from backend.models.aircraft import Aircraft
+from backend.models.event_route import EventRoute
+from backend.models.flight import Flight
+
+
+class CoverageSimulation:
+    """
+    Estado de demanda y capacidad de un evento cargado una sola vez en memoria,
+    sobre el que se evalúan escenarios hipotéticos ("¿y si...?").
+    Cada escenario se aplica como deltas: solo se reclasifican las rutas que
+    toca y el resumen se ajusta restando sus estados anteriores y sumando los
+    nuevos. Nunca se escribe en la base de datos.
+
+    Cambios admitidos en un escenario:
+        {"tipo": "agregar_vuelo", "ruta_evento_id": 5, "aeronave_id": 2, "fechas": ["2026-01-03", ...]}
+        {"tipo": "quitar_vuelo", "vuelo_id": 17}
+        {"tipo": "cambiar_demanda", "ruta_evento_id": 5, "factor": 1.2}
+        {"tipo": "cambiar_demanda", "ruta_evento_id": 5, "demanda_estimada": 450}
+    """
+
+    def __init__(self, engine, rows, demanda, capacidad, eventos, aircraft_capacity, flights):
+        self.engine = engine
+        self.rows = rows
+        self.demanda = demanda
+        self.capacidad = capacidad
+        self.eventos = eventos
+        # aeronave_id -> capacidad
+        self.aircraft_capacity = aircraft_capacity
+        # vuelo_id -> (ruta_evento_id, capacidad de su aeronave)
+        self.flights = flights
+        # ruta_evento_id -> posición en los arreglos
+        self.index = {row[0]: i for i, row in enumerate(rows)}
+
+        self.porcentajes, self.codigos = engine.compute(demanda, capacidad, eventos)
+        self.counts = engine.summarize(self.codigos)
+
+    @classmethod
+    def load(cls, engine, event_id):
+        """Carga el estado actual del evento (o de toda la red si event_id es None)."""
+        rows, demanda, capacidad, eventos = engine.load_state(event_id)
+
+        aircraft_capacity = dict(Aircraft.select(Aircraft.id, Aircraft.capacidad).tuples())
+
+        flights_query = (
+            Flight.select(Flight.id, Flight.ruta_evento, Aircraft.capacidad)
+            .join(Aircraft)
+            .switch(Flight)
+            .join(EventRoute)
+        )
+        if event_id is not None:
+            flights_query = flights_query.where(EventRoute.evento == event_id)
+        flights = {vuelo_id: (ruta_evento_id, capacidad_vuelo)
+                   for vuelo_id, ruta_evento_id, capacidad_vuelo in flights_query.tuples()}
+
+        return cls(engine, rows, demanda, capacidad, eventos, aircraft_capacity, flights)
+
+    def _position(self, ruta_evento_id):
+        try:
+            return self.index[int(ruta_evento_id)]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"La ruta de evento {ruta_evento_id} no pertenece al alcance simulado.")
+
+    def _apply(self, cambios):
+        """Devuelve la demanda y capacidad resultantes de las rutas que cambian."""
+        demanda = {}
+        capacidad = {}
+        quitados = set()
+
+        for cambio in cambios:
+            tipo = cambio.get("tipo")
+
+            if tipo == "agregar_vuelo":
+                pos = self._position(cambio.get("ruta_evento_id"))
+                aeronave_id = cambio.get("aeronave_id")
+                if aeronave_id not in self.aircraft_capacity:
+                    raise ValueError(f"La aeronave {aeronave_id} no existe.")
+                # Un vuelo por cada fecha indicada; sin fechas, un único vuelo.
+                vuelos = len(cambio.get("fechas") or [None])
+                capacidad[pos] = capacidad.get(pos, self.capacidad[pos]) + self.aircraft_capacity[aeronave_id] * vuelos
+
+            elif tipo == "quitar_vuelo":
+                vuelo_id = cambio.get("vuelo_id")
+                if vuelo_id not in self.flights or vuelo_id in quitados:
+                    raise ValueError(f"El vuelo {vuelo_id} no existe en el alcance simulado.")
+                quitados.add(vuelo_id)
+                ruta_evento_id, capacidad_vuelo = self.flights[vuelo_id]
+                pos = self._position(ruta_evento_id)
+                capacidad[pos] = capacidad.get(pos, self.capacidad[pos]) - capacidad_vuelo
+
+            elif tipo == "cambiar_demanda":
+                pos = self._position(cambio.get("ruta_evento_id"))
+                actual = demanda.get(pos, self.demanda[pos])
+                if "demanda_estimada" in cambio:
+                    nueva = float(cambio["demanda_estimada"])
+                elif "factor" in cambio:
+                    nueva = actual * float(cambio["factor"])
+                else:
+                    raise ValueError("'cambiar_demanda' requiere 'factor' o 'demanda_estimada'.")
+                if nueva < 0:
+                    raise ValueError("La demanda estimada no puede ser negativa.")
+                demanda[pos] = nueva
+
+            else:
+                raise ValueError(f"Tipo de cambio no soportado: {tipo}.")
+
+        return demanda, capacidad
+
+    def evaluate(self, cambios):
+        """
+        Evalúa un escenario y devuelve los conteos por estado resultantes y
+        el detalle de las rutas afectadas.
+        """
+        demanda, capacidad = self._apply(cambios)
+        posiciones = np.array(sorted(set(demanda) | set(capacidad)), dtype=np.intp)
+
+        counts = dict(self.counts)
+        afectadas = []
+        if len(posiciones):
+            nueva_demanda = np.array([demanda.get(p, self.demanda[p]) for p in posiciones])
+            nueva_capacidad = np.array([capacidad.get(p, self.capacidad[p]) for p in posiciones])
+            porcentajes, codigos = self.engine.compute(nueva_demanda, nueva_capacidad, self.eventos[posiciones])
+
+            etiquetas = self.engine.ETIQUETAS
+            for pos, porcentaje, codigo, dem, cap in zip(posiciones, porcentajes, codigos,
+                                                         nueva_demanda, nueva_capacidad):
+                counts[etiquetas[self.codigos[pos]]] -= 1
+                counts[etiquetas[codigo]] += 1
+                row = self.rows[pos]
+                afectadas.append({
+                    "id": row[0],
+                    "nombre_ruta": f"{row[2]}-{row[3]}",
+                    "demanda_estimada": float(dem),
+                    "capacidad_real": float(cap),
+                    "porcentaje_actual": round(float(self.porcentajes[pos]), 2),
+                    "porcentaje_simulado": round(float(porcentaje), 2),
+                    "estado_actual": etiquetas[self.codigos[pos]],
+                    "estado_simulado": etiquetas[codigo],
+                })
+
+        counts["total_items"] = len(self.rows)
+        return counts, afectadas
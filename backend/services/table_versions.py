@@ -0,0 +1,83 @@
+import threading
+import traceback
+import tornado.ioloop
+
+from backend.db.connection import db
+
+
+class TableVersionRegistry:
+    """
+    Versión de cada tabla, con la que los handlers construyen las ETag.
+    Los repositorios llaman a bump() después de cada escritura: la versión se
+    incrementa en version_tabla (compartida entre procesos) y en memoria.
+    etag() solo lee la memoria, sin consultar la base de datos; los cambios
+    hechos por otros procesos se recogen cada 'interval_seconds', con la
+    consulta en el pool de hilos de las llamadas bloqueantes.
+    """
+
+    def __init__(self, repository, blocking_executor, interval_seconds):
+        self.repository = repository
+        self.blocking_executor = blocking_executor
+        self.interval_seconds = interval_seconds
+        self._versions = {}
+        self._lock = threading.Lock()
+        self._callback = None
+        self.bumps = 0
+        self.refreshes = 0
+
+    def bump(self, *models):
+        """Registra un cambio en las tablas de 'models'. Se llama con los datos ya confirmados."""
+        versions = self.repository.increment([model._meta.table_name for model in models])
+        self._merge(versions)
+        with self._lock:
+            self.bumps += 1
+
+    def _merge(self, versions):
+        # Las versiones solo avanzan: una lectura antigua no retrocede la memoria.
+        with self._lock:
+            for tabla, version in versions.items():
+                if version > self._versions.get(tabla, 0):
+                    self._versions[tabla] = version
+
+    def etag(self, *models):
+        """ETag (entre comillas) con la versión actual de cada tabla de 'models'."""
+        with self._lock:
+            partes = [f"{model._meta.table_name}.{self._versions.get(model._meta.table_name, 0)}"
+                      for model in models]
+        return '"' + "-".join(partes) + '"'
+
+    def refresh(self):
+        """Carga las versiones guardadas en la base de datos (cambios de otros procesos)."""
+        self._merge(self.repository.get_all())
+        with self._lock:
+            self.refreshes += 1
+
+    def start(self):
+        if self._callback is not None:
+            return
+        # La primera carga es inmediata para no servir ETag de versiones viejas.
+        with db.connection_context():
+            self.refresh()
+        self._callback = tornado.ioloop.PeriodicCallback(self.run_once, self.interval_seconds * 1000)
+        self._callback.start()
+
+    def stop(self):
+        if self._callback is not None:
+            self._callback.stop()
+            self._callback = None
+
+    async def run_once(self):
+        try:
+            await self.blocking_executor.run(self.refresh)
+        except Exception as e:
+            print(f"\n!!!! ERROR AL ACTUALIZAR LAS VERSIONES DE TABLAS: {e} !!!!")
+            traceback.print_exc()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "versions": dict(self._versions),
+                "bumps": self.bumps,
+                "refreshes": self.refreshes,
+                "refresh_interval": self.interval_seconds,
+            }
@@ -1,4 +1,49 @@
 from abc import ABC, abstractmethod
+from bisect import bisect_right
+
+# Umbrales (en porcentaje de cobertura) por defecto, compartidos por el
+# clasificador, las estrategias y el motor SQL de cobertura.
+UMBRAL_PARCIAL = 70
+UMBRAL_CUBIERTA = 100
+
+ESTADO_INDEFINIDO = "Indefinido"
+
+
+def build_threshold_table(umbral_parcial=UMBRAL_PARCIAL, umbral_cubierta=UMBRAL_CUBIERTA):
+    """
+    Tabla ordenada de umbrales: cada entrada (límite_inferior, estado) aplica
+    desde su límite hasta el límite de la entrada siguiente.
+    """
+    return (
+        (0, "Crítica"),
+        (umbral_parcial, "Parcial"),
+        (umbral_cubierta, "Cubierta"),
+    )
+
+
+class ThresholdCoverageClassifier:
+    """
+    Clasificador compilado una sola vez a partir de una tabla de umbrales.
+    Cada valor se resuelve con una búsqueda binaria (O(log k)) en lugar de
+    recorrer una cadena de estrategias. Por debajo del primer límite el
+    estado es 'Indefinido', igual que con las estrategias.
+    """
+
+    def __init__(self, thresholds):
+        ordered = sorted(thresholds, key=lambda entry: entry[0])
+        self.limits = tuple(float(limit) for limit, _ in ordered)
+        self.labels = (ESTADO_INDEFINIDO,) + tuple(status for _, status in ordered)
+
+    def classify(self, percentage: float) -> str:
+        return self.labels[bisect_right(self.limits, percentage)]
+
+    def classify_many(self, percentages) -> list[str]:
+        limits, labels = self.limits, self.labels
+        return [labels[bisect_right(limits, percentage)] for percentage in percentages]
+
+
+DEFAULT_CLASSIFIER = ThresholdCoverageClassifier(build_threshold_table())
+
 
 class ICoverageStatusStrategy(ABC):
     """
@@ -16,31 +61,37 @@ class ICoverageStatusStrategy(ABC):
         pass
 
 # --- Estrategias Concretas ---
-# Cada clase implementa una variación del algoritmo.
+# Se mantienen como adaptadores sobre el clasificador por umbrales:
+# cada una responde solo por su estado.
 
-class CriticalStatusStrategy(ICoverageStatusStrategy):
+class ThresholdStatusStrategy(ICoverageStatusStrategy):
     """
-    Estrategia para determinar el estado 'Crítica'.
+    Adaptador que expone un estado del clasificador como estrategia.
     """
+    STATUS = None
+
+    def __init__(self, classifier: ThresholdCoverageClassifier = DEFAULT_CLASSIFIER):
+        self.classifier = classifier
+
     def get_status(self, percentage: float) -> str | None:
-        if 0 <= percentage < 70:
-            return "Crítica"
+        if self.classifier.classify(percentage) == self.STATUS:
+            return self.STATUS
         return None
 
-class PartialStatusStrategy(ICoverageStatusStrategy):
+class CriticalStatusStrategy(ThresholdStatusStrategy):
+    """
+    Estrategia para determinar el estado 'Crítica'.
+    """
+    STATUS = "Crítica"
+
+class PartialStatusStrategy(ThresholdStatusStrategy):
     """
     Estrategia para determinar el estado 'Parcial'.
     """
-    def get_status(self, percentage: float) -> str | None:
-        if 70 <= percentage < 100:
-            return "Parcial"
-        return None
+    STATUS = "Parcial"
 
-class CoveredStatusStrategy(ICoverageStatusStrategy):
+class CoveredStatusStrategy(ThresholdStatusStrategy):
     """
     Estrategia para determinar el estado 'Cubierta'.
     """
-    def get_status(self, percentage: float) -> str | None:
-        if percentage >= 100:
-            return "Cubierta"
-        return None
\ No newline at end of file
+    STATUS = "Cubierta"
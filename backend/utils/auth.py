@@ -4,6 +4,15 @@ from backend.utils.config import Config
 from backend.utils.permissions import ROLES_PERMISOS
 
 
+def decode_auth_token(token):
+    """Valida un JWT emitido por el login y devuelve su contenido."""
+    return jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+
+
+def has_permission(user, permission_name):
+    return permission_name in ROLES_PERMISOS.get(user.get("role"), [])
+
+
 def authenticated_user(method):
     """
     Decorador para métodos de RequestHandler que verifica la autenticación JWT.
@@ -21,7 +30,7 @@ def authenticated_user(method):
             if token_type != "Bearer":
                 raise ValueError("Tipo de token inválido.")
 
-            decoded_token = jwt.decode(token, Config.SECRET_KEY, algorithms=["HS256"])
+            decoded_token = decode_auth_token(token)
 
             self.current_user = decoded_token
 
@@ -52,11 +61,7 @@ def require_permission(permission_name):
                 self.write({"message": "No autorizado: Usuario no autenticado."})
                 return
 
-            role = user.get("role")
-
-            allowed_permissions = ROLES_PERMISOS.get(role, [])
-
-            if permission_name not in allowed_permissions:
+            if not has_permission(user, permission_name):
                 self.set_status(403)
                 self.write({"message": f"Acceso denegado: Se requiere permiso '{permission_name}'."})
                 return
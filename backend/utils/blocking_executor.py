@@ -0,0 +1,168 @@
+import asyncio
+import contextlib
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tornado.ioloop
+
+from backend.db.connection import ConnectionPoolTimeout
+
+
+class BlockingExecutor:
+    """
+    Pool acotado de hilos para las llamadas bloqueantes (peewee) que hacen los
+    handlers asíncronos. Una consulta lenta ocupa un hilo en lugar de detener
+    el IOLoop. Con run_on() la llamada usa la conexión que la petición tomó
+    del pool; con run() toma una solo para esa llamada, y con compute() no
+    toma ninguna (trabajo de CPU, como verificar un hash). Lleva la cola
+    pendiente y el tiempo de espera hasta que un hilo queda libre.
+
+    La espera por una conexión libre ocurre en el IOLoop (un semáforo del
+    tamaño del pool), nunca en un hilo: si esperara en el pool de hilos, con
+    todas las conexiones ocupadas los hilos quedarían esperando y las
+    peticiones que las tienen no podrían ejecutar la llamada que las libera.
+    Los listados por streaming retienen su conexión mientras el cliente los
+    consume (el cursor del servidor vive en ella); stream_slot() limita cuántos
+    corren a la vez para que no agoten el pool.
+    """
+
+    def __init__(self, max_workers, database=None, max_streams=None):
+        self.max_workers = max_workers
+        self.database = database
+        self.max_streams = max_streams
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="peewee")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._active = 0
+        self.completed = 0
+        self.failed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        # Conexiones del pool de peewee que todavía pueden tomarse.
+        self._connections = asyncio.Semaphore(database.max_connections) if database is not None else None
+        self._connection_waiters = 0
+        self._streams = asyncio.Semaphore(max_streams) if max_streams else None
+        self._active_streams = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """Ejecuta fn(*args, **kwargs) en el pool y espera su resultado sin bloquear el IOLoop."""
+        if self._connections is None:
+            return await self._submit(None, fn, args, kwargs)
+        await self._reserve_connection()
+        try:
+            return await self._submit(None, fn, args, kwargs)
+        finally:
+            self._connections.release()
+
+    async def run_on(self, connection, fn, *args, **kwargs):
+        """Como run(), pero sobre una conexión ya tomada con checkout()."""
+        return await self._submit(connection, fn, args, kwargs)
+
+    async def compute(self, fn, *args, **kwargs):
+        """Como run(), pero sin conexión a la base de datos: para cálculos que no la usan."""
+        return await self._submit(None, fn, args, kwargs, use_database=False)
+
+    async def checkout(self):
+        """
+        Toma una conexión del pool de la base de datos para una petición. Se
+        espera en el IOLoop hasta que haya una libre; luego se abre o se
+        entrega en un hilo. Se devuelve con checkin().
+        """
+        await self._reserve_connection()
+        try:
+            return await tornado.ioloop.IOLoop.current().run_in_executor(self._executor, self.database.checkout)
+        except BaseException:
+            self._connections.release()
+            raise
+
+    def checkin(self, connection):
+        """Devuelve al pool una conexión obtenida con checkout(). Se llama desde el IOLoop."""
+        try:
+            self.database.checkin(connection)
+        finally:
+            self._connections.release()
+
+    @contextlib.asynccontextmanager
+    async def stream_slot(self):
+        """Turno para un listado por streaming; se espera en el IOLoop (hasta el timeout del pool)."""
+        if self._streams is None:
+            yield
+            return
+        try:
+            await asyncio.wait_for(self._streams.acquire(), self.database.wait_timeout if self.database else None)
+        except asyncio.TimeoutError:
+            raise ConnectionPoolTimeout("Se alcanzó el máximo de listados por streaming simultáneos.") from None
+        with self._lock:
+            self._active_streams += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active_streams -= 1
+            self._streams.release()
+
+    async def _reserve_connection(self):
+        """Espera, sin ocupar un hilo, a que haya una conexión libre (hasta el timeout del pool)."""
+        with self._lock:
+            self._connection_waiters += 1
+        try:
+            await asyncio.wait_for(self._connections.acquire(), self.database.wait_timeout)
+        except asyncio.TimeoutError:
+            raise ConnectionPoolTimeout("No hay conexiones libres en el pool de la base de datos.") from None
+        finally:
+            with self._lock:
+                self._connection_waiters -= 1
+
+    async def _submit(self, connection, fn, args, kwargs, use_database=True):
+        with self._lock:
+            self._queued += 1
+        call = functools.partial(self._call, time.monotonic(), connection, fn, args, kwargs, use_database)
+        return await tornado.ioloop.IOLoop.current().run_in_executor(self._executor, call)
+
+    def _call(self, submitted_at, connection, fn, args, kwargs, use_database):
+        wait = time.monotonic() - submitted_at
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+            self._wait_total += wait
+            self._wait_max = max(self._wait_max, wait)
+        ok = False
+        try:
+            if self.database is None or not use_database:
+                result = fn(*args, **kwargs)
+            elif connection is not None:
+                with self.database.bound_connection(connection):
+                    result = fn(*args, **kwargs)
+            else:
+                with self.database.connection_context():
+                    result = fn(*args, **kwargs)
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self._active -= 1
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def stats(self):
+        with self._lock:
+            started = self.completed + self.failed + self._active
+            return {
+                "max_workers": self.max_workers,
+                "queued": self._queued,
+                "active": self._active,
+                "connection_waiters": self._connection_waiters,
+                "streams": self._active_streams,
+                "max_streams": self.max_streams,
+                "completed": self.completed,
+                "failed": self.failed,
+                "wait_ms_avg": round(self._wait_total / started * 1000, 3) if started else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
@@ -3,4 +3,51 @@ import os
 
 class Config:
     SECRET_KEY = os.environ["SECRET_KEY"]
-    SECRET_KEY = os.getenv("SECRET_KEY", "AdminCoreSecretKey")
\ No newline at end of file
+    SECRET_KEY = os.getenv("SECRET_KEY", "AdminCoreSecretKey")
+
+    # Recálculo periódico de la cobertura (en segundos).
+    COVERAGE_RECOMPUTE_INTERVAL = int(os.getenv("COVERAGE_RECOMPUTE_INTERVAL", "300"))
+    # Motor usado por el recálculo periódico: "sql" o "numpy".
+    COVERAGE_ENGINE = os.getenv("COVERAGE_ENGINE", "sql")
+    # Eventos a recalcular, separados por comas. Vacío = toda la red.
+    COVERAGE_RECOMPUTE_EVENTS = [
+        int(event_id) for event_id in os.getenv("COVERAGE_RECOMPUTE_EVENTS", "").split(",") if event_id.strip()
+    ]
+
+    # Caché de resultados del panel y del detalle de ruta.
+    COVERAGE_CACHE_SIZE = int(os.getenv("COVERAGE_CACHE_SIZE", "256"))
+    COVERAGE_CACHE_TTL = int(os.getenv("COVERAGE_CACHE_TTL", "60"))
+
+    # Retención de cobertura_real: días con detalle completo y cada cuánto se compacta (en segundos).
+    COVERAGE_RETENTION_DAYS = int(os.getenv("COVERAGE_RETENTION_DAYS", "7"))
+    COVERAGE_COMPACTION_INTERVAL = int(os.getenv("COVERAGE_COMPACTION_INTERVAL", "3600"))
+
+    # Mensajes pendientes por cliente del canal de alertas; al llenarse se descartan los más antiguos.
+    ALERT_STREAM_QUEUE_SIZE = int(os.getenv("ALERT_STREAM_QUEUE_SIZE", "100"))
+
+    # Lecturas asíncronas (panel, vuelos, manifiesto y login) sobre un pool de asyncpg.
+    # Con ASYNC_DB_ENABLED=false se ejecutan con la conexión de peewee.
+    ASYNC_DB_ENABLED = os.getenv("ASYNC_DB_ENABLED", "true").lower() in ("1", "true", "yes")
+    ASYNC_DB_POOL_MIN = int(os.getenv("ASYNC_DB_POOL_MIN", "1"))
+    ASYNC_DB_POOL_MAX = int(os.getenv("ASYNC_DB_POOL_MAX", "10"))
+
+    # Hilos para las llamadas bloqueantes de los handlers y conexiones máximas del pool de peewee.
+    BLOCKING_EXECUTOR_WORKERS = int(os.getenv("BLOCKING_EXECUTOR_WORKERS", "8"))
+    DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+    # Listados por streaming simultáneos: cada uno retiene una conexión del pool
+    # mientras el cliente lo consume, así que debe ser menor que DB_MAX_CONNECTIONS.
+    STREAM_MAX_CONCURRENT = int(os.getenv("STREAM_MAX_CONCURRENT", "4"))
+    # Pool de peewee: antigüedad máxima de una conexión, espera máxima por una
+    # conexión libre y tiempo libre tras el cual se verifica con SELECT 1 (en segundos).
+    DB_STALE_TIMEOUT = int(os.getenv("DB_STALE_TIMEOUT", "300"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "10"))
+    DB_HEALTH_CHECK_INTERVAL = int(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+
+    # Cada cuánto se leen de la base de datos las versiones de tabla incrementadas
+    # por otros procesos (en segundos). Es el máximo que una ETag puede quedar atrasada.
+    TABLE_VERSION_REFRESH_INTERVAL = int(os.getenv("TABLE_VERSION_REFRESH_INTERVAL", "5"))
+
+    # Caché de respuestas GET (comprimidas con gzip): bytes máximos y vida de cada entrada (en segundos).
+    # El TTL acota lo que una respuesta puede quedar atrasada frente a escrituras de otros procesos.
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024)))
+    RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "30"))
@@ -7,11 +7,18 @@ from backend.models.event_route import EventRoute
 from backend.models.flight import Flight
 from backend.models.real_coverage import RealCoverage
 from backend.models.coverage_alert import CoverageAlert
+from backend.models.event_route_capacity import EventRouteCapacity
+from backend.models.event_coverage_threshold import EventCoverageThreshold
+from backend.models.latest_coverage import LatestCoverage
+from backend.models.coverage_daily_rollup import CoverageDailyRollup
+from backend.models.table_version import TableVersion
+from backend.repositories.event_route_capacity_repository import EventRouteCapacityRepository
+from backend.repositories.real_coverage_repository import RealCoverageRepository
 
 
 def initialize_tables():
     """
-    Inicializa la conexión a la base de datos y crea las tablas si no existen.
+    Crea las tablas si no existen, con una conexión que se devuelve al pool al terminar.
     Asegura el orden correcto de creación para respetar las claves foráneas.
     """
     if db.is_closed():
@@ -19,6 +26,11 @@ def initialize_tables():
 
     print("Verificando/creando tablas de la base de datos...")
 
+    # Si el agregado de capacidad es nuevo, se carga a partir de los vuelos existentes.
+    capacity_table_existed = EventRouteCapacity.table_exists()
+    # Igual con los punteros al último cálculo de cobertura.
+    latest_table_existed = LatestCoverage.table_exists()
+
     db.create_tables([
         User,
         Aircraft,
@@ -27,6 +39,18 @@ def initialize_tables():
         EventRoute,
         Flight,
         RealCoverage,
-        CoverageAlert
+        CoverageAlert,
+        EventRouteCapacity,
+        EventCoverageThreshold,
+        LatestCoverage,
+        CoverageDailyRollup,
+        TableVersion
     ], safe=True)
+
+    if not capacity_table_existed:
+        EventRouteCapacityRepository().rebuild()
+    if not latest_table_existed:
+        RealCoverageRepository().rebuild_latest()
+    # La conexión vuelve al pool; cada petición toma la suya.
+    db.close()
     print("Tablas de la base de datos verificadas/creadas exitosamente.")
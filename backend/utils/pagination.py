@@ -0,0 +1,65 @@
+import base64
+import inspect
+import json
+
+# Tamaño de página por defecto y máximo para los listados.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(last_id):
+    """Cursor opaco a partir del último id devuelto."""
+    raw = json.dumps({"id": last_id}).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Devuelve el último id del cursor, o None si no se envió cursor."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("El cursor de paginación no es válido.")
+
+
+def parse_limit(raw_limit, default=DEFAULT_PAGE_SIZE):
+    if raw_limit is None:
+        return default
+    try:
+        limit = int(raw_limit)
+    except ValueError:
+        raise ValueError("El parámetro 'limit' debe ser un número entero.")
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise ValueError(f"El parámetro 'limit' debe estar entre 1 y {MAX_PAGE_SIZE}.")
+    return limit
+
+
+def apply_keyset(query, id_field, after_id=None, limit=None):
+    """
+    Pagina por clave (WHERE id > último_id ORDER BY id LIMIT n): una página
+    profunda cuesta lo mismo que la primera.
+    """
+    query = query.order_by(id_field)
+    if after_id is not None:
+        query = query.where(id_field > after_id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+async def paginate(fetch, after_id, limit):
+    """
+    Pide una fila de más para saber si hay otra página.
+    Devuelve los elementos de la página y el cursor siguiente (o None).
+    Acepta tanto lecturas síncronas como corrutinas.
+    """
+    items = fetch(after_id=after_id, limit=limit + 1)
+    if inspect.isawaitable(items):
+        items = await items
+    items = list(items)
+    if len(items) > limit:
+        items = items[:limit]
+        return items, encode_cursor(items[-1].id)
+    return items, None
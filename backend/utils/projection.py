@@ -0,0 +1,100 @@
+from peewee import ForeignKeyField, JOIN
+
+
+class Projection:
+    """
+    Parte de un modelo pedida en un listado con '?fields=' y '?expand=':
+    las columnas propias (None = todas) y las relaciones (claves foráneas)
+    que se unen en la consulta y se anidan en la respuesta.
+    """
+
+    def __init__(self, model_class):
+        self.model_class = model_class
+        self.columns = None
+        self.relations = {}
+
+    def field_names(self):
+        """Columnas que se leen, en el orden del modelo. Incluye siempre la clave primaria
+        y las claves foráneas de las relaciones expandidas."""
+        meta = self.model_class._meta
+        if self.columns is None:
+            return list(meta.fields)
+        pedidas = set(self.columns) | set(self.relations)
+        if meta.primary_key is not None:
+            pedidas.add(meta.primary_key.name)
+        return [nombre for nombre in meta.fields if nombre in pedidas]
+
+    def key(self):
+        """Clave hashable de la proyección (caché de serializadores)."""
+        return (
+            self.model_class,
+            tuple(self.field_names()),
+            tuple(sorted((nombre, rel.key()) for nombre, rel in self.relations.items())),
+        )
+
+    def select(self):
+        """SELECT con solo las columnas pedidas y un LEFT OUTER JOIN por relación expandida."""
+        query = self.model_class.select(*self._selected_fields())
+        return self._join(query)
+
+    def _selected_fields(self):
+        campos = [self.model_class._meta.fields[nombre] for nombre in self.field_names()]
+        for relacion in self.relations.values():
+            campos.extend(relacion._selected_fields())
+        return campos
+
+    def _join(self, query):
+        for nombre, relacion in self.relations.items():
+            fk = self.model_class._meta.fields[nombre]
+            query = query.join_from(self.model_class, relacion.model_class, JOIN.LEFT_OUTER,
+                                    on=(fk == fk.rel_field), attr=nombre)
+            query = relacion._join(query)
+        return query
+
+
+def _split(raw):
+    return [parte.strip() for parte in (raw or "").split(",") if parte.strip()]
+
+
+def _relation(node, nombre, path):
+    campo = node.model_class._meta.fields.get(nombre)
+    if not isinstance(campo, ForeignKeyField):
+        raise ValueError(f"'{path}' no es una relación que se pueda expandir.")
+    if nombre not in node.relations:
+        node.relations[nombre] = Projection(campo.rel_model)
+    return node.relations[nombre]
+
+
+def parse_projection(model_class, fields=None, expand=None):
+    """
+    Interpreta '?fields=' y '?expand=' (listas separadas por comas).
+    - expand: relaciones a unir y anidar; admite rutas como 'ruta_evento.evento'.
+    - fields: columnas a devolver; 'relacion.campo' limita las columnas de una
+      relación (y la expande). Una clave foránea se puede pedir como 'x' o 'x_id'.
+    Sin ninguno de los dos devuelve None (respuesta completa). Lanza ValueError
+    si algún nombre no existe.
+    """
+    fields, expand = _split(fields), _split(expand)
+    if not fields and not expand:
+        return None
+
+    root = Projection(model_class)
+    for path in expand:
+        node = root
+        for nombre in path.split("."):
+            node = _relation(node, nombre, path)
+
+    for path in fields:
+        *ruta, nombre = path.split(".")
+        node = root
+        for parte in ruta:
+            node = _relation(node, parte, path)
+        campos = node.model_class._meta.fields
+        if nombre not in campos and nombre.endswith("_id") and isinstance(campos.get(nombre[:-3]), ForeignKeyField):
+            nombre = nombre[:-3]
+        if nombre not in campos:
+            raise ValueError(f"El campo '{path}' no existe.")
+        if node.columns is None:
+            node.columns = []
+        node.columns.append(nombre)
+    return root
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+
+
+class Subscription:
+    """
+    Suscripción con cola acotada. Si el cliente no consume a tiempo se
+    descartan los mensajes más antiguos: un cliente lento no retiene memoria
+    ni frena a los demás.
+    """
+
+    def __init__(self, topic, max_queue, loop):
+        self.topic = topic
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def _push(self, message):
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self):
+        return await self.queue.get()
+
+
+class PubSub:
+    """
+    Publicación/suscripción dentro del proceso. Un suscriptor con tema None
+    recibe todos los mensajes; con un tema, solo los publicados en ese tema.
+    publish() puede llamarse desde cualquier hilo: la entrega se agenda en el
+    bucle de eventos de cada suscriptor.
+    """
+
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._subscriptions = set()
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, topic=None):
+        subscription = Subscription(topic, self.max_queue, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, message, topic=None):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+            self.published += 1
+        for subscription in subscriptions:
+            if subscription.topic is None or subscription.topic == topic:
+                subscription.loop.call_soon_threadsafe(subscription._push, message)
+
+    def stats(self):
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        return {
+            "subscribers": len(subscriptions),
+            "published": self.published,
+            "dropped": sum(s.dropped for s in subscriptions),
+        }
@@ -0,0 +1,128 @@
+import gzip
+import threading
+import time
+from collections import OrderedDict
+
+# Etiquetas de las respuestas cacheadas que deja obsoletas una escritura en cada
+# entidad: los vuelos incluyen su aeronave, ruta de evento, ruta y evento, y el
+# manifiesto además el último cálculo de cobertura de la ruta.
+DEPENDENCIAS = {
+    "aircrafts": ("aircrafts", "flights", "manifests"),
+    "routes": ("routes", "event_routes", "flights", "manifests"),
+    "events": ("events", "event_routes", "flights", "manifests"),
+    "event_routes": ("event_routes", "flights", "manifests"),
+    "flights": ("flights", "manifests"),
+    "coverage": ("manifests",),
+}
+
+
+class CachedResponse:
+    __slots__ = ("body", "content_type", "tags", "expires_at")
+
+    def __init__(self, body, content_type, tags, expires_at):
+        self.body = body  # cuerpo comprimido con gzip
+        self.content_type = content_type
+        self.tags = tags
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    Caché en memoria de respuestas GET ya serializadas y comprimidas con gzip.
+    Está acotada por el total de bytes guardados (se descarta la entrada menos
+    usada) y cada entrada expira por TTL. Las entradas llevan etiquetas
+    ("flights", "manifests"...) y los controladores, al escribir, invalidan la
+    entidad afectada y las que dependen de ella (invalidate_entity).
+    Cada invalidación avanza la generación de sus etiquetas: una respuesta
+    calculada antes de una escritura no se guarda después de ella.
+    """
+
+    def __init__(self, max_bytes, ttl_seconds, clock=time.monotonic):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._data = OrderedDict()  # clave -> CachedResponse
+        self._by_tag = {}           # etiqueta -> claves con esa etiqueta
+        self._generations = {}      # etiqueta -> número de invalidaciones
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry.expires_at <= self._clock():
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def generation(self, tags):
+        """Marca a pasar a set(): identifica el estado de las etiquetas al empezar a calcular."""
+        with self._lock:
+            return tuple(self._generations.get(tag, 0) for tag in tags)
+
+    def set(self, key, tags, generation, body, content_type):
+        """
+        Guarda 'body' comprimido. Se descarta si alguna etiqueta se invalidó
+        desde generation() o si el cuerpo comprimido no cabe en la caché.
+        """
+        comprimido = gzip.compress(body, mtime=0)
+        if len(comprimido) > self.max_bytes:
+            return False
+        with self._lock:
+            if generation != tuple(self._generations.get(tag, 0) for tag in tags):
+                return False
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = CachedResponse(comprimido, content_type, tags, self._clock() + self.ttl_seconds)
+            self.bytes += len(comprimido)
+            for tag in tags:
+                self._by_tag.setdefault(tag, set()).add(key)
+            while self.bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def _remove(self, key):
+        entry = self._data.pop(key)
+        self.bytes -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+
+    def invalidate(self, *tags):
+        """Descarta las respuestas con alguna de las etiquetas."""
+        with self._lock:
+            for tag in tags:
+                self._generations[tag] = self._generations.get(tag, 0) + 1
+                for key in list(self._by_tag.pop(tag, ())):
+                    if key in self._data:
+                        self._remove(key)
+                        self.invalidations += 1
+
+    def invalidate_entity(self, entity):
+        """Descarta las respuestas afectadas por una escritura en 'entity' (ver DEPENDENCIAS)."""
+        self.invalidate(*DEPENDENCIAS[entity])
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+            }
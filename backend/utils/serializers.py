@@ -1,54 +1,185 @@
 import datetime
 import decimal
-from peewee import Model, ForeignKeyField
+import json
+import threading
+from peewee import (
+    Model, ForeignKeyField, FieldAccessor, DateField, DateTimeField,
+    DecimalField, IntegerField, FloatField, CharField, TextField, BooleanField, TimestampField
+)
 
-def model_to_dict(model_instance, exclude_fields=None, include_related=True):
+try:
+    import orjson
+except ImportError:  # orjson es opcional: sin él se usa el módulo json estándar.
+    orjson = None
+
+# Campos cuyos valores se devuelven tal cual (nunca son fechas ni Decimal).
+_CAMPOS_DIRECTOS = (IntegerField, CharField, TextField, BooleanField)
+# Campos numéricos que pueden traer Decimal.
+_CAMPOS_NUMERICOS = (DecimalField, FloatField)
+# Campos de fecha: se serializan con isoformat().
+_CAMPOS_FECHA = (DateField, DateTimeField)
+
+# Planes compilados por (modelo, campos excluidos, include_related).
+_planes = {}
+_planes_lock = threading.Lock()
+
+
+def _convertir(value):
+    """Conversión genérica, para campos de tipos no previstos."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    return value
+
+
+def _compilar(model_class, exclude_fields, include_related, compilando):
     """
-    Convierte una instancia de un modelo Peewee a un diccionario,
-    manejando campos de clave foránea y tipos de datos especiales.
+    Genera el código de una función plana que serializa instancias de
+    'model_class': la lista de campos, el tratamiento de las claves foráneas
+    y el conversor de cada campo se resuelven aquí, una sola vez. La salida es
+    la misma que la del recorrido reflexivo de _meta.fields (mismas claves,
+    mismo orden, mismos valores), incluida la carga perezosa de relaciones.
     """
-    if not isinstance(model_instance, Model):
-        return model_instance
-
-    data = {}
-    if exclude_fields is None:
-        exclude_fields = set()
+    entorno = _entorno()
+    previas = []   # asignaciones a variables locales antes del diccionario
+    claves = []    # pares "clave: expresión" en el orden de salida
 
-    if 'id' not in exclude_fields and hasattr(model_instance, 'id'):
-        data['id'] = model_instance.id
+    incluye_id = 'id' not in exclude_fields and hasattr(model_class, 'id')
+    if incluye_id:
+        claves.append(f"'id': {_leer(model_class, 'id')}")
 
-    for field_name, field_obj in model_instance._meta.fields.items():
-        if field_name in exclude_fields:
+    for n, (nombre, campo) in enumerate(model_class._meta.fields.items()):
+        if nombre in exclude_fields or (nombre == 'id' and incluye_id):
             continue
+        var = f"v{n}"
+
+        if isinstance(campo, ForeignKeyField):
+            # Si la relación vino en la consulta se toma de __rel__; si no, el
+            # acceso normal la carga de forma perezosa, igual que antes.
+            previas.append(f"{var} = r[{nombre!r}] if {nombre!r} in r else obj.{nombre}")
+            relacionado = f"s{n}"
+            # Los relacionados se serializan sin 'id' y sin expandir (recursivo igualmente).
+            entorno[relacionado] = _plan(campo.rel_model, frozenset({'id'}), False, compilando)
+            if type(campo.rel_model.__dict__.get('id')) is FieldAccessor:
+                id_relacionado = f"{var}.__data__.get('id')"
+            else:
+                id_relacionado = f"{var}.id"
+            claves.append(f"{nombre + '_id'!r}: ({id_relacionado} if isinstance({var}, Model) else {var})")
+            claves.append(f"{nombre!r}: ({relacionado}({var}) if isinstance({var}, Model) else {var})")
+        else:
+            claves.append(f"{nombre!r}: {_valor(campo, _leer(model_class, nombre), var, previas)}")
 
-        value = getattr(model_instance, field_name)
+    return _generar(entorno, previas, claves)
 
-        if isinstance(field_obj, ForeignKeyField):
 
-            if value is not None:
-                if isinstance(value, Model):
-                    data[f"{field_name}_id"] = value.id
-                else:
-                    data[f"{field_name}_id"] = value
-            else:
-                data[f"{field_name}_id"] = None
+def _entorno():
+    return {"Model": Model, "_date": datetime.date, "_Decimal": decimal.Decimal, "_convertir": _convertir}
 
 
-            if include_related and isinstance(value, Model):
-                data[field_name] = model_to_dict(value, exclude_fields={'id'}, include_related=False)
-            elif isinstance(value, Model):
-                data[field_name] = model_to_dict(value, exclude_fields={'id'}, include_related=False)
-            else:
-                data[field_name] = value
+def _leer(model_class, nombre):
+    # FieldAccessor solo lee __data__; otros descriptores se respetan con getattr.
+    if type(model_class.__dict__.get(nombre)) is FieldAccessor:
+        return f"d.get({nombre!r})"
+    return f"obj.{nombre}"
+
+
+def _valor(campo, lectura, var, previas):
+    """Expresión que convierte el valor de un campo que no es clave foránea."""
+    if isinstance(campo, _CAMPOS_DIRECTOS) and not isinstance(campo, TimestampField):
+        return lectura
+    if isinstance(campo, _CAMPOS_FECHA):
+        previas.append(f"{var} = {lectura}")
+        return f"({var}.isoformat() if isinstance({var}, _date) else {var})"
+    if isinstance(campo, _CAMPOS_NUMERICOS):
+        previas.append(f"{var} = {lectura}")
+        return f"(float({var}) if isinstance({var}, _Decimal) else {var})"
+    return f"_convertir({lectura})"
+
+
+def _generar(entorno, previas, claves):
+    cuerpo = ["def serializar(obj):", "    d = obj.__data__", "    r = obj.__rel__"]
+    cuerpo += [f"    {linea}" for linea in previas]
+    cuerpo.append("    return {" + ", ".join(claves) + "}")
+    exec("\n".join(cuerpo), entorno)
+    return entorno["serializar"]
+
+
+def _plan(model_class, exclude_fields, include_related, compilando=None):
+    clave = (model_class, exclude_fields, include_related)
+    plan = _planes.get(clave)
+    if plan is not None:
+        return plan
+
+    compilando = compilando or set()
+    if clave in compilando:
+        # Relación circular: se resuelve el plan en la llamada, cuando ya existe.
+        return lambda obj: _planes[clave](obj)
+    compilando.add(clave)
+    plan = _compilar(model_class, exclude_fields, include_related, compilando)
+    with _planes_lock:
+        return _planes.setdefault(clave, plan)
+
+
+def compile_serializer(model_class, exclude_fields=None, include_related=True):
+    """
+    Devuelve la función compilada que convierte instancias de 'model_class'
+    a diccionario. Se genera una vez por modelo y proyección y se reutiliza.
+    """
+    return _plan(model_class, frozenset(exclude_fields or ()), include_related)
+
+
+def _compilar_proyeccion(projection, anidada):
+    """
+    Serializador de una Projection: solo las columnas leídas, el '<fk>_id' de
+    cada clave foránea y, anidadas, las relaciones expandidas (sin 'id', como
+    en la respuesta completa). Las relaciones no expandidas no se cargan.
+    """
+    model_class = projection.model_class
+    entorno = _entorno()
+    previas, claves = [], []
+    for n, nombre in enumerate(projection.field_names()):
+        if anidada and nombre == 'id':
+            continue
+        campo = model_class._meta.fields[nombre]
+        var = f"v{n}"
+        if nombre == 'id' and not anidada:
+            claves.insert(0, f"'id': {_leer(model_class, 'id')}")
+        elif isinstance(campo, ForeignKeyField):
+            claves.append(f"{nombre + '_id'!r}: d.get({nombre!r})")
+            relacion = projection.relations.get(nombre)
+            if relacion is not None:
+                relacionado = f"s{n}"
+                entorno[relacionado] = compile_projection(relacion, anidada=True)
+                previas.append(f"{var} = r.get({nombre!r})")
+                claves.append(f"{nombre!r}: ({relacionado}({var}) if {var} is not None else d.get({nombre!r}))")
         else:
-            if isinstance(value, (datetime.datetime, datetime.date)):
-                data[field_name] = value.isoformat()
-            elif isinstance(value, decimal.Decimal):
-                data[field_name] = float(value)
-            else:
-                data[field_name] = value
+            claves.append(f"{nombre!r}: {_valor(campo, _leer(model_class, nombre), var, previas)}")
+    return _generar(entorno, previas, claves)
+
+
+def compile_projection(projection, anidada=False):
+    """
+    Devuelve el serializador compilado de una proyección de '?fields=' y
+    '?expand=' (ver backend.utils.projection). Se genera una vez por proyección.
+    """
+    clave = ("proyeccion", projection.key(), anidada)
+    plan = _planes.get(clave)
+    if plan is None:
+        plan = _compilar_proyeccion(projection, anidada)
+        with _planes_lock:
+            plan = _planes.setdefault(clave, plan)
+    return plan
+
 
-    return data
+def model_to_dict(model_instance, exclude_fields=None, include_related=True):
+    """
+    Convierte una instancia de un modelo Peewee a un diccionario,
+    manejando campos de clave foránea y tipos de datos especiales.
+    """
+    if not isinstance(model_instance, Model):
+        return model_instance
+    return compile_serializer(type(model_instance), exclude_fields, include_related)(model_instance)
 
 
 def list_to_dicts(model_list):
@@ -60,4 +191,21 @@ def list_to_dicts(model_list):
     if not isinstance(model_list, (list, ModelSelect)):
         raise TypeError("Se esperaba una lista o un objeto ModelSelect de Peewee.")
 
-    return [model_to_dict(item) for item in model_list]
\ No newline at end of file
+    return [model_to_dict(item) for item in model_list]
+
+
+def _json_default(value):
+    converted = _convertir(value)
+    if converted is value:
+        raise TypeError(f"Tipo no serializable a JSON: {type(value).__name__}")
+    return converted
+
+
+def json_dumps(data):
+    """
+    Serializa a JSON (bytes UTF-8) con orjson si está instalado, o con el
+    módulo json estándar en su defecto.
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default)
+    return json.dumps(data, default=_json_default).replace("</", "<\\/").encode("utf-8")
@@ -0,0 +1,26 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    Agrupa llamadas concurrentes idénticas: la primera con una clave lanza el
+    cálculo y las demás esperan la misma tarea y comparten su resultado.
+    La tarea no se cancela si el cliente que la inició se desconecta.
+    """
+
+    def __init__(self):
+        self._in_flight = {}
+        self.coalesced = 0
+
+    async def do(self, key, coroutine_factory):
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _task: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def stats(self):
+        return {"in_flight": len(self._in_flight), "coalesced": self.coalesced}
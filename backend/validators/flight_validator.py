@@ -4,12 +4,13 @@ from backend.models.flight import Flight
 from backend.models.event import Event
 
 class FlightValidator:
-    # 1. El constructor ahora también recibe el event_route_repo
-    def __init__(self, data, aeronave_id, ruta_evento_id, event_route_repo):
+    # 1. El constructor ahora también recibe el event_route_repo y el flight_repo
+    def __init__(self, data, aeronave_id, ruta_evento_id, event_route_repo, flight_repo):
         self.data = data
         self.aeronave_id = aeronave_id
         self.ruta_evento_id = ruta_evento_id
         self.event_route_repo = event_route_repo  # Lo guardamos
+        self.flight_repo = flight_repo
         self.errors = []
         self.event_route = None
         self.fecha_salida_dt = None
@@ -68,12 +69,9 @@ class FlightValidator:
         if not self.fecha_salida_dt or not self.fecha_llegada_dt:
             return
 
-        conflicting_flight = Flight.select().where(
-            (Flight.aeronave == self.aeronave_id) &
-            (
-                    (Flight.fecha_salida < self.fecha_llegada_dt) & (Flight.fecha_llegada > self.fecha_salida_dt)
-            )
-        ).first()
+        conflicting_flight = self.flight_repo.find_overlapping(
+            self.aeronave_id, self.fecha_salida_dt, self.fecha_llegada_dt
+        )
 
         if conflicting_flight:
             self.errors.append(
@@ -1,11 +1,34 @@
+import contextlib
+import csv
+import functools
+import gzip
+import inspect
+import io
+import itertools
 import json
+import asyncio
+import jwt
+import tornado.iostream
 import tornado.web
+import tornado.websocket
 import traceback
-from backend.utils.serializers import model_to_dict
+from backend.utils.serializers import model_to_dict, json_dumps, compile_projection
+from backend.utils.pagination import decode_cursor, parse_limit, paginate, MAX_PAGE_SIZE
+from backend.utils.projection import parse_projection
+from backend.models.aircraft import Aircraft
+from backend.models.coverage_alert import CoverageAlert
+from backend.models.event import Event
+from backend.models.event_route import EventRoute
+from backend.models.flight import Flight
+from backend.models.real_coverage import RealCoverage
+from backend.models.route import Route
 from peewee import IntegrityError
-from backend.utils.auth import authenticated_user, require_permission
+from backend.utils.auth import authenticated_user, require_permission, decode_auth_token, has_permission
 
 class CORSRequestHandler(tornado.web.RequestHandler):
+    # Filas por bloque en los listados con '?stream=true'.
+    FILAS_POR_BLOQUE = 500
+
     def set_default_headers(self):
         self.set_header("Access-Control-Allow-Origin", "*")
         self.set_header("Access-Control-Allow-Methods", "GET, POST, PUT, DELETE, OPTIONS")
@@ -15,6 +38,211 @@ class CORSRequestHandler(tornado.web.RequestHandler):
         self.set_status(204)
         self.finish()
 
+    def prepare(self):
+        # Conexión de peewee de esta petición: se toma del pool en la primera
+        # llamada bloqueante y se devuelve en on_finish. Las peticiones que no
+        # llegan a la base de datos (OPTIONS, 401, caché) no ocupan ninguna.
+        self.db_connection = None
+        # ETag de versiones de tabla (not_modified) y respuesta pendiente de cachear (serve_cached).
+        self.version_etag = None
+        self._cache_pending = None
+
+    def on_finish(self):
+        self.release_db_connection()
+
+    def release_db_connection(self):
+        """
+        Devuelve al pool la conexión de la petición, si tiene una. La próxima
+        llamada bloqueante toma otra. Se llama al terminar y antes de esperar
+        un turno de streaming, para no retener una conexión mientras se espera.
+        """
+        connection = getattr(self, "db_connection", None)
+        if connection is not None:
+            self.db_connection = None
+            self.settings["blocking_executor"].checkin(connection)
+
+    async def run_blocking(self, fn, *args, **kwargs):
+        """
+        Ejecuta una llamada bloqueante (controladores sobre peewee) en el pool
+        de hilos de la aplicación, para que una consulta lenta no detenga las
+        demás peticiones. Todas las llamadas de la petición usan su conexión.
+        """
+        executor = self.settings.get("blocking_executor")
+        if executor is None:
+            return fn(*args, **kwargs)
+        if self.db_connection is None and executor.database is not None:
+            self.db_connection = await executor.checkout()
+        return await executor.run_on(self.db_connection, fn, *args, **kwargs)
+
+    def stream_slot(self):
+        """
+        Turno para una respuesta por streaming (listados con '?stream=true' y la
+        exportación de cobertura). Durante el streaming la petición retiene su
+        conexión, porque el cursor del servidor vive en ella, así que la
+        cantidad simultánea está acotada por STREAM_MAX_CONCURRENT.
+        """
+        executor = self.settings.get("blocking_executor")
+        if executor is None:
+            return contextlib.nullcontext()
+        # El turno se espera sin retener una conexión.
+        self.release_db_connection()
+        return executor.stream_slot()
+
+    async def write_page(self, collection_name, fetch, serialize=model_to_dict, model=None, stream=None):
+        """
+        Escribe una página de un listado paginado por cursor.
+        Lee '?cursor=' (opaco, devuelto como 'next_cursor') y '?limit=' de la petición;
+        lanza ValueError si alguno no es válido. 'fetch' puede ser síncrono o asíncrono.
+        Con 'model', acepta además '?fields=' y '?expand=': 'fetch' recibe la
+        proyección y la consulta y la respuesta se limitan a lo pedido.
+        Con 'stream' y '?stream=true', escribe el listado completo (desde el
+        cursor) con write_stream() en lugar de una página.
+        """
+        after_id = decode_cursor(self.get_query_argument("cursor", None))
+        projection = None
+        if model is not None:
+            projection = parse_projection(model, self.get_query_argument("fields", None),
+                                          self.get_query_argument("expand", None))
+            if projection is not None:
+                serialize = compile_projection(projection)
+
+        if stream is not None and self.get_query_argument("stream", "false").lower() in ("1", "true"):
+            await self.write_stream(collection_name, stream(after_id=after_id, projection=projection), serialize)
+            return
+
+        limit = parse_limit(self.get_query_argument("limit", None))
+        if projection is not None:
+            fetch = functools.partial(fetch, projection=projection)
+        if not inspect.iscoroutinefunction(fetch):
+            fetch = functools.partial(self.run_blocking, fetch)
+        items, next_cursor = await paginate(fetch, after_id, limit)
+        self.write_json({collection_name: await self.serialize(items, serialize), "next_cursor": next_cursor})
+
+    async def write_stream(self, collection_name, rows, serialize=model_to_dict):
+        """
+        Escribe un listado completo con la misma forma que una página
+        ({"<colección>": [...], "next_cursor": null}), pero de forma incremental:
+        cada bloque de FILAS_POR_BLOQUE filas se lee, serializa y codifica en el
+        pool de hilos y se envía con flush(). La memoria no depende del número de
+        filas y el cliente recibe el primer bloque sin esperar al último.
+        'rows' es un iterador (p. ej. iter_all() de un repositorio) que se cierra al terminar.
+        Su cursor se abre en la conexión de la petición, que se retiene hasta el final (ver stream_slot()).
+        """
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        # Una respuesta enviada por bloques no se guarda en la caché de respuestas.
+        self._cache_pending = None
+        async with self.stream_slot():
+            self.write(b'{' + json_dumps(collection_name) + b': [')
+            enviado = False
+            try:
+                primero = True
+                while True:
+                    cantidad, bloque = await self.run_blocking(self._encode_block, rows, serialize)
+                    if cantidad:
+                        if not primero:
+                            self.write(b",")
+                        self.write(bloque)
+                        primero = False
+                    if cantidad < self.FILAS_POR_BLOQUE:
+                        break
+                    # flush() espera a que el cliente consuma el bloque anterior.
+                    await self.flush()
+                    enviado = True
+                self.write(b'], "next_cursor": null}')
+            except tornado.iostream.StreamClosedError:
+                # El cliente cerró la conexión: no hay a quién responder.
+                return
+            except Exception as e:
+                if not enviado:
+                    # Nada salió todavía: el handler responde el error como siempre.
+                    self.clear()
+                    raise
+                # Con las cabeceras ya enviadas solo se puede cortar la respuesta.
+                print(f"\n!!!! ERROR CAPTURADO EN {type(self).__name__.upper()}.WRITE_STREAM: {e} !!!!")
+                traceback.print_exc()
+            finally:
+                # Cierra el cursor del servidor y su transacción aunque el envío se interrumpa.
+                await self.run_blocking(rows.close)
+
+    def _encode_block(self, rows, serialize):
+        """Lee el siguiente bloque de filas y lo devuelve codificado como elementos de un array JSON."""
+        bloque = [serialize(row) for row in itertools.islice(rows, self.FILAS_POR_BLOQUE)]
+        # json_dumps de una lista produce "[...]": se quitan los corchetes.
+        return len(bloque), json_dumps(bloque)[1:-1]
+
+    def not_modified(self, *models):
+        """
+        Pone la ETag de la respuesta a partir de la versión de las tablas de
+        'models' y, si el cliente ya tiene esa versión (If-None-Match), responde
+        304 sin consultar la base de datos ni serializar. Devuelve True en ese caso.
+        """
+        table_versions = self.settings.get("table_versions")
+        if table_versions is None:
+            return False
+        self.version_etag = table_versions.etag(*models)
+        self.set_header("ETag", self.version_etag)
+        # El cliente puede guardar la respuesta, pero debe revalidarla en cada uso.
+        self.set_header("Cache-Control", "no-cache")
+        if self.check_etag_header():
+            self.set_status(304)
+            return True
+        return False
+
+    def serve_cached(self, *tags):
+        """
+        Responde desde la caché de respuestas si hay una entrada para la ruta,
+        la consulta, el rol del usuario y la ETag de versiones actual. Si no,
+        la respuesta de esta petición se guarda en finish() cuando termina en
+        200, con las etiquetas 'tags'. Los listados con '?stream=true' no se
+        cachean. Devuelve True si ya respondió.
+        """
+        cache = self.settings.get("response_cache")
+        if cache is None or self.get_query_argument("stream", "false").lower() in ("1", "true"):
+            return False
+        role = (self.current_user or {}).get("role")
+        key = (self.request.path, "&".join(sorted(self.request.query.split("&"))), role, self.version_etag)
+        entry = cache.get(key)
+        if entry is None:
+            self._cache_pending = (cache, key, tags, cache.generation(tags))
+            return False
+
+        self.set_header("Content-Type", entry.content_type)
+        self.set_header("Vary", "Accept-Encoding")
+        if "gzip" in self.request.headers.get("Accept-Encoding", ""):
+            # El cuerpo ya está comprimido: no se vuelve a serializar ni a codificar.
+            self.set_header("Content-Encoding", "gzip")
+            self.write(entry.body)
+        else:
+            self.write(gzip.decompress(entry.body))
+        return True
+
+    def finish(self, chunk=None):
+        pending, self._cache_pending = getattr(self, "_cache_pending", None), None
+        if pending is not None and self.get_status() == 200:
+            if chunk is not None:
+                self.write(chunk)
+                chunk = None
+            cache, key, tags, generation = pending
+            # Cuerpo completo aún sin enviar (el de RequestHandler.write) y su tipo.
+            cache.set(key, tags, generation, b"".join(self._write_buffer),
+                      self._headers.get("Content-Type", "application/json; charset=UTF-8"))
+            self.set_header("Vary", "Accept-Encoding")
+        return super().finish(chunk)
+
+    def write_json(self, data):
+        """Escribe 'data' como JSON con el codificador rápido (orjson si está disponible)."""
+        self.set_header("Content-Type", "application/json; charset=UTF-8")
+        self.write(json_dumps(data))
+
+    async def serialize(self, value, serialize=model_to_dict):
+        """
+        Convierte un modelo (o una lista de modelos) a diccionario en el pool de
+        hilos: las relaciones perezosas consultan la base de datos.
+        """
+        if isinstance(value, list):
+            return await self.run_blocking(lambda: [serialize(item) for item in value])
+        return await self.run_blocking(serialize, value)
+
 
 class AircraftHandler(CORSRequestHandler):
     """
@@ -31,17 +259,22 @@ class AircraftHandler(CORSRequestHandler):
     @require_permission("gestionar_aeronaves")
     async def get(self, aircraft_id=None):
         try:
+            if self.not_modified(Aircraft) or self.serve_cached("aircrafts"):
+                return
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if aircraft_id:
-                aircraft = self.controller.get_aircraft(int(aircraft_id))
+                aircraft = await self.run_blocking(self.controller.get_aircraft, int(aircraft_id))
                 if aircraft:
-                    self.write({"aircraft": model_to_dict(aircraft)})
+                    self.write({"aircraft": await self.serialize(aircraft)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Aeronave no encontrada"})
             else:
-                aircrafts = self.controller.list_aircrafts()
-                self.write({"aircrafts": [model_to_dict(a) for a in aircrafts]})
+                await self.write_page("aircrafts", self.controller.list_aircrafts, model=Aircraft,
+                                      stream=self.controller.stream_aircrafts)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN AIRCRAFTHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -54,8 +287,8 @@ class AircraftHandler(CORSRequestHandler):
         try:
             data = json.loads(self.request.body)
             # --- CAMBIO 3: Usar la instancia self.controller ---
-            aircraft = self.controller.create_aircraft(data["matricula"], data["modelo"], data["capacidad"])
-            self.write({"aircraft": model_to_dict(aircraft)})
+            aircraft = await self.run_blocking(self.controller.create_aircraft, data["matricula"], data["modelo"], data["capacidad"])
+            self.write({"aircraft": await self.serialize(aircraft)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -73,8 +306,8 @@ class AircraftHandler(CORSRequestHandler):
     async def put(self, aircraft_id):
         try:
             data = json.loads(self.request.body)
-            updated_aircraft = self.controller.update_aircraft(int(aircraft_id), **data)
-            self.write({"aircraft": model_to_dict(updated_aircraft)})
+            updated_aircraft = await self.run_blocking(self.controller.update_aircraft, int(aircraft_id), **data)
+            self.write({"aircraft": await self.serialize(updated_aircraft)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -88,7 +321,7 @@ class AircraftHandler(CORSRequestHandler):
     async def delete(self, aircraft_id):
         try:
             # --- CAMBIO 4: Usar la instancia self.controller ---
-            success = self.controller.delete_aircraft(int(aircraft_id))
+            success = await self.run_blocking(self.controller.delete_aircraft, int(aircraft_id))
             if success:
                 self.set_status(200)
                 self.write({"message": "Aeronave eliminada correctamente"})
@@ -116,17 +349,22 @@ class RouteHandler(CORSRequestHandler):
     @require_permission("gestionar_rutas")
     async def get(self, route_id=None):
         try:
+            if self.not_modified(Route) or self.serve_cached("routes"):
+                return
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if route_id:
-                route = self.controller.get_route(int(route_id))
+                route = await self.run_blocking(self.controller.get_route, int(route_id))
                 if route:
-                    self.write({"route": model_to_dict(route)})
+                    self.write({"route": await self.serialize(route)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Ruta no encontrada"})
             else:
-                routes = self.controller.list_routes()
-                self.write({"routes": [model_to_dict(r) for r in routes]})
+                await self.write_page("routes", self.controller.list_routes, model=Route,
+                                      stream=self.controller.stream_routes)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN ROUTEHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -139,8 +377,8 @@ class RouteHandler(CORSRequestHandler):
         try:
             data = json.loads(self.request.body)
             # --- CAMBIO 3: Usar la instancia self.controller ---
-            route = self.controller.create_route(data["origen"], data["destino"], data["distancia"])
-            self.write({"route": model_to_dict(route)})
+            route = await self.run_blocking(self.controller.create_route, data["origen"], data["destino"], data["distancia"])
+            self.write({"route": await self.serialize(route)})
         except ValueError as ve:
             # Capturamos los errores de validación del controlador (distancia negativa, etc.)
             self.set_status(400) # Bad Request
@@ -159,8 +397,8 @@ class RouteHandler(CORSRequestHandler):
     async def put(self, route_id):
         try:
             data = json.loads(self.request.body)
-            updated_route = self.controller.update_route(int(route_id), **data)
-            self.write({"route": model_to_dict(updated_route)})
+            updated_route = await self.run_blocking(self.controller.update_route, int(route_id), **data)
+            self.write({"route": await self.serialize(updated_route)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -174,7 +412,7 @@ class RouteHandler(CORSRequestHandler):
     async def delete(self, route_id):
         try:
             # --- CAMBIO 4: Usar la instancia self.controller ---
-            success = self.controller.delete_route(int(route_id))
+            success = await self.run_blocking(self.controller.delete_route, int(route_id))
             if success:
                 self.write({"message": "Ruta eliminada correctamente"})
             else:
@@ -200,10 +438,12 @@ class FlightHandler(CORSRequestHandler):
     @require_permission("gestionar_vuelos")
     async def get(self, flight_id=None):
         try:
+            if self.serve_cached("manifests" if "/manifest" in self.request.path else "flights"):
+                return
             # --- Revisamos la URL para decidir qué hacer ---
             if "/manifest" in self.request.path:
                 # Si la URL contiene "/manifest", llamamos al nuevo método del controlador (NUEVA FUNCIONALIDAD).
-                manifest_data = self.controller.get_manifest(int(flight_id))
+                manifest_data = await self.controller.get_manifest(int(flight_id))
                 if manifest_data:
                     self.write(manifest_data)
                 else:
@@ -212,16 +452,19 @@ class FlightHandler(CORSRequestHandler):
 
             elif flight_id:
                 # Si no es un manifiesto pero tiene ID, es una petición de un solo vuelo.
-                flight = self.controller.get_flight(int(flight_id))
+                flight = await self.run_blocking(self.controller.get_flight, int(flight_id))
                 if flight:
-                    self.write(model_to_dict(flight))
+                    self.write(await self.serialize(flight))
                 else:
                     self.set_status(404)
                     self.write({"error": "Vuelo no encontrado"})
             else:
                 # Si no tiene ID, es una petición de todos los vuelos.
-                flights = self.controller.list_flights()
-                self.write({"flights": [model_to_dict(f) for f in flights]})
+                await self.write_page("flights", self.controller.list_flights, model=Flight,
+                                      stream=self.controller.stream_flights)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN FLIGHTHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -233,14 +476,15 @@ class FlightHandler(CORSRequestHandler):
     async def post(self):
         try:
             data = json.loads(self.request.body)
-            flight = self.controller.create_flight(
+            flight = await self.run_blocking(
+                self.controller.create_flight,
                 data["codigo_vuelo"],
                 data["aeronave_id"],
                 data["ruta_evento_id"],
                 data["fecha_salida"],
                 data["fecha_llegada"]
             )
-            self.write({"flight": model_to_dict(flight)})
+            self.write({"flight": await self.serialize(flight)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -258,8 +502,8 @@ class FlightHandler(CORSRequestHandler):
     async def put(self, flight_id):
         try:
             data = json.loads(self.request.body)
-            updated_flight = self.controller.update_flight(int(flight_id), **data)
-            self.write({"flight": model_to_dict(updated_flight)})
+            updated_flight = await self.run_blocking(self.controller.update_flight, int(flight_id), **data)
+            self.write({"flight": await self.serialize(updated_flight)})
         except ValueError as ve:
             self.set_status(400)  # Bad Request
             self.write({"error": str(ve)})
@@ -274,7 +518,7 @@ class FlightHandler(CORSRequestHandler):
     @require_permission("gestionar_vuelos")
     async def delete(self, flight_id):
         try:
-            success = self.controller.delete_flight(int(flight_id))
+            success = await self.run_blocking(self.controller.delete_flight, int(flight_id))
             if success:
                 self.set_status(200)
                 self.write({"message": "Vuelo eliminado correctamente"})
@@ -308,11 +552,12 @@ class UserHandler(CORSRequestHandler):
                 self.set_status(501)  # Not Implemented
                 self.write({"error": "Obtener usuario por ID."})
             else:
-                users = self.controller.list_users()
                 # Excluimos la contraseña de la respuesta por seguridad.
-                self.write({"users": [
-                    {"id": u.id, "username": u.username, "role": u.role} for u in users
-                ]})
+                await self.write_page("users", self.controller.list_users,
+                                lambda u: {"id": u.id, "username": u.username, "role": u.role})
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN USERHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -324,7 +569,7 @@ class UserHandler(CORSRequestHandler):
         try:
             data = json.loads(self.request.body)
             # --- CAMBIO 3: Usar la instancia self.controller ---
-            user = self.controller.register(data["username"], data["password"], data["role"])
+            user = await self.run_blocking(self.controller.register, data["username"], data["password"], data["role"])
             # Por seguridad, no devolvemos la contraseña hasheada.
             self.write({
                 "user": {
@@ -350,7 +595,7 @@ class UserHandler(CORSRequestHandler):
     async def delete(self, user_id):
         try:
             # --- CAMBIO 4: Usar la instancia self.controller ---
-            success = self.controller.delete_user(int(user_id))
+            success = await self.run_blocking(self.controller.delete_user, int(user_id))
             if success:
                 self.write({"message": "Usuario eliminado correctamente"})
             else:
@@ -383,7 +628,7 @@ class LoginHandler(CORSRequestHandler):
                 return
 
             # --- CAMBIO 5: Usar el método login del controlador, que ahora genera el token ---
-            token = self.controller.login(username, password)
+            token = await self.controller.login(username, password)
 
             if token:
                 # El controlador ahora devuelve el token directamente.
@@ -413,17 +658,22 @@ class EventHandler(CORSRequestHandler):
     @require_permission("gestionar_eventos")
     async def get(self, event_id=None):
         try:
+            if self.not_modified(Event) or self.serve_cached("events"):
+                return
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if event_id:
-                event = self.controller.get_event(int(event_id))
+                event = await self.run_blocking(self.controller.get_event, int(event_id))
                 if event:
-                    self.write({"event": model_to_dict(event)})
+                    self.write({"event": await self.serialize(event)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Evento no encontrado"})
             else:
-                events = self.controller.list_events()
-                self.write({"events": [model_to_dict(e) for e in events]})
+                await self.write_page("events", self.controller.list_events, model=Event,
+                                      stream=self.controller.stream_events)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN EVENTHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -436,7 +686,8 @@ class EventHandler(CORSRequestHandler):
         try:
             data = json.loads(self.request.body)
             # --- CAMBIO 3: Usar la instancia self.controller ---
-            event = self.controller.create_event(
+            event = await self.run_blocking(
+                self.controller.create_event,
                 data["codigo_evento"],
                 data["nombre_evento"],
                 data["descripcion"],
@@ -444,7 +695,7 @@ class EventHandler(CORSRequestHandler):
                 data["fecha_inicio"],
                 data["fecha_fin"]
             )
-            self.write({"event": model_to_dict(event)})
+            self.write({"event": await self.serialize(event)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -462,6 +713,7 @@ class EventHandler(CORSRequestHandler):
     async def put(self, event_id):
         try:
             data = json.loads(self.request.body)
+
             allowed_fields = [
                 "codigo_evento", "nombre_evento", "descripcion",
                 "ciudad_evento", "fecha_inicio", "fecha_fin"
@@ -474,13 +726,13 @@ class EventHandler(CORSRequestHandler):
                 return
 
             # --- CAMBIO 4: Usar la instancia self.controller ---
-            event = self.controller.update_event(int(event_id), **update_data)
+            event = await self.run_blocking(self.controller.update_event, int(event_id), **update_data)
             if event:
-                self.write({"event": model_to_dict(event)})
+                self.write({"event": await self.serialize(event)})
             else:
                 self.set_status(404)
                 self.write({"error": "Evento no encontrado"})
-        except ValueError as ve:
+        except (ValueError, KeyError) as ve:
             self.set_status(400)
             self.write({"error": f"Error en los datos proporcionados: {str(ve)}"})
         except Exception as e:
@@ -494,7 +746,7 @@ class EventHandler(CORSRequestHandler):
     async def delete(self, event_id):
         try:
             # --- CAMBIO 5: Usar la instancia self.controller ---
-            success = self.controller.delete_event(int(event_id))
+            success = await self.run_blocking(self.controller.delete_event, int(event_id))
             if success:
                 self.write({"message": "Evento eliminado correctamente"})
             else:
@@ -507,6 +759,55 @@ class EventHandler(CORSRequestHandler):
             self.write({"error": f"Error al eliminar evento: {str(e)}"})
 
 
+class EventCoverageThresholdHandler(CORSRequestHandler):
+    """
+    Handler para los umbrales de cobertura propios de un Evento.
+    Solo admite consultarlos y reemplazarlos (Ej: GET/PUT /events/3/coverage_thresholds).
+    """
+
+    def initialize(self, controller):
+        self.controller = controller
+
+    @authenticated_user
+    @require_permission("gestionar_eventos")
+    async def get(self, event_id):
+        try:
+            thresholds = await self.run_blocking(self.controller.get_coverage_thresholds, int(event_id))
+            if thresholds:
+                self.write({"coverage_thresholds": await self.serialize(thresholds)})
+            else:
+                self.set_status(404)
+                self.write({"error": "Evento no encontrado"})
+        except Exception as e:
+            print(f"\n!!!! ERROR CAPTURADO EN EVENTCOVERAGETHRESHOLDHANDLER.GET: {e} !!!!")
+            traceback.print_exc()
+            self.set_status(500)
+            self.write({"error": f"Error al obtener los umbrales de cobertura: {str(e)}"})
+
+    @authenticated_user
+    @require_permission("gestionar_eventos")
+    async def put(self, event_id):
+        try:
+            data = json.loads(self.request.body)
+            thresholds = await self.run_blocking(
+                self.controller.set_coverage_thresholds,
+                int(event_id), data["umbral_parcial"], data["umbral_cubierta"]
+            )
+            if thresholds:
+                self.write({"coverage_thresholds": await self.serialize(thresholds)})
+            else:
+                self.set_status(404)
+                self.write({"error": "Evento no encontrado"})
+        except (ValueError, KeyError) as ve:
+            self.set_status(400)
+            self.write({"error": f"Error en los datos proporcionados: {str(ve)}"})
+        except Exception as e:
+            print(f"\n!!!! ERROR CAPTURADO EN EVENTCOVERAGETHRESHOLDHANDLER.PUT: {e} !!!!")
+            traceback.print_exc()
+            self.set_status(500)
+            self.write({"error": f"Error al actualizar los umbrales de cobertura: {str(e)}"})
+
+
 class EventRouteHandler(CORSRequestHandler):
     """
     Handler para gestionar las peticiones web relacionadas con las Rutas de Evento.
@@ -522,17 +823,22 @@ class EventRouteHandler(CORSRequestHandler):
     @require_permission("gestionar_demanda")
     async def get(self, event_route_id=None):
         try:
+            if self.not_modified(EventRoute, Route, Event) or self.serve_cached("event_routes"):
+                return
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if event_route_id:
-                event_route = self.controller.get_event_route(int(event_route_id))
+                event_route = await self.run_blocking(self.controller.get_event_route, int(event_route_id))
                 if event_route:
-                    self.write({"event_route": model_to_dict(event_route)})
+                    self.write({"event_route": await self.serialize(event_route)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Ruta de evento no encontrada"})
             else:
-                event_routes = self.controller.list_event_routes()
-                self.write({"event_routes": [model_to_dict(er) for er in event_routes]})
+                await self.write_page("event_routes", self.controller.list_event_routes, model=EventRoute,
+                                      stream=self.controller.stream_event_routes)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN EVENTROUTEHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -545,12 +851,13 @@ class EventRouteHandler(CORSRequestHandler):
         try:
             data = json.loads(self.request.body)
             # --- CAMBIO 3: Usar la instancia self.controller ---
-            event_route = self.controller.create_event_route(
+            event_route = await self.run_blocking(
+                self.controller.create_event_route,
                 data["ruta_id"],
                 data["evento_id"],
                 data["demanda_estimada"]
             )
-            self.write({"event_route": model_to_dict(event_route)})
+            self.write({"event_route": await self.serialize(event_route)})
         except ValueError as ve:
             self.set_status(400)
             self.write({"error": str(ve)})
@@ -570,10 +877,10 @@ class EventRouteHandler(CORSRequestHandler):
             data = json.loads(self.request.body)
 
             # Pasamos el diccionario 'data' completo usando **data
-            updated_event_route = self.controller.update_event_route(int(event_route_id), **data)
+            updated_event_route = await self.run_blocking(self.controller.update_event_route, int(event_route_id), **data)
 
             # Usamos model_to_dict para serializar la respuesta
-            self.write({"event_route": model_to_dict(updated_event_route)})
+            self.write({"event_route": await self.serialize(updated_event_route)})
 
         except ValueError as ve:
             self.set_status(400)
@@ -589,7 +896,7 @@ class EventRouteHandler(CORSRequestHandler):
     async def delete(self, event_route_id):
         try:
             # --- CAMBIO 5: Usar la instancia self.controller ---
-            success = self.controller.delete_event_route(int(event_route_id))
+            success = await self.run_blocking(self.controller.delete_event_route, int(event_route_id))
             if success:
                 self.write({"message": "Ruta de evento eliminada correctamente"})
             else:
@@ -618,30 +925,45 @@ class RealCoverageHandler(CORSRequestHandler):
     async def get(self, coverage_id=None):
         """
         Maneja las peticiones GET para obtener una o todas las coberturas reales.
-        También puede obtener la última cobertura para una ruta de evento específica.
+        También puede obtener la última cobertura para una ruta de evento específica,
+        o las de varias rutas en una sola consulta.
         Ej: GET /real_coverages?event_route_id=5
+        Ej: GET /real_coverages?event_route_ids=1,2,3
         """
         try:
             event_route_id = self.get_query_argument("event_route_id", None)
+            event_route_ids = self.get_query_argument("event_route_ids", None)
 
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if coverage_id:
-                coverage = self.controller.get_real_coverage(int(coverage_id))
+                coverage = await self.run_blocking(self.controller.get_real_coverage, int(coverage_id))
                 if coverage:
-                    self.write({"coverage": model_to_dict(coverage)})
+                    self.write({"coverage": await self.serialize(coverage)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Cobertura real no encontrada"})
             elif event_route_id:
-                coverage = self.controller.get_latest_coverage_for_event_route(int(event_route_id))
+                coverage = await self.run_blocking(self.controller.get_latest_coverage_for_event_route, int(event_route_id))
                 if coverage:
-                    self.write({"coverage": model_to_dict(coverage)})
+                    self.write({"coverage": await self.serialize(coverage)})
                 else:
                     self.set_status(404)
                     self.write({"error": "No se encontró cobertura para la ruta de evento especificada."})
+            elif event_route_ids:
+                try:
+                    ids = list(dict.fromkeys(int(i) for i in event_route_ids.split(",") if i.strip()))
+                except ValueError:
+                    raise ValueError("El parámetro 'event_route_ids' debe ser una lista de enteros separada por comas.")
+                if len(ids) > MAX_PAGE_SIZE:
+                    raise ValueError(f"Se admiten como máximo {MAX_PAGE_SIZE} rutas de evento por consulta.")
+                coverages = await self.run_blocking(self.controller.get_latest_coverages_for_event_routes, ids)
+                self.write({"coverages": await self.serialize(coverages)})
             else:
-                coverages = self.controller.list_real_coverages()
-                self.write({"coverages": [model_to_dict(c) for c in coverages]})
+                await self.write_page("coverages", self.controller.list_real_coverages, model=RealCoverage,
+                                      stream=self.controller.stream_real_coverages)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN REALCOVERAGEHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -672,18 +994,21 @@ class CoverageAlertHandler(CORSRequestHandler):
 
             # --- CAMBIO 2: Usar la instancia self.controller ---
             if alert_id:
-                alert = self.controller.get_alerta_cobertura(int(alert_id))
+                alert = await self.run_blocking(self.controller.get_alerta_cobertura, int(alert_id))
                 if alert:
-                    self.write({"alert": model_to_dict(alert)})
+                    self.write({"alert": await self.serialize(alert)})
                 else:
                     self.set_status(404)
                     self.write({"error": "Alerta no encontrada"})
             elif coverage_id:
-                alerts = self.controller.get_alerts_for_coverage(int(coverage_id))
-                self.write({"alerts": [model_to_dict(a) for a in alerts]})
+                alerts = await self.run_blocking(self.controller.get_alerts_for_coverage, int(coverage_id))
+                self.write({"alerts": await self.serialize(alerts)})
             else:
-                alerts = self.controller.list_alerta_coberturas()
-                self.write({"alerts": [model_to_dict(a) for a in alerts]})
+                await self.write_page("alerts", self.controller.list_alerta_coberturas, model=CoverageAlert,
+                                      stream=self.controller.stream_alerta_coberturas)
+        except ValueError as ve:
+            self.set_status(400)
+            self.write({"error": str(ve)})
         except Exception as e:
             print(f"\n!!!! ERROR CAPTURADO EN COVERAGEALERTHANDLER.GET: {e} !!!!")
             traceback.print_exc()
@@ -692,6 +1017,104 @@ class CoverageAlertHandler(CORSRequestHandler):
                 {"error": f"Error al obtener alertas de cobertura: {str(e)}."})
 
 
+class CoverageAlertSocketHandler(tornado.websocket.WebSocketHandler):
+    """
+    Canal WebSocket que empuja a los clientes las alertas nuevas y los cambios
+    de estado de cobertura, en lugar de que consulten /coverage_alert.
+    Usa el mismo JWT que el resto de la API: en la cabecera Authorization o,
+    como los navegadores no permiten cabeceras en WebSocket, en '?token='.
+    Ej: ws://host/ws/coverage_alerts?token=...&event_id=3
+    """
+
+    def initialize(self, alert_broker):
+        self.alert_broker = alert_broker
+        self.subscription = None
+        self._sender = None
+
+    def check_origin(self, origin):
+        # Misma política que CORSRequestHandler: se aceptan todos los orígenes.
+        return True
+
+    async def get(self, *args, **kwargs):
+        auth_header = self.request.headers.get("Authorization", "")
+        token = auth_header[len("Bearer "):] if auth_header.startswith("Bearer ") else self.get_query_argument("token", None)
+        if not token:
+            self.set_status(401)
+            self.finish({"message": "No autorizado: Token no proporcionado."})
+            return
+        try:
+            self.current_user = decode_auth_token(token)
+        except jwt.InvalidTokenError:
+            self.set_status(401)
+            self.finish({"message": "No autorizado: Token inválido."})
+            return
+        if not has_permission(self.current_user, "ver_alertas"):
+            self.set_status(403)
+            self.finish({"message": "Acceso denegado: Se requiere permiso 'ver_alertas'."})
+            return
+
+        event_id = self.get_query_argument("event_id", None)
+        try:
+            self.event_id = int(event_id) if event_id else None
+        except ValueError:
+            self.set_status(400)
+            self.finish({"message": "El parámetro 'event_id' debe ser un número entero válido si se proporciona."})
+            return
+
+        await super().get(*args, **kwargs)
+
+    def open(self):
+        self.subscription = self.alert_broker.subscribe(topic=self.event_id)
+        self._sender = asyncio.ensure_future(self._send_messages())
+
+    async def _send_messages(self):
+        try:
+            while True:
+                message = await self.subscription.get()
+                # json_dumps devuelve bytes; se decodifican para enviar un marco de texto y no uno binario.
+                await self.write_message(json_dumps(message).decode("utf-8"))
+        except (tornado.websocket.WebSocketClosedError, asyncio.CancelledError):
+            pass
+
+    def on_message(self, message):
+        # El canal es de solo envío; los mensajes del cliente se ignoran.
+        pass
+
+    def on_close(self):
+        if self.subscription is not None:
+            self.alert_broker.unsubscribe(self.subscription)
+        if self._sender is not None:
+            self._sender.cancel()
+
+
+class RuntimeStatsHandler(CORSRequestHandler):
+    """
+    Métricas de ejecución del servidor: cola y espera del pool de hilos de
+    las llamadas bloqueantes, uso y espera del pool de conexiones de peewee,
+    estado del ejecutor de lecturas asíncronas, uso de las sentencias preparadas,
+    versiones de las tablas usadas en las ETag y uso de la caché de respuestas.
+    """
+
+    @authenticated_user
+    @require_permission("consultar_panel")
+    async def get(self):
+        try:
+            data = {}
+            for name in ("blocking_executor", "query_executor", "prepared_statements", "table_versions",
+                         "response_cache"):
+                component = self.settings.get(name)
+                if component is not None:
+                    data[name] = component.stats()
+                    if name == "blocking_executor" and component.database is not None:
+                        data["db_pool"] = component.database.pool_stats()
+            self.write(data)
+        except Exception as e:
+            print(f"\n!!!! ERROR CAPTURADO EN RUNTIMESTATSHANDLER.GET: {e} !!!!")
+            traceback.print_exc()
+            self.set_status(500)
+            self.write({"error": f"Error al obtener las métricas: {str(e)}"})
+
+
 # ---- HANDLER PRINCIPAL DEL CORE ----
 class CoverageHandler(CORSRequestHandler):
     def initialize(self, coverage_controller):
@@ -707,7 +1130,10 @@ class CoverageHandler(CORSRequestHandler):
                 self.write(json.dumps({"message": "No autenticado."}))
                 return
 
-            if ruta_evento_id:
+            if self.request.path.endswith("/cache_stats"):
+                # Contadores de aciertos/fallos de la caché de cobertura.
+                data = self.coverage_controller.get_cache_stats()
+            elif ruta_evento_id:
                 try:
                     ruta_evento_id = int(ruta_evento_id)
                 except ValueError:
@@ -726,6 +1152,8 @@ class CoverageHandler(CORSRequestHandler):
                 status_filter = self.get_query_argument("status_filter", None)
                 page = self.get_query_argument("page", "1")
                 limit = self.get_query_argument("limit", "10")
+                # Cursor opaco devuelto como 'next_cursor'; si se envía, reemplaza a 'page'.
+                after_id = decode_cursor(self.get_query_argument("cursor", None))
 
                 if event_id:
                     try:
@@ -746,7 +1174,7 @@ class CoverageHandler(CORSRequestHandler):
                     return
 
                 data = await self.coverage_controller.get_dashboard_data(
-                    user_data, event_id, status_filter, page, limit
+                    user_data, event_id, status_filter, page, limit, after_id=after_id
                 )
 
             self.set_header("Content-Type", "application/json")
@@ -762,3 +1190,130 @@ class CoverageHandler(CORSRequestHandler):
             self.set_status(500)
             self.write(json.dumps(
                 {"message": f"Error interno del servidor. Consulte los logs del servidor para más detalles."}))
+
+
+class CoverageSimulationHandler(CORSRequestHandler):
+    """
+    Simulación de cobertura ("¿y si...?") sobre el estado actual de la red,
+    sin escribir en la base de datos. Solo admite POST en /coverage/simulate.
+    """
+
+    def initialize(self, coverage_controller):
+        self.coverage_controller = coverage_controller
+
+    @authenticated_user
+    @require_permission("consultar_panel")
+    async def post(self):
+        """
+        Simulación de cobertura ("¿y si...?") sin escribir en la base de datos.
+        Ej: POST /coverage/simulate
+            {"event_id": 1, "escenarios": [[{"tipo": "cambiar_demanda", "ruta_evento_id": 5, "factor": 1.2}]]}
+        """
+        try:
+            data = json.loads(self.request.body)
+            event_id = data.get("event_id")
+            escenarios = data["escenarios"]
+            if event_id is not None and not isinstance(event_id, int):
+                raise ValueError("El campo 'event_id' debe ser un número entero.")
+            if not isinstance(escenarios, list) or not all(isinstance(e, list) for e in escenarios):
+                raise ValueError("'escenarios' debe ser una lista de listas de cambios.")
+
+            data = await self.run_blocking(self.coverage_controller.simulate_coverage, event_id, escenarios)
+            self.set_header("Content-Type", "application/json")
+            self.write(json.dumps(data))
+        except (ValueError, KeyError) as e:
+            self.set_status(400)
+            self.write(json.dumps({"message": f"Error en los datos de la simulación: {str(e)}"}))
+        except Exception as e:
+            print(f"!!!! ERROR NO MANEJADO EN COVERAGESIMULATIONHANDLER.POST: {e} !!!!")
+            traceback.print_exc()
+            self.set_status(500)
+            self.write(json.dumps(
+                {"message": f"Error interno del servidor. Consulte los logs del servidor para más detalles."}))
+
+
+class CoverageExportHandler(CORSRequestHandler):
+    """
+    Exporta el panel de cobertura completo como NDJSON o CSV.
+    Las filas se serializan una a una y se envían por bloques con flush(),
+    así la memoria del servidor no crece con el número de rutas exportadas.
+    Ej: GET /coverage/export?format=csv&event_id=3
+    """
+
+    FORMATOS = {
+        "ndjson": "application/x-ndjson",
+        "csv": "text/csv; charset=utf-8",
+    }
+    COLUMNAS_CSV = [
+        "id", "nombre_ruta", "evento_id", "nombre_evento", "demanda_estimada", "capacidad_real",
+        "porcentaje_cobertura", "estado_cobertura", "fecha_calculo"
+    ]
+    # Filas acumuladas antes de cada flush.
+    FILAS_POR_BLOQUE = 500
+
+    def initialize(self, coverage_controller):
+        self.coverage_controller = coverage_controller
+
+    @authenticated_user
+    @require_permission("consultar_panel")
+    async def get(self):
+        formato = self.get_query_argument("format", "ndjson").lower()
+        event_id = self.get_query_argument("event_id", None)
+        status_filter = self.get_query_argument("status_filter", None)
+
+        if formato not in self.FORMATOS:
+            self.set_status(400)
+            self.write({"error": "El parámetro 'format' debe ser 'ndjson' o 'csv'."})
+            return
+        try:
+            event_id = int(event_id) if event_id else None
+        except ValueError:
+            self.set_status(400)
+            self.write({"error": "El parámetro 'event_id' debe ser un número entero válido si se proporciona."})
+            return
+
+        self.set_header("Content-Type", self.FORMATOS[formato])
+        self.set_header("Content-Disposition", f'attachment; filename="cobertura.{formato}"')
+
+        rows = self.coverage_controller.export_dashboard_rows(event_id, status_filter)
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=self.COLUMNAS_CSV) if formato == "csv" else None
+        if writer:
+            writer.writeheader()
+        enviado = False
+
+        try:
+            async with self.stream_slot():
+                try:
+                    while True:
+                        # Cada bloque se lee del cursor en el pool de hilos, fuera del IOLoop.
+                        bloque = await self.run_blocking(list, itertools.islice(rows, self.FILAS_POR_BLOQUE))
+                        for row in bloque:
+                            if writer:
+                                writer.writerow(row)
+                            else:
+                                buffer.write(json.dumps(row))
+                                buffer.write("\n")
+                        if len(bloque) < self.FILAS_POR_BLOQUE:
+                            break
+                        self.write(buffer.getvalue())
+                        buffer.seek(0)
+                        buffer.truncate()
+                        # flush() espera a que el cliente consuma el bloque anterior.
+                        await self.flush()
+                        enviado = True
+                    self.write(buffer.getvalue())
+                finally:
+                    # Libera el cursor del servidor aunque la exportación se interrumpa.
+                    await self.run_blocking(rows.close)
+        except tornado.iostream.StreamClosedError:
+            # El cliente cerró la conexión: no hay a quién responder.
+            return
+        except Exception as e:
+            print(f"\n!!!! ERROR CAPTURADO EN COVERAGEEXPORTHANDLER.GET: {e} !!!!")
+            traceback.print_exc()
+            # Con las cabeceras ya enviadas solo se puede cortar la respuesta.
+            if not enviado:
+                self.clear()
+                self.set_status(500)
+                self.write({"error": f"Error al exportar la cobertura: {str(e)}"})